@@ -1,3 +1,7 @@
 #!/usr/bin/env bash
 
-cat resources/raw_data_urls.txt | xargs -n 1 -P 6 wget -c -P ~/data/nyc-taxi/taxi_raw/
+export PYTHONPATH=~/repos/nyc-taxi:$PYTHONPATH
+
+source activate nyc-taxi
+
+python src/taxi/download_raw_data.py "$@"
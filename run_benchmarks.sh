@@ -0,0 +1,7 @@
+#!/usr/bin/env bash
+
+export PYTHONPATH=~/repos/nyc-taxi:$PYTHONPATH
+
+source activate nyc-taxi
+
+python src/benchmark/run_benchmarks.py "$@"
@@ -0,0 +1,234 @@
+"""
+Script benchmarks the counting and filtering hot paths on synthetic taxi data. Every benchmark runs in a fresh process,
+so the reported peak memory belongs to the benchmark alone. Results are saved per commit and can be compared against
+the results of another commit.
+"""
+import argparse
+import json
+import logging
+import resource
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, set_start_method
+
+import numpy as np
+
+from src.benchmark import synthetic_data
+from src.config.config import Config
+from src.util import data_loader
+
+# Files with location IDs are filtered by location ID, all others by coordinates
+LOCATION_ID_FILE_NAMES = ['yellow_tripdata_2016-07.csv', 'green_tripdata_2016-07.csv', 'fhv_tripdata_2017-01.csv']
+COORDINATE_FILE_NAMES = ['yellow_tripdata_2009-01.csv', 'yellow_tripdata_2015-01.csv', 'green_tripdata_2015-01.csv']
+
+
+def get_data_dir(n_rows):
+    """Directory of the synthetic data with a given number of rows per file
+
+    :param int n_rows: Number of rows per file
+    :return: Path of directory
+    """
+    return Config.PATH_DIR_BENCHMARK / f'rows={n_rows}'
+
+
+def generate_data(n_rows):
+    """Generates one synthetic file per schema era, unless it already exists
+
+    :param int n_rows: Number of rows per file
+    """
+    Config.PATH_DIR_TAXI = get_data_dir(n_rows=n_rows) / 'taxi_raw'
+
+    for seed, file_name in enumerate(synthetic_data.ERA_FILE_NAMES):
+        if not (Config.PATH_DIR_TAXI / file_name).exists():
+            logging.info(f'Generating {n_rows} rows for file: {file_name}')
+            synthetic_data.write_taxi_data(file_name=file_name, n_rows=n_rows, seed=seed)
+
+
+def get_cases(n_rows_list, n_cores_list):
+    """All benchmark cases
+
+    :param list n_rows_list: Numbers of rows per file
+    :param list n_cores_list: Numbers of cores for the benchmarks of whole runs
+    :return: List of cases (dictionaries with benchmark name, file name, number of rows and number of cores)
+    """
+    cases = []
+
+    for n_rows in n_rows_list:
+        cases += [{'benchmark': benchmark, 'file_name': file_name, 'n_rows': n_rows, 'n_cores': 1}
+                  for benchmark in ['count_rides_per_day', 'count_rides_per_day_mmap']
+                  for file_name in synthetic_data.ERA_FILE_NAMES]
+        cases += [{'benchmark': 'filter_by_location_id', 'file_name': file_name, 'n_rows': n_rows, 'n_cores': 1}
+                  for file_name in LOCATION_ID_FILE_NAMES]
+        cases += [{'benchmark': 'filter_by_coordinates', 'file_name': file_name, 'n_rows': n_rows, 'n_cores': 1}
+                  for file_name in COORDINATE_FILE_NAMES]
+        cases += [{'benchmark': benchmark, 'file_name': None, 'n_rows': n_rows, 'n_cores': 1}
+                  for benchmark in ['is_manhattan_lat_lon_batch', 'is_jfk_lat_lon_batch',
+                                    'is_manhattan_location_batch', 'is_jfk_location_batch']]
+        cases += [{'benchmark': benchmark, 'file_name': None, 'n_rows': n_rows, 'n_cores': n_cores}
+                  for benchmark in ['count_rides_per_day_main', 'filter_manhattan_to_jfk_main']
+                  for n_cores in n_cores_list]
+
+    return cases
+
+
+def get_peak_rss_mb():
+    """Peak resident set size of this process and its finished child processes
+
+    :return: Peak RSS in MB
+    """
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / 1024
+
+
+def run_case(case):
+    """Runs a benchmark case. Called in a fresh process: setup (e.g. loading polygons) is not timed.
+
+    :param dict case: Benchmark case as created by get_cases
+    :return: Case with number of processed rows, seconds, rows per second and peak RSS in MB
+    """
+    from src.taxi import count_rides_per_day, filter_manhattan_to_jfk
+
+    set_start_method('fork', force=True)  # like in real runs, worker processes inherit the config below
+
+    data_dir = get_data_dir(n_rows=case['n_rows'])
+    Config.PATH_DIR_TAXI = data_dir / 'taxi_raw'
+    Config.PATH_DIR_RESULTS = data_dir / 'results'
+    Config.PATH_DIR_FILTERED_RIDES = data_dir / 'results' / 'filtered_rides'
+    Config.USE_PARQUET_CACHE = False
+    Config.IS_INCREMENTAL = False
+    Config.N_CORES = case['n_cores']
+
+    benchmark, file_name, n_rows = case['benchmark'], case['file_name'], case['n_rows']
+    n_processed_rows = n_rows
+
+    if benchmark in ['count_rides_per_day', 'count_rides_per_day_mmap']:
+        Config.COUNT_ENGINE = 'mmap' if benchmark == 'count_rides_per_day_mmap' else 'pandas'
+
+        if Config.COUNT_ENGINE == 'mmap':
+            Config.QUALITY_RULES = {}  # files with a duration rule would be read with pandas
+
+        def run():
+            count_rides_per_day.count_rides_per_day(file_name=file_name)
+    elif benchmark in ['filter_by_location_id', 'filter_by_coordinates']:
+        geo_handler = filter_manhattan_to_jfk.load_geo_handler()
+        columns = data_loader.get_schema(file_name=file_name).columns
+
+        def run():
+            filter_manhattan_to_jfk.filter_manhattan_to_jfk(file_name=file_name, columns=columns,
+                                                            geo_handler=geo_handler)
+    elif benchmark.endswith('_batch'):
+        geo_handler = filter_manhattan_to_jfk.load_geo_handler()
+        taxi_data = synthetic_data.generate_taxi_data(file_name='yellow_tripdata_2009-01.csv',
+                                                      columns=['Start_Lat', 'Start_Lon'], n_rows=n_rows)
+        lat, lon = taxi_data['Start_Lat'].values, taxi_data['Start_Lon'].values
+        location_ids = synthetic_data.get_location_ids(rng=np.random.RandomState(0), center_share=0.5,
+                                                       center_location_ids=Config.MANHATTAN_LOCATION_IDS,
+                                                       n_rows=n_rows)
+        predicate = getattr(geo_handler, benchmark)
+
+        def run():
+            if 'lat_lon' in benchmark:
+                predicate(lat=lat, lon=lon)
+            else:
+                predicate(location_ids=location_ids)
+    else:
+        main = count_rides_per_day.main if benchmark == 'count_rides_per_day_main' else filter_manhattan_to_jfk.main
+        n_processed_rows = n_rows * len(synthetic_data.ERA_FILE_NAMES)
+
+        def run():
+            main()
+
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+
+    return dict(case, n_processed_rows=n_processed_rows, seconds=seconds, rows_per_second=n_processed_rows / seconds,
+                peak_rss_mb=get_peak_rss_mb())
+
+
+def get_case_key(case):
+    """Key which identifies a benchmark case across runs
+
+    :param dict case: Benchmark case
+    :return: Tuple of benchmark name, file name, number of rows and number of cores
+    """
+    return case['benchmark'], case['file_name'], case['n_rows'], case['n_cores']
+
+
+def get_commit():
+    """Short hash of the current commit of the repository
+
+    :return: Commit hash, 'unknown' outside of a git repository
+    """
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=str(Config.PATH_DIR_ROOT_REPO),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (subprocess.CalledProcessError, OSError):
+        return 'unknown'
+
+
+def log_results(results, baseline_results=None):
+    """Logs the results, compared against a baseline if given
+
+    :param list results: Results of run_case
+    :param list baseline_results: Results of an earlier run
+    """
+    baseline_by_key = {get_case_key(case=result): result for result in baseline_results or []}
+
+    for result in results:
+        message = f'{result["benchmark"]:<30} {str(result["file_name"] or ""):<28} rows={result["n_rows"]:<9} ' \
+                  f'cores={result["n_cores"]:<3} {result["rows_per_second"]:>14,.0f} rows/s ' \
+                  f'{result["peak_rss_mb"]:>8,.0f} MB'
+        baseline_result = baseline_by_key.get(get_case_key(case=result))
+
+        if baseline_result is not None:
+            message += f'  x{result["rows_per_second"] / baseline_result["rows_per_second"]:.2f} vs baseline'
+
+        logging.info(message)
+
+
+def main(label=None, baseline=None):
+    logging.info('Running benchmarks on synthetic taxi data...')
+
+    label = label or get_commit()
+    results_dir = Config.PATH_DIR_BENCHMARK / 'results'
+
+    for n_rows in Config.BENCHMARK_N_ROWS:
+        generate_data(n_rows=n_rows)
+
+    results = []
+
+    for case in get_cases(n_rows_list=Config.BENCHMARK_N_ROWS, n_cores_list=Config.BENCHMARK_N_CORES):
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+            results.append(executor.submit(run_case, case).result())
+
+    baseline_results = None
+
+    if baseline is not None:
+        with open(str(results_dir / f'{baseline}.json'), 'r') as f:
+            baseline_results = json.load(f)
+
+    log_results(results=results, baseline_results=baseline_results)
+
+    if not results_dir.exists():
+        results_dir.mkdir(parents=True)
+
+    with open(str(results_dir / f'{label}.json'), 'w') as f:
+        json.dump(results, f, indent=2)
+
+    logging.info(f'Benchmark results saved as: {label}')
+
+
+if __name__ == '__main__':
+    import sys
+
+    message_format = '%(asctime)s %(levelname)s %(module)s - %(funcName)s: %(message)s'
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO, format=message_format)
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--label', help='Name of the saved results (default: current commit)')
+    parser.add_argument('--baseline', help='Name of earlier results to compare against, e.g. a commit hash')
+    args = parser.parse_args()
+
+    main(label=args.label, baseline=args.baseline)
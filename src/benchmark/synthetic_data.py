@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+from src.config.config import Config
+from src.util import data_loader
+
+# One monthly file per schema era: coordinates (2009 and 2010-2016/06 layouts), location IDs (2016/07 onwards) and the
+# fhv files with pickup location only (2015-2016) or pickup and dropoff location (2017)
+ERA_FILE_NAMES = ['yellow_tripdata_2009-01.csv',
+                  'yellow_tripdata_2015-01.csv',
+                  'green_tripdata_2015-01.csv',
+                  'yellow_tripdata_2016-07.csv',
+                  'green_tripdata_2016-07.csv',
+                  'fhv_tripdata_2015-01.csv',
+                  'fhv_tripdata_2017-01.csv']
+
+# Share of rides starting in Manhattan / ending at JFK International Airport, roughly like in the real data
+MANHATTAN_SHARE = 0.6
+JFK_SHARE = 0.03
+
+MANHATTAN_CENTER = (40.758, -73.985)  # lat, lon
+JFK_CENTER = (40.645, -73.785)
+NYC_BOUNDS = (40.50, -74.25, 40.92, -73.70)  # min_lat, min_lon, max_lat, max_lon
+
+AMOUNT_KEYWORDS = ['amount', 'amt', 'fare', 'tip', 'toll', 'distance', 'surcharge', 'tax', 'extra']
+
+
+def get_datetimes(rng, file_name, n_rows):
+    """Random datetime strings within the month of a file, sorted like in the raw files
+
+    :param numpy.random.RandomState rng: Random number generator
+    :param str file_name: Name of the raw taxi data file
+    :param int n_rows: Number of rows
+    :return: Array of datetime strings ('YYYY-mm-dd HH:MM:SS')
+    """
+    _, year, month = data_loader.parse_file_name(file_name=file_name)
+    start = np.datetime64(f'{year}-{month:02d}', 's')
+    end = (np.datetime64(f'{year}-{month:02d}', 'M') + 1).astype('datetime64[s]')
+    seconds = np.sort(rng.randint(0, int((end - start).astype(np.int64)), size=n_rows))
+
+    return (start + seconds).astype(str).astype(object)
+
+
+def get_coordinates(rng, center_share, center, n_rows):
+    """Random coordinates, a share of them close to a center and the rest anywhere in New York City
+
+    :param numpy.random.RandomState rng: Random number generator
+    :param float center_share: Share of points close to the center
+    :param tuple center: Latitude and longitude of the center
+    :param int n_rows: Number of rows
+    :return: Tuple of latitudes and longitudes (rounded to 6 decimals like in the raw files)
+    """
+    min_lat, min_lon, max_lat, max_lon = NYC_BOUNDS
+    is_center = rng.rand(n_rows) < center_share
+
+    lat = np.where(is_center, rng.normal(center[0], 0.01, size=n_rows), rng.uniform(min_lat, max_lat, size=n_rows))
+    lon = np.where(is_center, rng.normal(center[1], 0.01, size=n_rows), rng.uniform(min_lon, max_lon, size=n_rows))
+
+    return lat.round(6), lon.round(6)
+
+
+def get_location_ids(rng, center_share, center_location_ids, n_rows):
+    """Random location IDs, a share of them in the given zones and the rest in any zone
+
+    :param numpy.random.RandomState rng: Random number generator
+    :param float center_share: Share of location IDs in the given zones
+    :param list center_location_ids: Location IDs of the zones
+    :param int n_rows: Number of rows
+    :return: Array of location IDs
+    """
+    all_location_ids = Config.TAXI_ZONES['LocationID'].values
+
+    return np.where(rng.rand(n_rows) < center_share, rng.choice(center_location_ids, size=n_rows),
+                    rng.choice(all_location_ids, size=n_rows))
+
+
+def generate_taxi_data(file_name, columns, n_rows, seed=0):
+    """Generates synthetic taxi data with the schema of a raw file. Location and datetime columns get realistic values,
+    all other columns plausible numbers.
+
+    :param str file_name: Name of the raw taxi data file, determines schema era and month
+    :param list columns: Column names of the file
+    :param int n_rows: Number of rows
+    :param int seed: Seed of the random number generator
+    :return: pandas.DataFrame
+    """
+    rng = np.random.RandomState(seed)
+    colnames = data_loader.get_location_datetime_columns(file_name=file_name)
+    pickup_lat, pickup_lon = get_coordinates(rng=rng, center_share=MANHATTAN_SHARE, center=MANHATTAN_CENTER,
+                                             n_rows=n_rows)
+    dropoff_lat, dropoff_lon = get_coordinates(rng=rng, center_share=JFK_SHARE, center=JFK_CENTER, n_rows=n_rows)
+    pickup_datetimes = get_datetimes(rng=rng, file_name=file_name, n_rows=n_rows)
+
+    values = {
+        colnames.pickup_location_id_colname: get_location_ids(rng=rng, center_share=MANHATTAN_SHARE,
+                                                              center_location_ids=Config.MANHATTAN_LOCATION_IDS,
+                                                              n_rows=n_rows),
+        colnames.dropoff_location_id_colname: get_location_ids(rng=rng, center_share=JFK_SHARE,
+                                                               center_location_ids=[Config.JFK_LOCATION_ID],
+                                                               n_rows=n_rows),
+        colnames.pickup_lat_colname: pickup_lat,
+        colnames.pickup_lon_colname: pickup_lon,
+        colnames.dropoff_lat_colname: dropoff_lat,
+        colnames.dropoff_lon_colname: dropoff_lon,
+        colnames.pickup_datetime_colname: pickup_datetimes,
+        colnames.dropoff_datetime_colname: pickup_datetimes,
+    }
+    taxi_data = pd.DataFrame(index=pd.RangeIndex(n_rows))
+
+    for colname in columns:
+        if colname in values:
+            taxi_data[colname] = values[colname]
+        elif colname.startswith('MISSING'):
+            taxi_data[colname] = np.nan
+        elif any(keyword in colname.lower() for keyword in AMOUNT_KEYWORDS):
+            taxi_data[colname] = rng.gamma(2, 7, size=n_rows).round(2)
+        else:
+            taxi_data[colname] = rng.randint(1, 6, size=n_rows)
+
+    return taxi_data
+
+
+def write_taxi_data(file_name, n_rows, seed=0):
+    """Writes a synthetic raw taxi data file to Config.PATH_DIR_TAXI
+
+    :param str file_name: Name of the raw taxi data file
+    :param int n_rows: Number of rows
+    :param int seed: Seed of the random number generator
+    :return: Path of the file
+    """
+    columns = data_loader.get_schema(file_name=file_name).columns
+    file_path = Config.PATH_DIR_TAXI / file_name
+
+    if not Config.PATH_DIR_TAXI.exists():
+        Config.PATH_DIR_TAXI.mkdir(parents=True)
+
+    generate_taxi_data(file_name=file_name, columns=columns, n_rows=n_rows, seed=seed) \
+        .to_csv(file_path, index=False, header=columns)
+
+    return file_path
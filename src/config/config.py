@@ -3,28 +3,109 @@ from pathlib import Path
 import pandas as pd
 
 
+class lazy_attribute:
+    """Class attribute which is computed on first access and then replaces itself with the computed value, so e.g.
+    lookup tables are only read by processes which use them.
+
+    :param function: Function which computes the value from the class
+    """
+    def __init__(self, function):
+        self.function = function
+        self.name = function.__name__
+
+    def __get__(self, instance, owner):
+        value = self.function(owner)
+        setattr(owner, self.name, value)
+
+        return value
+
+
 class Config:
     PATH_DIR_ROOT_DATA = Path().home() / 'data' / 'nyc-taxi'
     PATH_DIR_TAXI = PATH_DIR_ROOT_DATA / 'taxi_raw'
+    PATH_DIR_PARQUET = PATH_DIR_ROOT_DATA / 'taxi_parquet'
     PATH_DIR_RESULTS = PATH_DIR_ROOT_DATA / 'results'
+    PATH_DIR_BENCHMARK = PATH_DIR_ROOT_DATA / 'benchmark'
+    PATH_DIR_GEOMETRY_CACHE = PATH_DIR_ROOT_DATA / 'geometry_cache'
 
     PATH_DIR_ROOT_REPO = Path().home() / 'repos' / 'nyc-taxi'
     PATH_DIR_CONFIG = PATH_DIR_ROOT_REPO / 'src' / 'config'
     PATH_DIR_TAXI_INFO = PATH_DIR_ROOT_REPO / 'resources' / 'taxi_info'
 
     PATH_DIR_FILTERED_RIDES = PATH_DIR_ROOT_DATA / 'results' / 'filtered_rides'
+    PATH_DIR_FILTERED_RIDES_DATASET = PATH_DIR_ROOT_DATA / 'results' / 'filtered_rides_dataset'
 
     PATH_FILE_NAMES = PATH_DIR_CONFIG / 'file_names.csv'
+    PATH_FILE_RAW_DATA_URLS = PATH_DIR_ROOT_REPO / 'resources' / 'raw_data_urls.txt'
+    PATH_FILE_RAW_DATA_CHECKSUMS = PATH_DIR_ROOT_REPO / 'resources' / 'raw_data_checksums.txt'  # optional, md5sum format
     PATH_COLUMN_NAMES = PATH_DIR_CONFIG / 'column_names.csv'
+    PATH_COLUMN_TYPES = PATH_DIR_CONFIG / 'column_types.csv'  # types of the other columns in the Parquet cache
     PATH_SHAPE_FILE_NYC = PATH_DIR_TAXI_INFO / 'taxi_zones' / 'taxi_zones.shp'
 
-    TAXI_ZONES = pd.read_csv(PATH_DIR_TAXI_INFO / 'taxi_zone_lookup.csv')
-    LOCATION_NAME_MAPPING = pd.read_csv(PATH_DIR_CONFIG / 'location_name_mapping.csv')
+    @lazy_attribute
+    def TAXI_ZONES(cls):
+        return pd.read_csv(cls.PATH_DIR_TAXI_INFO / 'taxi_zone_lookup.csv')
+
+    @lazy_attribute
+    def LOCATION_NAME_MAPPING(cls):
+        return pd.read_csv(cls.PATH_DIR_CONFIG / 'location_name_mapping.csv')
+
+    @lazy_attribute
+    def COLUMN_TYPES(cls):
+        return pd.read_csv(cls.PATH_COLUMN_TYPES, index_col='column_name')['type'].to_dict()
 
-    MANHATTAN_LOCATION_IDS = list(TAXI_ZONES['LocationID'][TAXI_ZONES['Borough'] == 'Manhattan'].values)
-    JFK_LOCATION_ID = TAXI_ZONES['LocationID'][TAXI_ZONES['Zone'] == 'JFK Airport'].values[0]  # only one value
+    @lazy_attribute
+    def MANHATTAN_LOCATION_IDS(cls):
+        return list(cls.TAXI_ZONES['LocationID'][cls.TAXI_ZONES['Borough'] == 'Manhattan'].values)
+
+    @lazy_attribute
+    def JFK_LOCATION_ID(cls):
+        return cls.TAXI_ZONES['LocationID'][cls.TAXI_ZONES['Zone'] == 'JFK Airport'].values[0]  # only one value
 
     FROM_IDX = 0  # Can be used to load only a subset of the files
     TO_IDX = None  # Can be used to load only a subset of the files. If set to None, all files are loaded.
 
     N_CORES = 16
+    EXECUTION_BACKEND = 'process_pool'  # Runs the tasks of the jobs: 'serial', 'process_pool' or 'dask' (see execution.py)
+    DASK_SCHEDULER_ADDRESS = None  # e.g. 'tcp://10.0.0.1:8786'. None: 'dask' starts a LocalCluster with N_CORES workers.
+    REDUCTION_FAN_IN = 8  # Number of partial results merged at once in the tree reduction of the 'dask' backend
+
+    MIN_PICKUP_DATE = '2009-01-01'  # Rides with pickup date outside of this range are reported, but not counted
+    MAX_PICKUP_DATE = '2017-12-31'
+
+    USE_PARQUET_CACHE = True  # Read converted files from PATH_DIR_PARQUET if available (see convert_to_parquet.py)
+    CHUNK_SIZE = 1000000  # Number of rows per chunk when raw files are read in chunks
+    BYTE_RANGE_SIZE = 256 * 1024 ** 2  # Larger raw files are split into byte ranges of this size. None: no splitting.
+    DECOMPRESSION_QUEUE_SIZE = 4  # Blocks of 4 MB decompressed ahead of the parser for compressed raw files
+    COUNT_ENGINE = 'pandas'  # Reader of raw files in count_rides_per_day.py: 'pandas', 'mmap' (see date_scanner.py)
+    # or 'cube' (reduces the rollup cube of a file, see rollup_cube.py). 'mmap' evaluates the date window and the rules
+    # on numeric columns of QUALITY_RULES itself, files with other rules (e.g. the ride duration) are read with pandas.
+    N_SCAN_THREADS = 4  # Threads per process of the 'mmap' engine
+    SCAN_RANGE_SIZE = 64 * 1024 ** 2  # Size of the byte ranges the 'mmap' engine processes at once
+    DOWNLOAD_N_CONNECTIONS = 6  # Maximum number of open connections of download_raw_data.py
+    DOWNLOAD_RANGE_SIZE = 64 * 1024 ** 2  # Files are downloaded in byte ranges of this size
+    DOWNLOAD_N_RETRIES = 3  # Retries per byte range after connection errors
+    IS_INCREMENTAL = True  # Skip files which are up to date according to the manifest in PATH_DIR_RESULTS
+    PROFILE_FILE_NAMES = []  # Files which are processed under cProfile, stats in PATH_DIR_RESULTS/profiles
+    ANALYSES = ['daily_count', 'manhattan_to_jfk', 'hourly_pickups_per_zone', 'routes']  # Analyses of run_analyses.py
+    ROLLUP_CUBE_SUMS = ['fare_amount', 'trip_distance']  # Summed measures of the 'rollup_cube' analysis, [] for counts
+
+    ROUTES = {  # Routes of the 'routes' analysis, name: (origins, destinations) as boroughs, zone names or location IDs
+        'manhattan_to_jfk': (['Manhattan'], ['JFK Airport']),
+        'manhattan_to_lga': (['Manhattan'], ['LaGuardia Airport']),
+        'manhattan_to_ewr': (['Manhattan'], ['Newark Airport'])
+    }
+
+    QUALITY_RULES = {  # Data-quality rules applied before any geo work, name: (type, parameters). {} disables them.
+        'pickup_date_in_file_month': ('date_window', {'days_before': 1, 'days_after': 1}),
+        'pickup_in_nyc': ('bounding_box', {'location': 'pickup', 'min_lat': 40.49, 'max_lat': 40.92,
+                                           'min_lon': -74.27, 'max_lon': -73.68}),
+        'dropoff_in_nyc': ('bounding_box', {'location': 'dropoff', 'min_lat': 40.49, 'max_lat': 40.92,
+                                            'min_lon': -74.27, 'max_lon': -73.68}),
+        'non_negative_duration': ('non_negative_duration', {}),
+        'non_negative_fare': ('non_negative_fare', {}),
+        'valid_location_ids': ('location_id_range', {'min_location_id': 1, 'max_location_id': 265})
+    }
+
+    BENCHMARK_N_ROWS = [100000, 1000000]  # Rows per synthetic file, see run_benchmarks.py
+    BENCHMARK_N_CORES = [1, 4]  # Numbers of cores for the benchmarks of whole runs
@@ -0,0 +1,63 @@
+"""
+Script converts the raw taxi data files to the columnar Parquet cache. Files which are already converted and did not
+change since are skipped.
+"""
+import logging
+from multiprocessing import Pool
+
+from tqdm import tqdm
+
+from src.config.config import Config
+from src.util import data_loader, parquet_cache
+
+
+def convert_to_parquet(file_name):
+    """Converts one raw taxi data file to the Parquet cache. Files with values which do not fit the type of their
+    column are not converted, they are read from the raw file instead.
+
+    :param str file_name: File name to be converted
+    :return: Tuple of file name and number of converted rows (None if the file could not be converted)
+    """
+    logging.info(f'Converting file: {file_name}')
+
+    try:
+        n_rows = parquet_cache.convert_file(file_name=file_name,
+                                            columns=data_loader.get_schema(file_name=file_name).columns)
+    except ValueError as error:
+        logging.error(error)
+
+        return file_name, None
+
+    return file_name, n_rows
+
+
+def main():
+    logging.info('Converting raw taxi data to Parquet...')
+
+    schemas = data_loader.load_schema(from_idx=Config.FROM_IDX, to_idx=Config.TO_IDX)
+    file_names = schemas.keys()
+    available_file_names = [file_name for file_name in file_names
+                            if data_loader.get_raw_path(file_name=file_name).exists()]
+    outdated_file_names = [file_name for file_name in available_file_names
+                           if not parquet_cache.is_up_to_date(file_name=file_name)]
+
+    logging.info(f'Number of files to be converted: {len(outdated_file_names)} '
+                 f'(up to date: {len(available_file_names) - len(outdated_file_names)})')
+
+    pool = Pool(processes=Config.N_CORES)
+
+    for file_name, n_rows in tqdm(pool.imap_unordered(convert_to_parquet, outdated_file_names),
+                                  total=len(outdated_file_names)):
+        if n_rows is not None:
+            logging.info(f'Converted {n_rows} rows of file: {file_name}')
+
+    logging.info('Conversion completed.')
+
+
+if __name__ == '__main__':
+    import sys
+
+    message_format = '%(asctime)s %(levelname)s %(module)s - %(funcName)s: %(message)s'
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO, format=message_format)
+
+    main()
@@ -1,15 +1,19 @@
 """
 Script counts taxi rides per day.
 """
-import gc
 import logging
-from multiprocessing import Pool
+import sys
+from collections import Counter, defaultdict
 
-import pandas as pd
 from tqdm import tqdm
 
 from src.config.config import Config
-from src.util import data_loader
+from src.util import data_loader, date_scanner, execution, parquet_cache, profiler, quality_rules, rollup_cube
+from src.util.day_counter import DayCounter, get_date_keys
+from src.util.manifest import Manifest, get_code_version
+
+JOB_NAME = 'count_rides_per_day'
+ENGINES = ['pandas', 'mmap', 'cube']
 
 
 def get_pickup_date_column_name(column_names):
@@ -32,68 +36,371 @@ def get_date(datetime):
     return str(datetime)[:10]
 
 
-def count_rides_per_day(file_name):
-    """Counts taxi rides per day
+def filter_chunk(chunk, quality_filter, profile):
+    """Removes the rows of a chunk which are rejected by the data-quality rules
+
+    :param pandas.DataFrame chunk: Taxi data
+    :param QualityFilter quality_filter: Data-quality rules of the file
+    :param FileProfile profile: Measurements of the file
+    :return: Accepted rows
+    """
+    with profile.stage(name='quality') as stage:
+        taxi_data_filtered = quality_filter.apply(chunk=chunk)
+        stage.count(rows_in=chunk.shape[0], rows_out=taxi_data_filtered.shape[0])
+
+    return taxi_data_filtered
+
+
+def count_rides_per_day_from_cache(file_name, profile, rejection_counter):
+    """Counts taxi rides per day, reading only the pickup datetime column and the columns of the data-quality rules
+    from the Parquet cache
+
+    :param str file_name: File name to be loaded
+    :param FileProfile profile: Measurements of the file
+    :param RejectionCounter rejection_counter: Counter of the rows rejected by the data-quality rules
+    :return: DayCounter with taxi ride counts per day
+    """
+    pickup_datetime_colname = parquet_cache.NORMALIZED_COLNAMES.pickup_datetime_colname
+    quality_filter = quality_rules.QualityFilter(
+        file_name=file_name,
+        location_datetime_colnames=parquet_cache.get_cached_location_datetime_columns(file_name=file_name),
+        counter=rejection_counter
+    )
+    columns = [pickup_datetime_colname] + [colname for colname in quality_filter.get_columns()
+                                           if colname != pickup_datetime_colname]
+    day_counter = DayCounter()
+    chunks = parquet_cache.read_file_chunks(file_name=file_name, columns=columns)
+
+    profile.get_stage(name='read').count(bytes_read=profiler.get_bytes_read(file_name=file_name, is_parquet=True))
+
+    for chunk in profile.iter_stage(name='read', chunks=chunks):
+        chunk = filter_chunk(chunk=chunk, quality_filter=quality_filter, profile=profile)
+
+        with profile.stage(name='aggregate') as stage:
+            day_counter.add_datetimes(values=chunk[pickup_datetime_colname].values)
+            stage.count(rows_in=chunk.shape[0])
+
+    return day_counter
+
+
+def count_rides_per_day_by_scanning(file_name, column_idx, profile, quality_filter):
+    """Counts taxi rides per day with the memory-mapped scanner, which extracts only the pickup date column and the
+    numeric columns of the data-quality rules
+
+    :param str file_name: File name to be loaded
+    :param int column_idx: Position of the pickup date column
+    :param FileProfile profile: Measurements of the file
+    :param QualityFilter quality_filter: Data-quality rules of the file, the rejected rows are added to its counter
+    :return: DayCounter with taxi ride counts per day
+    """
+    with profile.stage(name='parse') as stage:
+        n_rows = quality_filter.counter.n_rows
+        day_counter = date_scanner.count_pickup_dates(file_name=file_name, column_idx=column_idx,
+                                                      quality_filter=quality_filter)
+        stage.count(rows_out=quality_filter.counter.n_rows - n_rows,
+                    bytes_read=profiler.get_bytes_read(file_name=file_name))
+
+    return day_counter
+
+
+def is_cube_up_to_date(file_name):
+    """Checks whether the rollup cube of a file was built from the current version of the file, with the current code
+    and data-quality rules, see the manifest of the 'rollup_cube' analysis of run_analyses.py
+
+    :param str file_name: Name of the raw taxi data file
+    :return: Flag whether the cube of the file is up to date
+    """
+    from src.taxi import run_analyses  # imports this module
+
+    return run_analyses.load_manifest(consumer=run_analyses.RollupCubeConsumer()).is_up_to_date(file_name=file_name)
+
+
+def count_rides_per_day_from_cube(file_name, profile, rejection_counter):
+    """Counts taxi rides per day by reducing the rollup cube of the file, see the 'rollup_cube' analysis of
+    run_analyses.py. The rows rejected by the data-quality rules are taken from the cube, which was built with the same
+    rules.
 
     :param str file_name: File name to be loaded
-    :return: Data frame with taxi ride counts per day
+    :param FileProfile profile: Measurements of the file
+    :param RejectionCounter rejection_counter: Counter of the rows rejected by the data-quality rules
+    :return: DayCounter with taxi ride counts per day
+    """
+    cube_path = rollup_cube.get_partial_result_path(file_name=file_name)
+
+    with profile.stage(name='read') as stage:
+        cube = rollup_cube.RollupCube.load(file_path=cube_path)
+        stage.count(rows_out=cube.size, bytes_read=cube_path.stat().st_size)
+
+    rejection_counter.merge(other=cube.rejection_counter)
+
+    with profile.stage(name='aggregate') as stage:
+        day_counter = cube.to_day_counter()
+        stage.count(rows_in=cube.size)
+
+    return day_counter
+
+
+def count_rides_per_day(file_name, profile=None, rejection_counter=None, byte_range=None):
+    """Counts taxi rides per day. Only the date part of the pickup datetime strings is parsed. Rides rejected by the
+    data-quality rules are not counted.
+
+    :param str file_name: File name to be loaded
+    :param FileProfile profile: Measurements of the file. If None, the measurements are discarded.
+    :param RejectionCounter rejection_counter: Counter of the rejected rows. If None, the numbers are discarded.
+    :param tuple byte_range: Byte range (start, end) of the raw file to be counted with pandas. If None, the whole file
+    is counted with Config.COUNT_ENGINE.
+    :return: DayCounter with taxi ride counts per day
     """
     logging.info(f'Counting taxi rides per day for file: {file_name}')
 
-    schemas = data_loader.load_schema(from_idx=Config.FROM_IDX, to_idx=Config.TO_IDX)
-    column_names = schemas[file_name]
+    profile = profile or profiler.FileProfile(file_name=file_name)
+    rejection_counter = rejection_counter if rejection_counter is not None else quality_rules.RejectionCounter()
+
+    if Config.COUNT_ENGINE not in ENGINES:
+        raise ValueError(f'Unknown engine: {Config.COUNT_ENGINE} (engines: {", ".join(ENGINES)})')
+
+    if Config.COUNT_ENGINE == 'cube' and byte_range is None:
+        if is_cube_up_to_date(file_name=file_name):
+            return count_rides_per_day_from_cube(file_name=file_name, profile=profile,
+                                                 rejection_counter=rejection_counter)
+
+        logging.warning(f'Rollup cube of file {file_name} is missing or outdated, falling back to pandas')
+
+    if Config.USE_PARQUET_CACHE and byte_range is None and parquet_cache.is_up_to_date(file_name=file_name):
+        return count_rides_per_day_from_cache(file_name=file_name, profile=profile,
+                                              rejection_counter=rejection_counter)
+
+    column_names = data_loader.get_schema(file_name=file_name).columns
+    location_datetime_colnames = data_loader.get_location_datetime_columns(file_name=file_name)
+    quality_filter = quality_rules.QualityFilter(file_name=file_name,
+                                                 location_datetime_colnames=location_datetime_colnames,
+                                                 counter=rejection_counter)
 
     pickup_date_column_name = get_pickup_date_column_name(column_names=column_names)
-    taxi_rides = pd.read_csv(Config.PATH_DIR_TAXI / file_name,
-                             skiprows=1,
-                             skip_blank_lines=True,
-                             low_memory=False,
-                             names=column_names,
-                             usecols=[pickup_date_column_name])
 
-    taxi_rides['pickup_date_as_day'] = pd.to_datetime(taxi_rides[pickup_date_column_name],
-                                                      format='%Y-%m-%d %H:%M:%S').dt.strftime('%Y-%m-%d')
+    column_idx = column_names.index(pickup_date_column_name)
 
-    daily_counts = taxi_rides.groupby(by='pickup_date_as_day', as_index=True).count()
-    daily_counts.drop(pickup_date_column_name, axis=1)
-    daily_counts.columns = ['num_rides']
+    if Config.COUNT_ENGINE == 'mmap' and byte_range is None \
+            and date_scanner.is_scannable(quality_filter=quality_filter, column_idx=column_idx):
+        try:
+            return count_rides_per_day_by_scanning(file_name=file_name, column_idx=column_idx, profile=profile,
+                                                   quality_filter=quality_filter)
+        except date_scanner.UnscannableFileError as error:
+            logging.warning(f'File {file_name} cannot be scanned ({error}), falling back to pandas')
 
-    del taxi_rides
-    gc.collect()
+    day_counter = DayCounter()
+    usecols = [pickup_date_column_name] + [colname for colname in quality_filter.get_columns()
+                                           if colname != pickup_date_column_name]
+    chunks = data_loader.read_csv_chunks(file_name=file_name,
+                                         columns=column_names,
+                                         usecols=usecols,
+                                         dtype={**data_loader.get_dtypes(location_datetime_colnames),
+                                                pickup_date_column_name: 'str'},
+                                         byte_range=byte_range)
 
-    return daily_counts
+    profile.get_stage(name='read').count(bytes_read=profiler.get_bytes_read(file_name=file_name,
+                                                                              byte_range=byte_range))
 
+    for chunk in profile.iter_stage(name='read', chunks=chunks):
+        chunk = filter_chunk(chunk=chunk, quality_filter=quality_filter, profile=profile)
 
-def main():
-    logging.info('Counting taxi rides per day...')
+        with profile.stage(name='parse') as stage:
+            keys = get_date_keys(values=chunk[pickup_date_column_name].values)
+            stage.count(rows_in=chunk.shape[0], rows_out=keys.size)
 
-    schemas = data_loader.load_schema(from_idx=Config.FROM_IDX, to_idx=Config.TO_IDX)
-    file_names = schemas.keys()
-    available_file_names = [file_name for file_name in file_names if (Config.PATH_DIR_TAXI / file_name).exists()]
+        with profile.stage(name='aggregate') as stage:
+            day_counter.add_date_keys(keys=keys)
+            stage.count(rows_in=keys.size)
 
-    logging.info(f'Number of files to be parsed: {len(available_file_names)}')
+    return day_counter
 
-    results = []
-    pool = Pool(processes=Config.N_CORES)
 
-    for counts_by_day in tqdm(pool.imap_unordered(count_rides_per_day, available_file_names),
-                              total=len(available_file_names)):
-        results.append(counts_by_day)
+def get_count_tasks(file_names, byte_range_size):
+    """Creates one task per file, or one task per byte range for raw files larger than byte_range_size which are
+    counted with pandas. Files which are read from the Parquet cache or the rollup cube, scanned by the 'mmap' engine or
+    compressed are never split.
 
-    results_concat = pd.concat(results)
-    total_counts_by_day = results_concat.groupby(results_concat.index).sum()
+    :param list file_names: Names of the raw taxi data files
+    :param int byte_range_size: Size of the byte ranges. If None, files are not split.
+    :return: List of tasks (file name, part index, byte range). Part index and byte range are None for whole files.
+    """
+    tasks = []
+
+    for file_name in file_names:
+        is_splittable = byte_range_size is not None \
+            and Config.COUNT_ENGINE == 'pandas' \
+            and not data_loader.is_compressed(file_name=file_name) \
+            and data_loader.get_raw_path(file_name=file_name).stat().st_size > byte_range_size \
+            and not (Config.USE_PARQUET_CACHE and parquet_cache.is_up_to_date(file_name=file_name))
+
+        if is_splittable:
+            byte_ranges = data_loader.get_byte_ranges(file_name=file_name, range_size=byte_range_size)
+            tasks += [(file_name, part_idx, byte_range) for part_idx, byte_range in enumerate(byte_ranges)]
+        else:
+            tasks.append((file_name, None, None))
+
+    return tasks
+
+
+def count_task(task):
+    """Counts taxi rides per day of a whole file or one byte range of it in a worker process
+
+    :param tuple task: File name, part index and byte range as created by get_count_tasks
+    :return: Tuple of file name, part index, DayCounter, RejectionCounter and FileProfile
+    """
+    file_name, part_idx, byte_range = task
+    profile = profiler.FileProfile(file_name=file_name, part_idx=part_idx)
+    rejection_counter = quality_rules.RejectionCounter()
+
+    with profiler.cprofile(job_name=JOB_NAME, file_name=file_name, part_idx=part_idx):
+        day_counter = count_rides_per_day(file_name=file_name, profile=profile, rejection_counter=rejection_counter,
+                                          byte_range=byte_range)
+
+    return file_name, part_idx, day_counter, rejection_counter, profile.finish()
+
+
+def get_partial_result_path(file_name):
+    """Path of the ride counts per day of a single file
+
+    :param str file_name: Name of the raw taxi data file
+    :return: Path of .npz file
+    """
+    return Config.PATH_DIR_RESULTS / 'num_rides_by_day_per_file' / f'{file_name}.npz'
+
+
+def load_manifest():
+    """Loads the manifest of this job. The code version covers all modules the counts depend on.
+
+    :return: Manifest
+    """
+    code_version = get_code_version(sys.modules[__name__], sys.modules[DayCounter.__module__], data_loader,
+                                    date_scanner, parquet_cache, quality_rules, rollup_cube,
+                                    settings=Config.QUALITY_RULES)
+
+    return Manifest(job_name=JOB_NAME, code_version=code_version)
+
+
+def merge_day_counters(day_counters):
+    """Merges ride counts per day, used as reduction function of the execution backends
+
+    :param list day_counters: DayCounters or paths of saved DayCounters
+    :return: Merged DayCounter
+    """
+    total_day_counter = DayCounter()
+
+    for day_counter in day_counters:
+        if not isinstance(day_counter, DayCounter):
+            day_counter = DayCounter.load(file_path=day_counter)
+
+        total_day_counter.merge(other=day_counter)
+
+    return total_day_counter
+
+
+def count_outdated_files(file_names, manifest, run_report, backend):
+    """Counts taxi rides per day for all files which are not up to date and stores the counts of every file as partial
+    result. The manifest is updated after each file, so an interrupted run resumes with the remaining files. The counts
+    of the byte ranges of a file are merged before they are stored.
+
+    :param list file_names: Names of the raw taxi data files
+    :param Manifest manifest: Manifest of this job
+    :param RunReport run_report: Collects the measurements of the counted files
+    :param Backend backend: Execution backend which runs the tasks
+    """
+    outdated_file_names = [file_name for file_name in file_names
+                           if not (Config.IS_INCREMENTAL and manifest.is_up_to_date(file_name=file_name))]
+
+    logging.info(f'Number of files to be parsed: {len(outdated_file_names)} '
+                 f'(up to date: {len(file_names) - len(outdated_file_names)})')
+
+    if not outdated_file_names:
+        return
+
+    partial_result_dir = get_partial_result_path(file_name='').parent
+
+    if not partial_result_dir.exists():
+        partial_result_dir.mkdir(parents=True)
+
+    tasks = get_count_tasks(file_names=outdated_file_names, byte_range_size=Config.BYTE_RANGE_SIZE)
+    n_parts = Counter(file_name for file_name, _, _ in tasks)
+    day_counters = defaultdict(list)
+    rejection_counters = defaultdict(quality_rules.RejectionCounter)
+
+    for file_name, part_idx, day_counter, rejection_counter, profile in tqdm(backend.map_unordered(count_task, tasks),
+                                                                             total=len(tasks)):
+        run_report.add(file_profile=profile)
+        day_counters[file_name].append(day_counter)
+        rejection_counters[file_name].merge(other=rejection_counter)
+
+        if len(day_counters[file_name]) < n_parts[file_name]:
+            continue
+
+        write_profile = profiler.FileProfile(file_name=file_name)
+
+        with write_profile.stage(name='write'):
+            merge_day_counters(day_counters=day_counters.pop(file_name)) \
+                .save(file_path=get_partial_result_path(file_name=file_name))
+            rejection_counters.pop(file_name).save(file_path=quality_rules.get_rejections_path(job_name=JOB_NAME,
+                                                                                               file_name=file_name))
+
+        run_report.add(file_profile=write_profile.finish())
+        manifest.update(file_name=file_name, output_path=get_partial_result_path(file_name=file_name))
+
+
+def merge_partial_results(file_names, manifest, backend=None):
+    """Merges the ride counts per day of all files and writes them to Config.PATH_DIR_RESULTS
+
+    :param list file_names: Names of the raw taxi data files
+    :param Manifest manifest: Manifest with the partial result path of each file
+    :param Backend backend: Execution backend which merges the partial results tree-wise. If None, they are merged in
+    this process.
+    """
+    partial_result_paths = [manifest.get_output_path(file_name=file_name) for file_name in file_names]
+
+    if backend is None:
+        total_day_counter = merge_day_counters(day_counters=partial_result_paths)
+    else:
+        total_day_counter = backend.tree_reduce(merge_day_counters, partial_result_paths)
 
     if not Config.PATH_DIR_RESULTS.exists():
         Config.PATH_DIR_RESULTS.mkdir(parents=True)
 
-    total_counts_by_day.to_csv(Config.PATH_DIR_RESULTS / 'num_rides_by_day.csv')
+    total_day_counter.to_frame().to_csv(Config.PATH_DIR_RESULTS / 'num_rides_by_day_unfiltered.csv')
+    total_day_counter.to_frame(min_date=Config.MIN_PICKUP_DATE, max_date=Config.MAX_PICKUP_DATE) \
+        .to_csv(Config.PATH_DIR_RESULTS / 'num_rides_by_day.csv')
 
-    logging.info(f'Counting completed. Total rides: {total_counts_by_day["num_rides"].sum()}')
+    n_rides = total_day_counter.get_n_rides()
+    n_rides_in_range = total_day_counter.get_n_rides(min_date=Config.MIN_PICKUP_DATE, max_date=Config.MAX_PICKUP_DATE)
 
+    logging.info(f'Rides with pickup date outside of {Config.MIN_PICKUP_DATE} - {Config.MAX_PICKUP_DATE}: '
+                 f'{n_rides - n_rides_in_range}')
+    logging.info(f'Rides with invalid pickup date: {total_day_counter.n_invalid}')
+    logging.info(f'Counting completed. Total rides: {n_rides_in_range}')
 
-if __name__ == '__main__':
-    import sys
 
+def main():
+    logging.info('Counting taxi rides per day...')
+
+    schemas = data_loader.load_schema(from_idx=Config.FROM_IDX, to_idx=Config.TO_IDX)
+    file_names = schemas.keys()
+    available_file_names = [file_name for file_name in file_names
+                            if data_loader.get_raw_path(file_name=file_name).exists()]
+
+    manifest = load_manifest()
+    run_report = profiler.RunReport(job_name=JOB_NAME)
+
+    with execution.get_backend() as backend:
+        count_outdated_files(file_names=available_file_names, manifest=manifest, run_report=run_report,
+                             backend=backend)
+        merge_partial_results(file_names=available_file_names, manifest=manifest, backend=backend)
+
+    rejections_path = quality_rules.write_rejections(job_name=JOB_NAME, file_names=available_file_names)
+
+    logging.info(f'Rows rejected by the data-quality rules written to: {rejections_path}')
+    run_report.save()
+
+
+if __name__ == '__main__':
     message_format = '%(asctime)s %(levelname)s %(module)s - %(funcName)s: %(message)s'
     logging.basicConfig(stream=sys.stdout, level=logging.INFO, format=message_format)
 
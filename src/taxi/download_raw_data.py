@@ -0,0 +1,60 @@
+"""
+Script downloads the raw taxi data files listed in Config.PATH_FILE_RAW_DATA_URLS to Config.PATH_DIR_TAXI. Files are
+downloaded concurrently in byte ranges and verified before they appear in the target directory. Files which are already
+complete are skipped. With --convert, every complete file is converted to the Parquet cache while the download of the
+other files continues.
+"""
+import argparse
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from src.config.config import Config
+from src.taxi import convert_to_parquet
+from src.util import data_loader, downloader, parquet_cache
+
+
+def main(convert=False):
+    logging.info('Downloading raw taxi data...')
+
+    urls = downloader.load_urls()
+    executor = ProcessPoolExecutor(max_workers=Config.N_CORES) if convert else None
+    futures = []
+
+    def on_complete(file_name):
+        file_name = data_loader.get_file_name(file_path=Config.PATH_DIR_TAXI / file_name)  # e.g. without '.gz'
+
+        if executor is not None and not parquet_cache.is_up_to_date(file_name=file_name):
+            futures.append(executor.submit(convert_to_parquet.convert_to_parquet, file_name))
+
+    results = downloader.download_files(urls=urls, target_dir=Config.PATH_DIR_TAXI, on_complete=on_complete,
+                                        checksums=downloader.load_checksums())
+
+    if executor is not None:
+        for future in futures:
+            file_name, n_rows = future.result()
+            logging.info(f'Converted {n_rows} rows of file: {file_name}')
+
+        executor.shutdown()
+
+    failed_file_names = [file_name for file_name, result in results.items() if isinstance(result, Exception)]
+
+    logging.info(f'Downloaded: {sum(result == "downloaded" for result in results.values())}, '
+                 f'skipped: {sum(result == "skipped" for result in results.values())}, '
+                 f'failed: {len(failed_file_names)}')
+
+    if failed_file_names:
+        logging.error(f'Failed downloads: {", ".join(sorted(failed_file_names))}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    message_format = '%(asctime)s %(levelname)s %(module)s - %(funcName)s: %(message)s'
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO, format=message_format)
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--convert', action='store_true',
+                        help='Convert complete files to the Parquet cache while the download continues')
+    args = parser.parse_args()
+
+    main(convert=args.convert)
@@ -1,27 +1,37 @@
 """
 Script filters taxi rides from Manhattan to JFK International Airport.
 """
-import gc
 import logging
+import sys
+from collections import Counter, defaultdict
 
-import dask.dataframe as dd
-import pandas as pd
 from tqdm import tqdm
 
 from src.config.config import Config
-from src.util import data_loader
+from src.util import data_loader, execution, filtered_rides, parquet_cache, pipeline, profiler, quality_rules, \
+    zone_index
 from src.util.geo_handler import GeoHandler
+from src.util.manifest import Manifest, get_code_version
 
+JOB_NAME = 'filter_manhattan_to_jfk'
 
-def cleanup(*dfs):
-    """Deletes unused objects and frees up memory.
+worker_geo_handler = None  # GeoHandler of a worker process, set by init_worker
+process_zone_index = None  # ZoneIndex of the process, loaded with the first file without location IDs
 
-    :param dfs: Data frames to be deleted
+
+class RowCounter:
+    """Counts the rows of a stream of data frames while passing the data frames on.
+
+    :param chunks: Iterator over data frames
     """
-    for df in dfs:
-        del df
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.n_rows = 0
 
-    gc.collect()
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.n_rows += chunk.shape[0]
+            yield chunk
 
 
 def is_unknown_location(dropoff_location_id_colname, dropoff_latitude_colname):
@@ -44,135 +54,309 @@ def is_known_location_ids(pickup_location_id_colname, dropoff_location_id_colnam
     return pickup_location_id_colname != 'nan' and dropoff_location_id_colname != 'nan'
 
 
-def filter_by_location_id(taxi_data, geo_handler, location_datetime_colnames, file_name, n_cores):
+def filter_by_location_id(taxi_data, geo_handler, location_datetime_colnames):
     """Filters taxi data from Manhattan to JFK International Airport by location ID
 
     :param taxi_data: Taxi data to be filtered
     :param geo_handler: GeoHandler
     :param location_datetime_colnames: Location
-    :param file_name: File name for saving filtered data
-    :param n_cores: Number of cores to use for parallelisation
+    :return: Filtered taxi data
     """
-    taxi_data_dask = dd.from_pandas(taxi_data, npartitions=n_cores)
-    taxi_data_dask['is_dropoff_jfk'] = taxi_data_dask.map_partitions(
-        lambda partition: partition.apply(
-            lambda row: geo_handler.is_jfk_location(row[location_datetime_colnames.dropoff_location_id]), axis=1
-        )
+    is_dropoff_jfk = geo_handler.is_jfk_location_batch(
+        location_ids=taxi_data[location_datetime_colnames.dropoff_location_id_colname].values
     )
-    taxi_data_filtered = taxi_data_dask[taxi_data_dask['is_dropoff_jfk'] == True].compute()
-
-    logging.info(f'Shape of taxi data with JFK Airport as dropoff location: {taxi_data_filtered.shape}')
+    taxi_data_filtered = taxi_data[is_dropoff_jfk]
 
     if taxi_data_filtered.shape[0] > 0:
-        taxi_data_dask = dd.from_pandas(taxi_data_filtered, npartitions=n_cores)
-
-        taxi_data_dask['is_pickup_manhattan'] = taxi_data_dask.map_partitions(
-            lambda partition: partition.apply(
-                lambda row: geo_handler.is_manhattan_location(row[location_datetime_colnames.pickup_location_id]), axis=1
-            )
+        is_pickup_manhattan = geo_handler.is_manhattan_location_batch(
+            location_ids=taxi_data_filtered[location_datetime_colnames.pickup_location_id_colname].values
         )
-        taxi_data_filtered = taxi_data_dask[taxi_data_dask['is_pickup_manhattan'] == True].compute()
+        taxi_data_filtered = taxi_data_filtered[is_pickup_manhattan]
 
-        logging.info(f'Shape of taxi data from Manhattan to JFK Airport: {taxi_data_filtered.shape}')
+    return taxi_data_filtered
 
-    taxi_data_filtered.to_csv(Config.PATH_DIR_FILTERED_RIDES / file_name)
-    cleanup(taxi_data, taxi_data_filtered)
 
-
-def filter_by_coordinates(taxi_data, geo_handler, location_datetime_colnames, file_name, n_cores):
+def filter_by_coordinates(taxi_data, geo_handler, location_datetime_colnames):
     """Filters taxi data from Manhattan to JFK International Airport by latitude/longitude coordinates.
 
     :param taxi_data: Taxi data to be filtered
     :param geo_handler: GeoHandler
     :param location_datetime_colnames: Location
-    :param file_name: File name for saving filtered data
-    :param n_cores: Number of cores to use for parallelisation
+    :return: Filtered taxi data
     """
-    taxi_data_dask = dd.from_pandas(taxi_data, npartitions=n_cores)
+    is_dropoff_jfk = geo_handler.is_jfk_lat_lon_batch(
+        lat=taxi_data[location_datetime_colnames.dropoff_lat_colname].values,
+        lon=taxi_data[location_datetime_colnames.dropoff_lon_colname].values
+    )
+    taxi_data_filtered = taxi_data[is_dropoff_jfk]
 
-    taxi_data_dask['is_dropoff_jfk'] = taxi_data_dask.map_partitions(
-        lambda partition: partition.apply(
-            lambda row: geo_handler.is_jfk_lat_lon(lat=row[location_datetime_colnames.dropoff_lat_colname],
-                                                   lon=row[location_datetime_colnames.dropoff_lon_colname]), axis=1
+    if taxi_data_filtered.shape[0] > 0:
+        is_pickup_manhattan = geo_handler.is_manhattan_lat_lon_batch(
+            lat=taxi_data_filtered[location_datetime_colnames.pickup_lat_colname].values,
+            lon=taxi_data_filtered[location_datetime_colnames.pickup_lon_colname].values
         )
-    )
-    taxi_data_filtered = taxi_data_dask[taxi_data_dask['is_dropoff_jfk'] == True].compute()
+        taxi_data_filtered = taxi_data_filtered[is_pickup_manhattan]
 
-    logging.info(f'Shape of taxi data with JFK Airport as dropoff location: {taxi_data_filtered.shape}')
+    return taxi_data_filtered
 
-    if taxi_data_filtered.shape[0] > 0:
-        taxi_data_dask = dd.from_pandas(taxi_data_filtered, npartitions=n_cores)
 
-        taxi_data_dask['is_pickup_manhattan'] = taxi_data_dask.map_partitions(
-            lambda partition: partition.apply(
-                lambda row: geo_handler.is_manhattan_lat_lon(lat=row[location_datetime_colnames.pickup_lat_colname],
-                                                             lon=row[location_datetime_colnames.pickup_lon_colname]), axis=1
-            )
-        )
-        taxi_data_filtered = taxi_data_dask[taxi_data_dask['is_pickup_manhattan'] == True].compute()
+def get_chunk_filter(location_datetime_colnames):
+    """Chooses the filter for the chunks of a file: by location ID if the file has location IDs, by coordinates
+    otherwise
+
+    :param LocationTimeColNames location_datetime_colnames: Location and datetime column names of the chunks
+    :return: filter_by_location_id or filter_by_coordinates
+    """
+    if is_known_location_ids(pickup_location_id_colname=location_datetime_colnames.pickup_location_id_colname,
+                             dropoff_location_id_colname=location_datetime_colnames.dropoff_location_id_colname):
+        return filter_by_location_id
+
+    return filter_by_coordinates
+
+
+def filter_chunks(chunks, geo_handler, location_datetime_colnames, profile=None, quality_filter=None):
+    """Filters a stream of taxi data chunks for rides from Manhattan to JFK International Airport
+
+    :param chunks: Iterator over taxi data chunks
+    :param GeoHandler geo_handler: Object to handle geo calculations
+    :param LocationTimeColNames location_datetime_colnames: Location and datetime column names of the chunks
+    :param FileProfile profile: Measurements of the file. If None, the measurements are discarded.
+    :param QualityFilter quality_filter: Data-quality rules, evaluated before the geo filter. If None, no rows are
+    rejected.
+    :return: Generator of filtered chunks (one per input chunk, possibly empty)
+    """
+    filter_chunk = get_chunk_filter(location_datetime_colnames=location_datetime_colnames)
+    profile = profile or profiler.FileProfile(file_name=None)
+
+    for chunk in chunks:
+        if quality_filter is not None:
+            with profile.stage(name='quality') as stage:
+                n_rows = chunk.shape[0]
+                chunk = quality_filter.apply(chunk=chunk)
+                stage.count(rows_in=n_rows, rows_out=chunk.shape[0])
 
-        logging.info(f'Shape of taxi data from Manhattan to JFK Airport: {taxi_data_filtered.shape}')
+        with profile.stage(name='geo_filter') as stage:
+            taxi_data_filtered = filter_chunk(taxi_data=chunk,
+                                              geo_handler=geo_handler,
+                                              location_datetime_colnames=location_datetime_colnames)
+            stage.count(rows_in=chunk.shape[0], rows_out=taxi_data_filtered.shape[0])
 
-    taxi_data_filtered.to_csv(Config.PATH_DIR_FILTERED_RIDES / file_name)
-    cleanup(taxi_data, taxi_data_filtered)
+        yield taxi_data_filtered
 
 
-def filter_manhattan_to_jfk(file_name, columns, geo_handler, n_cores):
-    """Loads given file and filters for taxi rides from Manhattan to JFK International Airport
+def get_zone_index(location_datetime_colnames):
+    """Zone index to look up the location IDs of files without location IDs. It is loaded once per process.
+
+    :param LocationTimeColNames location_datetime_colnames: Location and datetime column names of the file
+    :return: ZoneIndex, None if the file has location IDs
+    """
+    global process_zone_index
+
+    if is_known_location_ids(pickup_location_id_colname=location_datetime_colnames.pickup_location_id_colname,
+                             dropoff_location_id_colname=location_datetime_colnames.dropoff_location_id_colname):
+        return None
+
+    if process_zone_index is None:
+        process_zone_index = zone_index.load_zone_index()
+
+    return process_zone_index
+
+
+def write_chunks(chunks, file_name, file_path, location_datetime_colnames, zone_index=None, profile=None):
+    """Writes a stream of filtered rides to a Parquet file with the unified schema of filtered_rides.SCHEMA. The file
+    is written even if there are no chunks at all.
+
+    :param chunks: Iterator over data frames
+    :param str file_name: Name of the raw taxi data file
+    :param pathlib.Path file_path: Path of Parquet file
+    :param LocationTimeColNames location_datetime_colnames: Location and datetime column names of the chunks
+    :param ZoneIndex zone_index: Zone index, only needed for files without location IDs
+    :param FileProfile profile: Measurements of the file. If None, the measurements are discarded.
+    :return: Number of written rows
+    """
+    profile = profile or profiler.FileProfile(file_name=None)
+    writer = filtered_rides.RidesWriter(file_name=file_name, file_path=file_path,
+                                        location_datetime_colnames=location_datetime_colnames, zone_index=zone_index)
+
+    for chunk in chunks:
+        with profile.stage(name='write') as stage:
+            writer.write(rides=chunk)
+            stage.count(rows_in=chunk.shape[0], rows_out=chunk.shape[0])
+
+    with profile.stage(name='write'):
+        writer.close()
+
+    return writer.n_rows
+
+
+def get_output_path(file_name, part_idx=None):
+    """Path of the filtered rides of a file, or of one part of it if the file is split into byte ranges
+
+    :param str file_name: Name of the raw taxi data file
+    :param int part_idx: Index of the byte range. If None, the path of the whole file is returned.
+    :return: Path of Parquet file
+    """
+    if part_idx is None:
+        return Config.PATH_DIR_FILTERED_RIDES / f'{file_name}.parquet'
+
+    return Config.PATH_DIR_FILTERED_RIDES / f'{file_name}.part-{part_idx}.parquet'
+
+
+def filter_manhattan_to_jfk(file_name, columns, geo_handler, byte_range=None, file_path=None, profile=None,
+                            rejection_counter=None):
+    """Streams given file and filters for taxi rides from Manhattan to JFK International Airport. Matching rides are
+    converted to the unified schema of filtered_rides.SCHEMA and appended to the output file chunk by chunk, so memory
+    usage does not depend on the file size. Rides rejected by the data-quality rules are removed before the geo filter.
 
     :param str file_name: File to be loaded and filtered
     :param list columns: Column names to be loaded from file
     :param GeoHandler geo_handler: Object to handle geo calculations
-    :param int n_cores: Number of cores to be used for parallel computation
+    :param tuple byte_range: Byte range (start, end) of the file to be filtered. If None, the whole file is filtered.
+    :param pathlib.Path file_path: Output path. If None, the output path of the whole file is used.
+    :param FileProfile profile: Measurements of the file. If None, the measurements are discarded.
+    :param RejectionCounter rejection_counter: Counter of the rejected rows. If None, the numbers are discarded.
+    :return: Tuple of number of read rows and number of filtered rides
     """
     logging.info(f'Filtering file: {file_name}')
 
-    location_datetime_colnames = data_loader.get_location_datetime_columns(file_name=file_name)
-
-    taxi_data = pd.read_csv(Config.PATH_DIR_TAXI / file_name,
-                            skiprows=1,
-                            skip_blank_lines=True,
-                            low_memory=False,
-                            names=columns)
+    profile = profile or profiler.FileProfile(file_name=file_name)
 
-    logging.info(f'Shape of taxi data: {taxi_data.shape}')
+    location_datetime_colnames = data_loader.get_location_datetime_columns(file_name=file_name)
+    file_path = file_path or get_output_path(file_name=file_name)
 
     if not Config.PATH_DIR_FILTERED_RIDES.exists():
-        Config.PATH_DIR_FILTERED_RIDES.mkdir(parents=True)
+        Config.PATH_DIR_FILTERED_RIDES.mkdir(parents=True, exist_ok=True)
 
     if is_unknown_location(dropoff_location_id_colname=location_datetime_colnames.dropoff_location_id_colname,
                            dropoff_latitude_colname=location_datetime_colnames.dropoff_lat_colname):
         logging.info('Unknown dropoff location...')
 
-        taxi_data['is_pickup_manhattan'] = False
-        taxi_data['is_dropoff_jfk'] = False
+        n_rows = 0
+        n_rides = write_chunks(chunks=[], file_name=file_name, file_path=file_path,
+                               location_datetime_colnames=location_datetime_colnames, profile=profile)
+    else:
+        is_parquet = pipeline.is_read_from_cache(file_name=file_name, byte_range=byte_range)
+        chunks, location_datetime_colnames = pipeline.iter_taxi_data(file_name=file_name, columns=columns,
+                                                                     byte_range=byte_range)
+        profile.get_stage(name='read').count(bytes_read=profiler.get_bytes_read(file_name=file_name,
+                                                                                  byte_range=byte_range,
+                                                                                  is_parquet=is_parquet))
+        chunks = RowCounter(chunks=profile.iter_stage(name='read', chunks=chunks))
+        quality_filter = quality_rules.QualityFilter(file_name=file_name,
+                                                     location_datetime_colnames=location_datetime_colnames,
+                                                     counter=rejection_counter)
+        filtered_chunks = filter_chunks(chunks=chunks,
+                                        geo_handler=geo_handler,
+                                        location_datetime_colnames=location_datetime_colnames,
+                                        profile=profile,
+                                        quality_filter=quality_filter)
+
+        n_rides = write_chunks(chunks=filtered_chunks, file_name=file_name, file_path=file_path,
+                               location_datetime_colnames=location_datetime_colnames,
+                               zone_index=get_zone_index(location_datetime_colnames=location_datetime_colnames),
+                               profile=profile)
+        n_rows = chunks.n_rows
+
+    logging.info(f'Number of taxi rides from Manhattan to JFK Airport: {n_rides}')
+    logging.info('Filtered rides written to disk.')
+
+    return n_rows, n_rides
+
+
+def load_geo_handler():
+    """Loads the polygons of Manhattan and JFK International Airport
+
+    :return: GeoHandler
+    """
+    return GeoHandler(manhattan_polygon=data_loader.load_manhattan_polygon(),
+                      manhattan_location_ids=Config.MANHATTAN_LOCATION_IDS,
+                      jfk_polygon=data_loader.load_jfk_polygon(),
+                      jfk_location_id=Config.JFK_LOCATION_ID)
+
 
-        subset = taxi_data.loc[(taxi_data['is_pickup_manhattan'] == True) & (taxi_data['is_dropoff_jfk'] == True)]
-        subset.to_csv(Config.PATH_DIR_FILTERED_RIDES / file_name)
-        cleanup(taxi_data, subset)
+def init_worker(geo_handler=None):
+    """Initializes a worker process. The polygons are sent once per worker instead of being pickled per task.
 
-        logging.info('Filtered rides written to disk.')
-    elif is_known_location_ids(pickup_location_id_colname=location_datetime_colnames.pickup_location_id,
-                               dropoff_location_id_colname=location_datetime_colnames.dropoff_location_id):
-        logging.info('Filtering by location ID...')
+    :param GeoHandler geo_handler: Polygons loaded by the driver. If None, the worker loads them itself.
+    """
+    global worker_geo_handler
+    worker_geo_handler = geo_handler if geo_handler is not None else load_geo_handler()
 
-        filter_by_location_id(taxi_data=taxi_data,
-                              geo_handler=geo_handler,
-                              location_datetime_colnames=location_datetime_colnames,
-                              file_name=file_name,
-                              n_cores=n_cores)
 
-        logging.info('Filtered rides written to disk.')
-    else:
-        logging.info('Filtering by latitude/longitude coordinates...')
+def get_filter_tasks(file_names, byte_range_size):
+    """Creates one task per file, or one task per byte range for files larger than byte_range_size. Files which are
+    read from the Parquet cache, are compressed or have no dropoff location are never split.
+
+    :param list file_names: Names of the raw taxi data files
+    :param int byte_range_size: Size of the byte ranges. If None, files are not split.
+    :return: List of tasks (file name, part index, byte range). Part index and byte range are None for whole files.
+    """
+    tasks = []
+
+    for file_name in file_names:
+        colnames = data_loader.get_location_datetime_columns(file_name=file_name)
+        is_splittable = byte_range_size is not None \
+            and not data_loader.is_compressed(file_name=file_name) \
+            and data_loader.get_raw_path(file_name=file_name).stat().st_size > byte_range_size \
+            and not (Config.USE_PARQUET_CACHE and parquet_cache.is_up_to_date(file_name=file_name)) \
+            and not is_unknown_location(dropoff_location_id_colname=colnames.dropoff_location_id_colname,
+                                        dropoff_latitude_colname=colnames.dropoff_lat_colname)
+
+        if is_splittable:
+            byte_ranges = data_loader.get_byte_ranges(file_name=file_name, range_size=byte_range_size)
+            tasks += [(file_name, part_idx, byte_range) for part_idx, byte_range in enumerate(byte_ranges)]
+        else:
+            tasks.append((file_name, None, None))
+
+    return tasks
+
+
+def filter_task(task):
+    """Filters a whole file or one byte range of it in a worker process
+
+    :param tuple task: File name, part index and byte range as created by get_filter_tasks
+    :return: Tuple of file name, part index, number of read rows, number of filtered rides, RejectionCounter and
+    FileProfile
+    """
+    file_name, part_idx, byte_range = task
+    profile = profiler.FileProfile(file_name=file_name, part_idx=part_idx)
+    rejection_counter = quality_rules.RejectionCounter()
+
+    with profiler.cprofile(job_name=JOB_NAME, file_name=file_name, part_idx=part_idx):
+        n_rows, n_rides = filter_manhattan_to_jfk(file_name=file_name,
+                                                  columns=data_loader.get_schema(file_name=file_name).columns,
+                                                  geo_handler=worker_geo_handler,
+                                                  byte_range=byte_range,
+                                                  file_path=get_output_path(file_name=file_name, part_idx=part_idx),
+                                                  profile=profile,
+                                                  rejection_counter=rejection_counter)
+
+    return file_name, part_idx, n_rows, n_rides, rejection_counter, profile.finish()
+
+
+def merge_parts(file_name, part_indices):
+    """Merges the filtered rides of all byte ranges of a file into one file, in the order of the byte ranges
 
-        filter_by_coordinates(taxi_data=taxi_data,
-                              geo_handler=geo_handler,
-                              location_datetime_colnames=location_datetime_colnames,
-                              file_name=file_name,
-                              n_cores=n_cores)
+    :param str file_name: Name of the raw taxi data file
+    :param part_indices: Indices of the byte ranges
+    """
+    part_paths = [get_output_path(file_name=file_name, part_idx=part_idx) for part_idx in sorted(part_indices)]
+    filtered_rides.concat_files(file_paths=part_paths, file_path=get_output_path(file_name=file_name))
+
+    for part_path in part_paths:
+        part_path.unlink()
+
+
+def load_manifest():
+    """Loads the manifest of this job. The code version covers all modules the filtered rides depend on.
+
+    :return: Manifest
+    """
+    code_version = get_code_version(sys.modules[__name__], sys.modules[GeoHandler.__module__], data_loader,
+                                    filtered_rides, parquet_cache, pipeline, quality_rules, zone_index,
+                                    settings=Config.QUALITY_RULES)
 
-        logging.info('Filtered rides written to disk.')
+    return Manifest(job_name=JOB_NAME, code_version=code_version)
 
 
 def main():
@@ -180,25 +364,59 @@ def main():
 
     schemas = data_loader.load_schema(from_idx=Config.FROM_IDX, to_idx=Config.TO_IDX)
     file_names = schemas.keys()
-    available_file_names = [file_name for file_name in file_names if (Config.PATH_DIR_TAXI / file_name).exists()]
+    available_file_names = [file_name for file_name in file_names
+                            if data_loader.get_raw_path(file_name=file_name).exists()]
+
+    manifest = load_manifest()
+    outdated_file_names = [file_name for file_name in available_file_names
+                           if not (Config.IS_INCREMENTAL and manifest.is_up_to_date(file_name=file_name))]
+
+    tasks = get_filter_tasks(file_names=outdated_file_names, byte_range_size=Config.BYTE_RANGE_SIZE)
+    n_parts = Counter(file_name for file_name, part_idx, _ in tasks if part_idx is not None)
+    finished_parts = defaultdict(set)
+    rejection_counters = defaultdict(quality_rules.RejectionCounter)
+
+    logging.info(f'Number of files to be filtered: {len(outdated_file_names)} (tasks: {len(tasks)}, '
+                 f'up to date: {len(available_file_names) - len(outdated_file_names)})')
+
+    run_report = profiler.RunReport(job_name=JOB_NAME)
 
-    geo_handler = GeoHandler(manhattan_polygon=data_loader.load_manhattan_polygon(),
-                             manhattan_location_ids=Config.MANHATTAN_LOCATION_IDS,
-                             jfk_polygon=data_loader.load_jfk_polygon(),
-                             jfk_location_id=Config.JFK_LOCATION_ID)
+    with execution.get_backend(initializer=init_worker, initargs=(load_geo_handler(),)) as backend:
+        results = backend.map_unordered(filter_task, tasks)
 
-    for file_name in tqdm(available_file_names):
-        filter_manhattan_to_jfk(file_name=file_name,
-                                columns=schemas[file_name],
-                                geo_handler=geo_handler,
-                                n_cores=Config.N_CORES)
+        for file_name, part_idx, n_rows, n_rides, rejection_counter, profile in tqdm(results, total=len(tasks)):
+            run_report.add(file_profile=profile)
+            rejection_counters[file_name].merge(other=rejection_counter)
 
+            if part_idx is not None:
+                finished_parts[file_name].add(part_idx)
+
+                if len(finished_parts[file_name]) < n_parts[file_name]:
+                    continue
+
+                merge_profile = profiler.FileProfile(file_name=file_name)
+
+                with merge_profile.stage(name='write'):
+                    merge_parts(file_name=file_name, part_indices=finished_parts.pop(file_name))
+
+                run_report.add(file_profile=merge_profile.finish())
+
+            rejection_counters.pop(file_name).save(file_path=quality_rules.get_rejections_path(job_name=JOB_NAME,
+                                                                                               file_name=file_name))
+            manifest.update(file_name=file_name, output_path=get_output_path(file_name=file_name))
+
+    rebuilt_months = filtered_rides.build_dataset(file_names=available_file_names, get_source_path=get_output_path)
+
+    logging.info(f'Months rebuilt in {Config.PATH_DIR_FILTERED_RIDES_DATASET}: {len(rebuilt_months)}')
+
+    rejections_path = quality_rules.write_rejections(job_name=JOB_NAME, file_names=available_file_names)
+
+    logging.info(f'Rows rejected by the data-quality rules written to: {rejections_path}')
+    run_report.save()
     logging.info('Filtering completed.')
 
 
 if __name__ == '__main__':
-    import sys
-
     message_format = '%(asctime)s %(levelname)s %(module)s - %(funcName)s: %(message)s'
     logging.basicConfig(stream=sys.stdout, level=logging.INFO, format=message_format)
 
@@ -0,0 +1,463 @@
+"""
+Script computes several analyses in a single scan over the taxi data. Every file is read once and all chunks are
+passed to each analysis in Config.ANALYSES.
+"""
+import json
+import logging
+import sys
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from src.config.config import Config
+from src.taxi import count_rides_per_day, filter_manhattan_to_jfk
+from src.util import data_loader, execution, filtered_rides, parquet_cache, pipeline, quality_rules, rollup_cube, \
+    route_filter, zone_index
+from src.util.day_counter import DayCounter, get_day_numbers
+from src.util.manifest import Manifest, get_code_version
+from src.util.pipeline import Consumer
+
+JOB_NAME = 'run_analyses'
+
+worker_consumers = None  # Consumers of a worker process by name, set by init_worker
+
+
+def get_pickup_hours(values):
+    """Hour of day of pickup datetimes. For strings only the two hour digits are looked at, which are at the same
+    position in both supported formats ('YYYY-mm-dd HH...' and 'mm/dd/YYYY HH...').
+
+    :param numpy.ndarray values: Datetimes (datetime64) or datetime strings (str or bytes)
+    :return: Array of hours (int64), -1 for missing or invalid values
+    """
+    if np.issubdtype(values.dtype, np.datetime64):
+        hours = values.astype('datetime64[h]').astype(np.int64) % 24
+
+        return np.where(np.isnat(values), -1, hours)
+
+    chars = np.asarray(values).astype('S13').view(np.uint8).reshape(-1, 13)
+    digits = chars[:, 11:13].astype(np.int64) - ord('0')
+    hours = digits[:, 0] * 10 + digits[:, 1]
+
+    return np.where((digits >= 0).all(axis=1) & (digits <= 9).all(axis=1) & (hours < 24), hours, -1)
+
+
+class DailyCountConsumer(Consumer):
+    """Counts taxi rides per day, see count_rides_per_day.py. The counts per file are kept apart from those of
+    count_rides_per_day.py, which are tracked by another manifest.
+    """
+    name = 'daily_count'
+    dependencies = (count_rides_per_day, sys.modules[DayCounter.__module__])
+
+    def __init__(self):
+        self.file_name = None
+        self.pickup_datetime_colname = None
+        self.day_counter = None
+
+    def get_output_path(self, file_name):
+        return Config.PATH_DIR_RESULTS / JOB_NAME / 'num_rides_by_day_per_file' / f'{file_name}.npz'
+
+    def start_file(self, file_name, columns, location_datetime_colnames):
+        self.file_name = file_name
+        self.pickup_datetime_colname = location_datetime_colnames.pickup_datetime_colname
+        self.day_counter = DayCounter()
+
+    def consume(self, chunk):
+        values = chunk[self.pickup_datetime_colname].values
+
+        if np.issubdtype(values.dtype, np.datetime64):
+            self.day_counter.add_datetimes(values=values)
+        else:
+            self.day_counter.add_strings(values=values)
+
+    def finish_file(self, rejection_counter):
+        output_path = self.get_output_path(file_name=self.file_name)
+
+        if not output_path.parent.exists():
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.day_counter.save(file_path=output_path)
+
+    def combine(self, file_names, manifest):
+        count_rides_per_day.merge_partial_results(file_names=file_names, manifest=manifest)
+
+
+class ManhattanToJfkConsumer(Consumer):
+    """Filters taxi rides from Manhattan to JFK International Airport, see filter_manhattan_to_jfk.py. The filtered
+    rides per file are kept apart from those of filter_manhattan_to_jfk.py, which are tracked by another manifest.
+    """
+    name = 'manhattan_to_jfk'
+    requires_all_columns = True
+    dependencies = (filter_manhattan_to_jfk, sys.modules[filter_manhattan_to_jfk.GeoHandler.__module__],
+                    filtered_rides, zone_index)
+
+    def __init__(self):
+        self.geo_handler = None
+        self.location_datetime_colnames = None
+        self.filter_chunk = None
+        self.writer = None
+
+    def get_output_dir(self):
+        """Directory of the filtered rides per file
+
+        :return: Path of directory
+        """
+        return Config.PATH_DIR_RESULTS / JOB_NAME / 'filtered_rides'
+
+    def get_output_path(self, file_name):
+        return self.get_output_dir() / f'{file_name}.parquet'
+
+    def start_file(self, file_name, columns, location_datetime_colnames):
+        if self.geo_handler is None:
+            self.geo_handler = filter_manhattan_to_jfk.load_geo_handler()
+
+        if not self.get_output_dir().exists():
+            self.get_output_dir().mkdir(parents=True, exist_ok=True)
+
+        is_unknown_location = filter_manhattan_to_jfk.is_unknown_location(
+            dropoff_location_id_colname=location_datetime_colnames.dropoff_location_id_colname,
+            dropoff_latitude_colname=location_datetime_colnames.dropoff_lat_colname
+        )
+
+        self.location_datetime_colnames = location_datetime_colnames
+        self.filter_chunk = None if is_unknown_location \
+            else filter_manhattan_to_jfk.get_chunk_filter(location_datetime_colnames=location_datetime_colnames)
+        self.writer = filtered_rides.RidesWriter(
+            file_name=file_name,
+            file_path=self.get_output_path(file_name=file_name),
+            location_datetime_colnames=location_datetime_colnames,
+            zone_index=None if is_unknown_location
+            else filter_manhattan_to_jfk.get_zone_index(location_datetime_colnames=location_datetime_colnames)
+        )
+
+    def consume(self, chunk):
+        if self.filter_chunk is None:
+            return
+
+        self.writer.write(rides=self.filter_chunk(taxi_data=chunk,
+                                                  geo_handler=self.geo_handler,
+                                                  location_datetime_colnames=self.location_datetime_colnames))
+
+    def finish_file(self, rejection_counter):
+        self.writer.close()
+
+    def combine(self, file_names, manifest):
+        rebuilt_months = filtered_rides.build_dataset(file_names=file_names, get_source_path=self.get_output_path)
+
+        logging.info(f'Filtered rides of {len(file_names)} files are in: {self.get_output_dir()}')
+        logging.info(f'Months rebuilt in {Config.PATH_DIR_FILTERED_RIDES_DATASET}: {len(rebuilt_months)}')
+
+
+class HourlyPickupsPerZoneConsumer(Consumer):
+    """Counts pickups per hour of day and pickup zone. Files without location IDs are mapped to zones by their pickup
+    coordinates.
+    """
+    name = 'hourly_pickups_per_zone'
+    dependencies = (zone_index,)
+
+    def __init__(self):
+        self.zone_index = None
+        self.file_name = None
+        self.location_datetime_colnames = None
+        self.counts = None
+
+    def get_output_path(self, file_name):
+        return Config.PATH_DIR_RESULTS / 'hourly_pickups_per_zone_per_file' / f'{file_name}.npy'
+
+    def start_file(self, file_name, columns, location_datetime_colnames):
+        if location_datetime_colnames.pickup_location_id_colname == 'nan' and self.zone_index is None:
+            self.zone_index = zone_index.load_zone_index()
+
+        self.file_name = file_name
+        self.location_datetime_colnames = location_datetime_colnames
+        self.counts = np.zeros((24, zone_index.N_LOCATION_IDS), dtype=np.int64)
+
+    def consume(self, chunk):
+        hours = get_pickup_hours(values=chunk[self.location_datetime_colnames.pickup_datetime_colname].values)
+        location_ids = zone_index.get_location_ids(
+            taxi_data=chunk,
+            location_id_colname=self.location_datetime_colnames.pickup_location_id_colname,
+            lat_colname=self.location_datetime_colnames.pickup_lat_colname,
+            lon_colname=self.location_datetime_colnames.pickup_lon_colname,
+            zone_index=self.zone_index
+        )
+        is_valid = hours >= 0
+
+        self.counts += np.bincount(hours[is_valid] * zone_index.N_LOCATION_IDS + location_ids[is_valid],
+                                   minlength=self.counts.size).reshape(self.counts.shape)
+
+    def finish_file(self, rejection_counter):
+        output_path = self.get_output_path(file_name=self.file_name)
+
+        if not output_path.parent.exists():
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(str(output_path), 'wb') as f:
+            np.save(f, self.counts)
+
+    def combine(self, file_names, manifest):
+        counts = np.zeros((24, zone_index.N_LOCATION_IDS), dtype=np.int64)
+
+        for file_name in file_names:
+            counts += np.load(str(manifest.get_output_path(file_name=file_name)))
+
+        hours, location_ids = np.nonzero(counts)
+        pd.DataFrame({'pickup_hour': hours, 'pickup_location_id': location_ids,
+                      'num_pickups': counts[hours, location_ids]}) \
+            .to_csv(Config.PATH_DIR_RESULTS / 'hourly_pickups_per_zone.csv', index=False)
+
+        logging.info(f'Hourly pickups per zone written to: {Config.PATH_DIR_RESULTS}')
+
+
+class RollupCubeConsumer(Consumer):
+    """Builds the rollup cube: rides by pickup date, hour, pickup zone, dropoff zone and taxi type, with the sums in
+    Config.ROLLUP_CUBE_SUMS. Files without location IDs are mapped to zones by their coordinates.
+    """
+    name = 'rollup_cube'
+    dependencies = (rollup_cube, zone_index, sys.modules[DayCounter.__module__])
+
+    def __init__(self):
+        self.zone_index = None
+        self.file_name = None
+        self.location_datetime_colnames = None
+        self.sum_colnames = None
+        self.cube_builder = None
+
+    @property
+    def requires_all_columns(self):
+        return len(Config.ROLLUP_CUBE_SUMS) > 0  # fares and distances are no location or datetime columns
+
+    def get_output_path(self, file_name):
+        return rollup_cube.get_partial_result_path(file_name=file_name)
+
+    def start_file(self, file_name, columns, location_datetime_colnames):
+        if location_datetime_colnames.pickup_location_id_colname == 'nan' and self.zone_index is None:
+            self.zone_index = zone_index.load_zone_index()
+
+        schema = data_loader.get_schema(file_name=file_name)
+        sum_colnames = {'fare_amount': schema.fare_amount_colname, 'trip_distance': schema.trip_distance_colname}
+
+        self.file_name = file_name
+        self.location_datetime_colnames = location_datetime_colnames
+        self.sum_colnames = {measure: sum_colnames[measure] for measure in Config.ROLLUP_CUBE_SUMS
+                             if sum_colnames[measure] != 'nan'}
+        self.cube_builder = rollup_cube.CubeBuilder(taxi_type=schema.taxi_type)
+
+    def consume(self, chunk):
+        colnames = self.location_datetime_colnames
+        pickup_datetimes = chunk[colnames.pickup_datetime_colname].values
+        pickup_location_ids = zone_index.get_location_ids(taxi_data=chunk,
+                                                          location_id_colname=colnames.pickup_location_id_colname,
+                                                          lat_colname=colnames.pickup_lat_colname,
+                                                          lon_colname=colnames.pickup_lon_colname,
+                                                          zone_index=self.zone_index)
+        dropoff_location_ids = zone_index.get_location_ids(taxi_data=chunk,
+                                                           location_id_colname=colnames.dropoff_location_id_colname,
+                                                           lat_colname=colnames.dropoff_lat_colname,
+                                                           lon_colname=colnames.dropoff_lon_colname,
+                                                           zone_index=self.zone_index)
+
+        self.cube_builder.add(day_numbers=get_day_numbers(values=pickup_datetimes),
+                              hours=get_pickup_hours(values=pickup_datetimes),
+                              pickup_location_ids=pickup_location_ids,
+                              dropoff_location_ids=dropoff_location_ids,
+                              sums={measure: pd.to_numeric(chunk[colname], errors='coerce').values
+                                    for measure, colname in self.sum_colnames.items()})
+
+    def finish_file(self, rejection_counter):
+        output_path = self.get_output_path(file_name=self.file_name)
+
+        if not output_path.parent.exists():
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.cube_builder.finish(rejection_counter=rejection_counter).save(file_path=output_path)
+
+    def combine(self, file_names, manifest):
+        cube_path = rollup_cube.write_cube(file_paths=[manifest.get_output_path(file_name=file_name)
+                                                       for file_name in file_names])
+
+        logging.info(f'Rollup cube written to: {cube_path}')
+
+
+class RoutesConsumer(Consumer):
+    """Filters taxi rides for all routes in Config.ROUTES at once. The rides of each route are written to a separate
+    directory, the numbers of rides per route and file to a summary file.
+    """
+    name = 'routes'
+    requires_all_columns = True
+    dependencies = (route_filter, zone_index, sys.modules[Config.__module__])  # routes are defined in the config
+
+    def __init__(self):
+        self.route_filter = None
+        self.zone_index = None
+        self.file_name = None
+        self.location_datetime_colnames = None
+        self.columns = None
+        self.files = None
+        self.n_rides = None
+
+    def get_output_path(self, file_name):
+        return Config.PATH_DIR_RESULTS / 'routes' / f'{file_name}.json'
+
+    def get_route_output_path(self, route_name, file_name):
+        """Path of the rides of one route in a file
+
+        :param str route_name: Name of the route
+        :param str file_name: Name of the raw taxi data file
+        :return: Path of CSV file
+        """
+        return Config.PATH_DIR_RESULTS / 'routes' / route_name / file_name
+
+    def start_file(self, file_name, columns, location_datetime_colnames):
+        if self.route_filter is None:
+            self.route_filter = route_filter.RouteFilter(routes=route_filter.load_routes())
+
+        if location_datetime_colnames.pickup_location_id_colname == 'nan' and self.zone_index is None:
+            self.zone_index = zone_index.load_zone_index()
+
+        self.file_name = file_name
+        self.location_datetime_colnames = location_datetime_colnames
+        self.columns = columns
+        self.files = {}
+        self.n_rides = {}
+
+        for route in self.route_filter.routes:
+            route_output_path = self.get_route_output_path(route_name=route.name, file_name=file_name)
+
+            if not route_output_path.parent.exists():
+                route_output_path.parent.mkdir(parents=True, exist_ok=True)
+
+            self.files[route.name] = open(str(route_output_path), 'w')
+            self.n_rides[route.name] = 0
+
+    def consume(self, chunk):
+        colnames = self.location_datetime_colnames
+        pickup_location_ids = zone_index.get_location_ids(taxi_data=chunk,
+                                                          location_id_colname=colnames.pickup_location_id_colname,
+                                                          lat_colname=colnames.pickup_lat_colname,
+                                                          lon_colname=colnames.pickup_lon_colname,
+                                                          zone_index=self.zone_index)
+        dropoff_location_ids = zone_index.get_location_ids(taxi_data=chunk,
+                                                           location_id_colname=colnames.dropoff_location_id_colname,
+                                                           lat_colname=colnames.dropoff_lat_colname,
+                                                           lon_colname=colnames.dropoff_lon_colname,
+                                                           zone_index=self.zone_index)
+
+        taxi_data_by_route = self.route_filter.split_by_route(taxi_data=chunk,
+                                                              pickup_location_ids=pickup_location_ids,
+                                                              dropoff_location_ids=dropoff_location_ids)
+
+        for route_name, taxi_data_filtered in taxi_data_by_route.items():
+            taxi_data_filtered.to_csv(self.files[route_name], header=self.files[route_name].tell() == 0)
+            self.n_rides[route_name] += taxi_data_filtered.shape[0]
+
+    def finish_file(self, rejection_counter):
+        for f in self.files.values():
+            if f.tell() == 0:
+                pd.DataFrame(columns=self.columns).to_csv(f)
+
+            f.close()
+
+        with open(str(self.get_output_path(file_name=self.file_name)), 'w') as f:
+            json.dump(self.n_rides, f)
+
+    def combine(self, file_names, manifest):
+        n_rides_by_file = []
+
+        for file_name in file_names:
+            with open(str(manifest.get_output_path(file_name=file_name)), 'r') as f:
+                n_rides_by_file.append(json.load(f))
+
+        n_rides = pd.DataFrame(n_rides_by_file, index=pd.Index(file_names, name='file_name'))
+        n_rides.to_csv(Config.PATH_DIR_RESULTS / 'num_rides_by_route.csv')
+
+        logging.info(f'Number of rides per route: {n_rides.sum().to_dict()}')
+
+
+CONSUMERS = {consumer_class.name: consumer_class
+             for consumer_class in [DailyCountConsumer, ManhattanToJfkConsumer, HourlyPickupsPerZoneConsumer,
+                                    RollupCubeConsumer, RoutesConsumer]}
+
+
+def load_manifest(consumer):
+    """Loads the manifest of an analysis. The code version covers this script, the scan and the dependencies of the
+    consumer.
+
+    :param Consumer consumer: Consumer of the analysis
+    :return: Manifest
+    """
+    code_version = get_code_version(sys.modules[__name__], pipeline, data_loader, parquet_cache, quality_rules,
+                                    *consumer.dependencies, settings=Config.QUALITY_RULES)
+
+    return Manifest(job_name=f'analysis_{consumer.name}', code_version=code_version)
+
+
+def init_worker(analyses):
+    """Initializes a worker process. Consumers load their geo data once per worker on first use.
+
+    :param list analyses: Names of the analyses
+    """
+    global worker_consumers
+    worker_consumers = {name: CONSUMERS[name]() for name in analyses}
+
+
+def scan_task(task):
+    """Scans a file for the given analyses in a worker process
+
+    :param tuple task: File name and names of the analyses for which the file is not up to date
+    :return: Tuple of file name, names of the analyses and number of read rows
+    """
+    file_name, analyses = task
+    rejection_counter = quality_rules.RejectionCounter()
+    n_rows = pipeline.scan_file(file_name=file_name,
+                                columns=data_loader.get_schema(file_name=file_name).columns,
+                                consumers=[worker_consumers[name] for name in analyses],
+                                rejection_counter=rejection_counter)
+    rejection_counter.save(file_path=quality_rules.get_rejections_path(job_name=JOB_NAME, file_name=file_name))
+
+    return file_name, analyses, n_rows
+
+
+def main():
+    logging.info(f'Running analyses in a single pass: {", ".join(Config.ANALYSES)}')
+
+    schemas = data_loader.load_schema(from_idx=Config.FROM_IDX, to_idx=Config.TO_IDX)
+    file_names = schemas.keys()
+    available_file_names = [file_name for file_name in file_names
+                            if data_loader.get_raw_path(file_name=file_name).exists()]
+
+    consumers = {name: CONSUMERS[name]() for name in Config.ANALYSES}
+    manifests = {name: load_manifest(consumer=consumer) for name, consumer in consumers.items()}
+
+    tasks = []
+
+    for file_name in available_file_names:
+        analyses = [name for name in Config.ANALYSES
+                    if not (Config.IS_INCREMENTAL and manifests[name].is_up_to_date(file_name=file_name))]
+
+        if analyses:
+            tasks.append((file_name, analyses))
+
+    logging.info(f'Number of files to be scanned: {len(tasks)} '
+                 f'(up to date: {len(available_file_names) - len(tasks)})')
+
+    with execution.get_backend(initializer=init_worker, initargs=(Config.ANALYSES,)) as backend:
+        for file_name, analyses, n_rows in tqdm(backend.map_unordered(scan_task, tasks), total=len(tasks)):
+            for name in analyses:
+                manifests[name].update(file_name=file_name,
+                                       output_path=consumers[name].get_output_path(file_name=file_name))
+
+    for name, consumer in consumers.items():
+        consumer.combine(file_names=available_file_names, manifest=manifests[name])
+
+    rejections_path = quality_rules.write_rejections(job_name=JOB_NAME, file_names=available_file_names)
+
+    logging.info(f'Rows rejected by the data-quality rules written to: {rejections_path}')
+    logging.info('Analyses completed.')
+
+
+if __name__ == '__main__':
+    message_format = '%(asctime)s %(levelname)s %(module)s - %(funcName)s: %(message)s'
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO, format=message_format)
+
+    main()
@@ -1,7 +1,41 @@
-import geopandas as gpd
-from shapely.ops import cascaded_union
+import gzip
+import io
+import logging
+import lzma
+import queue
+import re
+import threading
+from functools import lru_cache
+
+import pandas as pd
+import pyarrow as pa
 
 from src.config.config import Config
+from src.util import geometry_cache
+
+FILE_NAME_PATTERN = re.compile(r'(fhv|green|yellow)_tripdata_\d{4}-\d{2}\.csv')
+COMPRESSIONS = {'.gz': 'gzip', '.zst': 'zstd', '.xz': 'xz'}  # suffixes of compressed raw files, e.g. '.csv.gz'
+DECOMPRESSION_BLOCK_SIZE = 4 * 1024 ** 2
+
+# Location representations of the files
+LOCATION_IDS = 'location_ids'  # pickup and dropoff location ID
+PICKUP_LOCATION_ID = 'pickup_location_id'  # pickup location ID only
+COORDINATES = 'coordinates'  # pickup and dropoff latitude/longitude
+NO_LOCATION = 'no_location'
+
+# Patterns of the location and datetime column names in the header rows (lower case, without underscores)
+HEADER_PATTERNS = {
+    'pickup_location_id_colname': re.compile(r'(pu|pickup)?locationid'),
+    'pickup_lon_colname': re.compile(r'(pickup|start)lon(gitude)?'),
+    'pickup_lat_colname': re.compile(r'(pickup|start)lat(itude)?'),
+    'pickup_datetime_colname': re.compile(r'(tpep|lpep|trip)?pickupdate(time)?'),
+    'dropoff_location_id_colname': re.compile(r'(do|dropoff)locationid'),
+    'dropoff_lon_colname': re.compile(r'(dropoff|end)lon(gitude)?'),
+    'dropoff_lat_colname': re.compile(r'(dropoff|end)lat(itude)?'),
+    'dropoff_datetime_colname': re.compile(r'(tpep|lpep|trip)?dropoffdate(time)?'),
+}
+FARE_AMOUNT_PATTERN = re.compile(r'faream(oun)?t')
+TRIP_DISTANCE_PATTERN = re.compile(r'tripdistance')
 
 
 class LocationTimeColNames:
@@ -28,12 +62,11 @@ class LocationTimeColNames:
         self.dropoff_datetime_colname = str(dropoff_datetime_colname)
 
 
-def get_location_datetime_columns(file_name):
-    """Reads location and datetime columns from mapping file.
+def parse_file_name(file_name):
+    """Parses taxi type, year and month out of a file name like 'yellow_tripdata_2015-01.csv'.
 
-    :param str file_name: Name of the file for which location column names shall be read from mapping file.
-    :return: LocationTimeColNames object with pickup and dropoff locations (location ID, latitude, longitude) as well
-    as datetimes. Fields can be empty.
+    :param str file_name: Name of the taxi data file
+    :return: Tuple of taxi type (str), year (int) and month (int)
     """
     file_name_split = file_name.split('_')
     file_split_2 = file_name_split[2].split('-')
@@ -42,25 +75,444 @@ def get_location_datetime_columns(file_name):
     year = int(file_split_2[0])
     month = int(file_split_2[1].split('.')[0])
 
-    mapping = Config.LOCATION_NAME_MAPPING[(Config.LOCATION_NAME_MAPPING['year'] == year)
-                                           & (Config.LOCATION_NAME_MAPPING['month'] == month)]
+    return taxi_type, year, month
 
-    return LocationTimeColNames(pickup_location_id_colname=mapping[f'{taxi_type}_pickup_location_id'].values[0],
-                                pickup_lon_colname=mapping[f'{taxi_type}_pickup_lon'].values[0],
-                                pickup_lat_colname=mapping[f'{taxi_type}_pickup_lat'].values[0],
-                                pickup_datetime_colname=mapping[f'{taxi_type}_pickup_datetime'].values[0],
-                                dropoff_location_id_colname=mapping[f'{taxi_type}_dropoff_location_id'].values[0],
-                                dropoff_lon_colname=mapping[f'{taxi_type}_dropoff_lon'].values[0],
-                                dropoff_lat_colname=mapping[f'{taxi_type}_dropoff_lat'].values[0],
-                                dropoff_datetime_colname=mapping[f'{taxi_type}_dropoff_datetime'].values[0])
 
+def get_location_datetime_columns(file_name):
+    """Looks up the location and datetime columns of a file in the schema registry.
 
-def load_schema(from_idx=0, to_idx=None):
-    """Loads the data schemas for all taxi data files.
+    :param str file_name: Name of the file for which location column names shall be looked up.
+    :return: LocationTimeColNames object with pickup and dropoff locations (location ID, latitude, longitude) as well
+    as datetimes. Fields can be empty.
+    """
+    return get_schema(file_name=file_name).location_datetime_colnames
 
-    :param int from_idx: Index from which file schemas shall be read.
-    :param int to_idx: Index up to which file schemas shall be read.
-    :return: Data schema as dictionary (key: file name, value: list of column names)
+
+def get_dtypes(location_datetime_colnames):
+    """Explicit dtypes for the location and datetime columns of a file, so they do not have to be inferred per chunk.
+
+    :param LocationTimeColNames location_datetime_colnames: Location and datetime column names of the file
+    :return: Dictionary (key: column name, value: dtype)
+    """
+    dtypes = {location_datetime_colnames.pickup_location_id_colname: 'float32',
+              location_datetime_colnames.dropoff_location_id_colname: 'float32',
+              location_datetime_colnames.pickup_lon_colname: 'float64',
+              location_datetime_colnames.pickup_lat_colname: 'float64',
+              location_datetime_colnames.dropoff_lon_colname: 'float64',
+              location_datetime_colnames.dropoff_lat_colname: 'float64',
+              location_datetime_colnames.pickup_datetime_colname: 'str',
+              location_datetime_colnames.dropoff_datetime_colname: 'str'}
+
+    return {colname: dtype for colname, dtype in dtypes.items() if colname != 'nan'}
+
+
+class ByteRangeReader(io.RawIOBase):
+    """Read-only binary file object which only exposes the bytes from start (inclusive) to end (exclusive) of a file.
+
+    :param pathlib.Path file_path: Path of the file
+    :param int start: First byte of the range
+    :param int end: End of the range
+    """
+    def __init__(self, file_path, start, end):
+        super().__init__()
+        self.file = open(str(file_path), 'rb')
+        self.file.seek(start)
+        self.remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.file.read(min(len(buffer), self.remaining))
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+
+        return len(data)
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+def get_raw_path(file_name):
+    """Path of a raw taxi data file. Besides the plain CSV file, compressed variants with one of the suffixes in
+    COMPRESSIONS are accepted (e.g. 'yellow_tripdata_2015-01.csv.gz'); the plain file is preferred if both exist.
+
+    :param str file_name: Name of the raw taxi data file, e.g. 'yellow_tripdata_2015-01.csv'
+    :return: Path of the existing file, the path of the plain CSV file if there is none
+    """
+    plain_path = Config.PATH_DIR_TAXI / file_name
+
+    if plain_path.exists():
+        return plain_path
+
+    for suffix in COMPRESSIONS:
+        compressed_path = Config.PATH_DIR_TAXI / (file_name + suffix)
+
+        if compressed_path.exists():
+            return compressed_path
+
+    return plain_path
+
+
+def is_compressed(file_name):
+    """Checks whether a raw taxi data file is only available compressed
+
+    :param str file_name: Name of the raw taxi data file
+    :return: Flag whether the file is compressed
+    """
+    return get_raw_path(file_name=file_name).suffix in COMPRESSIONS
+
+
+def get_file_name(file_path):
+    """Name of the raw taxi data file of a plain or compressed file
+
+    :param pathlib.Path file_path: Path of the file
+    :return: File name without compression suffix
+    """
+    return file_path.stem if file_path.suffix in COMPRESSIONS else file_path.name
+
+
+def open_decompressed(file_path):
+    """Opens a compressed file for reading. zstd is decoded by pyarrow, so no further dependency is needed.
+
+    :param pathlib.Path file_path: Path of the file, with one of the suffixes in COMPRESSIONS
+    :return: Binary file object of the decompressed data
+    """
+    compression = COMPRESSIONS[file_path.suffix]
+
+    if compression == 'gzip':
+        return gzip.open(str(file_path), 'rb')
+    elif compression == 'xz':
+        return lzma.open(str(file_path), 'rb')
+
+    return pa.CompressedInputStream(pa.OSFile(str(file_path)), compression)
+
+
+class DecompressingReader(io.RawIOBase):
+    """Read-only binary file object over a compressed file. A background thread decompresses the file in blocks ahead
+    of the reader, into a queue of at most Config.DECOMPRESSION_QUEUE_SIZE blocks. The decompressors release the GIL,
+    so decompression overlaps with parsing.
+
+    :param pathlib.Path file_path: Path of the file, with one of the suffixes in COMPRESSIONS
+    """
+    def __init__(self, file_path):
+        super().__init__()
+        self.blocks = queue.Queue(maxsize=Config.DECOMPRESSION_QUEUE_SIZE)
+        self.is_stopped = threading.Event()
+        self.block = memoryview(b'')
+        self.is_finished = False
+        self.thread = threading.Thread(target=self.decompress, args=(file_path,), daemon=True)
+        self.thread.start()
+
+    def put(self, item):
+        """Adds a block (or an error) to the queue, waiting for space unless the reader is closed
+
+        :param item: Block of decompressed data, b'' at the end of the file, or an exception
+        """
+        while not self.is_stopped.is_set():
+            try:
+                self.blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def decompress(self, file_path):
+        try:
+            with open_decompressed(file_path=file_path) as f:
+                while not self.is_stopped.is_set():
+                    block = f.read(DECOMPRESSION_BLOCK_SIZE)
+                    self.put(block)
+
+                    if not block:
+                        return
+        except Exception as e:  # raised in the reading thread
+            self.put(e)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.block:
+            if self.is_finished:
+                return 0
+
+            item = self.blocks.get()
+
+            if isinstance(item, Exception):
+                self.is_finished = True
+                raise item
+
+            self.is_finished = not item
+            self.block = memoryview(item)
+
+        n_bytes = min(len(buffer), len(self.block))
+        buffer[:n_bytes] = self.block[:n_bytes]
+        self.block = self.block[n_bytes:]
+
+        return n_bytes
+
+    def close(self):
+        self.is_stopped.set()
+        self.thread.join()
+        super().close()
+
+
+def open_raw_file(file_name):
+    """Opens a raw taxi data file for reading, decompressing it in a background thread if it is compressed
+
+    :param str file_name: Name of the raw taxi data file
+    :return: Binary file object
+    """
+    file_path = get_raw_path(file_name=file_name)
+
+    if file_path.suffix in COMPRESSIONS:
+        return io.BufferedReader(DecompressingReader(file_path=file_path), buffer_size=DECOMPRESSION_BLOCK_SIZE)
+
+    return open(str(file_path), 'rb')
+
+
+def get_byte_ranges(file_name, range_size):
+    """Splits a raw taxi data file into byte ranges of roughly range_size bytes. Ranges start and end at line
+    boundaries and exclude the header line, so each range can be parsed independently.
+
+    :param str file_name: Name of the raw taxi data file
+    :param int range_size: Target size of the ranges in bytes
+    :return: List of tuples (start, end)
+    :raises ValueError: If the file is compressed, since compressed files cannot be read from arbitrary positions
+    """
+    file_path = get_raw_path(file_name=file_name)
+
+    if file_path.suffix in COMPRESSIONS:
+        raise ValueError(f'Compressed files cannot be split into byte ranges: {file_path}')
+
+    file_size = file_path.stat().st_size
+    byte_ranges = []
+
+    with open(str(file_path), 'rb') as f:
+        f.readline()  # header
+        start = f.tell()
+
+        while start < file_size:
+            end = start + range_size
+
+            if end < file_size:
+                f.seek(end - 1)
+                f.readline()  # move to the start of the next line
+                end = f.tell()
+            else:
+                end = file_size
+
+            byte_ranges.append((start, end))
+            start = end
+
+    return byte_ranges
+
+
+def read_csv_chunks(file_name, columns, usecols=None, dtype=None, chunk_size=None, byte_range=None):
+    """Streams a raw taxi data file in chunks, so a file never has to be loaded into memory as a whole. The index of the
+    chunks continues across chunks (row number within the file, or within the byte range if one is given).
+
+    :param str file_name: Name of the raw taxi data file
+    :param list columns: Column names of the file
+    :param list usecols: Column names to be read. If None, all columns are read.
+    :param dict dtype: Explicit dtypes per column name
+    :param int chunk_size: Maximum number of rows per chunk. If None, Config.CHUNK_SIZE is used.
+    :param tuple byte_range: Byte range (start, end) as returned by get_byte_ranges. If None, the whole file is read.
+    :return: Generator of data frames
+    """
+    if dtype is not None and usecols is not None:
+        dtype = {colname: col_dtype for colname, col_dtype in dtype.items() if colname in usecols}
+
+    file_path = get_raw_path(file_name=file_name)
+
+    if byte_range is not None:
+        source, skiprows = io.TextIOWrapper(io.BufferedReader(ByteRangeReader(file_path, *byte_range))), 0
+    elif file_path.suffix in COMPRESSIONS:
+        source, skiprows = open_raw_file(file_name=file_name), 1
+    else:
+        source, skiprows = file_path, 1
+
+    try:
+        for chunk in pd.read_csv(source,
+                                 skiprows=skiprows,
+                                 skip_blank_lines=True,
+                                 names=columns,
+                                 usecols=usecols,
+                                 dtype=dtype,
+                                 chunksize=chunk_size or Config.CHUNK_SIZE):
+            yield chunk
+    finally:
+        if source is not file_path:
+            source.close()
+
+
+def get_location_representation(location_datetime_colnames):
+    """Determines how the locations of the rides of a file are given
+
+    :param LocationTimeColNames location_datetime_colnames: Location and datetime column names of the file
+    :return: LOCATION_IDS, PICKUP_LOCATION_ID, COORDINATES or NO_LOCATION
+    """
+    if location_datetime_colnames.pickup_location_id_colname != 'nan':
+        if location_datetime_colnames.dropoff_location_id_colname != 'nan':
+            return LOCATION_IDS
+
+        return PICKUP_LOCATION_ID
+
+    if location_datetime_colnames.pickup_lon_colname != 'nan':
+        return COORDINATES
+
+    return NO_LOCATION
+
+
+class FileSchema:
+    """Schema of one taxi data file
+
+    :param str taxi_type: Taxi type, e.g. 'yellow'
+    :param int year: Year of the rides
+    :param int month: Month of the rides
+    :param list columns: Column names of the file
+    :param LocationTimeColNames location_datetime_colnames: Location and datetime column names of the file
+    """
+    def __init__(self, taxi_type, year, month, columns, location_datetime_colnames):
+        self.taxi_type = taxi_type
+        self.year = year
+        self.month = month
+        self.columns = list(columns)
+        self.location_datetime_colnames = location_datetime_colnames
+        self.dtypes = get_dtypes(location_datetime_colnames=location_datetime_colnames)
+        self.location_representation = get_location_representation(
+            location_datetime_colnames=location_datetime_colnames)
+        self.fare_amount_colname = next((colname for colname in self.columns
+                                         if FARE_AMOUNT_PATTERN.fullmatch(colname.lower().replace('_', ''))), 'nan')
+        self.trip_distance_colname = next((colname for colname in self.columns
+                                           if TRIP_DISTANCE_PATTERN.fullmatch(colname.lower().replace('_', ''))),
+                                          'nan')
+
+
+def get_header_key(columns):
+    """Key for comparing column names of a header row with the column names of a known schema
+
+    :param list columns: Column names
+    :return: Tuple of lower case column names
+    """
+    return tuple(colname.strip().lower() for colname in columns)
+
+
+def read_header(file_name):
+    """Reads the column names from the header row of a raw taxi data file. Unnamed columns, including data fields
+    beyond the header row (some files have more fields per row than header fields), are named MISSING_<n>.
+
+    :param str file_name: Name of the raw taxi data file
+    :return: List of column names
+    """
+    with io.TextIOWrapper(open_raw_file(file_name=file_name), encoding='utf-8-sig') as f:
+        colnames = [colname.strip() for colname in f.readline().rstrip('\r\n').split(',')]
+        first_row = f.readline().rstrip('\r\n')
+
+    if first_row:
+        colnames += [''] * (first_row.count(',') + 1 - len(colnames))
+
+    n_missing = 0
+
+    for idx, colname in enumerate(colnames):
+        if not colname:
+            n_missing += 1
+            colnames[idx] = f'MISSING_{n_missing}'
+
+    return colnames
+
+
+def detect_location_datetime_columns(columns):
+    """Detects the location and datetime columns by their names, e.g. 'tpep_pickup_datetime' or 'Start_Lon'
+
+    :param list columns: Column names of a file
+    :return: LocationTimeColNames object, fields without matching column are empty
+    """
+    colnames = {field: 'nan' for field in HEADER_PATTERNS}
+
+    for colname in columns:
+        normalized_colname = colname.strip().lower().replace('_', '')
+
+        for field, pattern in HEADER_PATTERNS.items():
+            if colnames[field] == 'nan' and pattern.fullmatch(normalized_colname):
+                colnames[field] = colname
+                break
+
+    return LocationTimeColNames(**colnames)
+
+
+class SchemaRegistry:
+    """Schemas of all taxi data files, keyed by taxi type, year and month. Schemas of configured files are compiled
+    from the config files once, schemas of other files are detected from their header row on first access.
+
+    :param list file_names: Names of the configured files
+    :param list columns: Column names per configured file
+    :param pandas.DataFrame location_name_mapping: Location and datetime column names per taxi type, year and month
+    """
+    def __init__(self, file_names, columns, location_name_mapping):
+        self.file_names = list(file_names)
+        self.schemas = {}
+        self.schemas_by_header = {}
+        mappings = {(int(mapping['year']), int(mapping['month'])): mapping
+                    for mapping in location_name_mapping.to_dict(orient='records')}
+
+        for file_name, file_columns in zip(self.file_names, columns):
+            taxi_type, year, month = parse_file_name(file_name=file_name)
+            mapping = mappings[(year, month)]
+            colnames = LocationTimeColNames(**{field: mapping[f'{taxi_type}_{field[:-len("_colname")]}']
+                                               for field in HEADER_PATTERNS})
+            schema = FileSchema(taxi_type=taxi_type, year=year, month=month, columns=file_columns,
+                                location_datetime_colnames=colnames)
+
+            self.schemas[(taxi_type, year, month)] = schema
+            self.schemas_by_header[(taxi_type, get_header_key(columns=file_columns))] = schema
+
+    def get(self, file_name):
+        """Schema of a file. Files which are not configured are looked up by their header row.
+
+        :param str file_name: Name of the taxi data file
+        :return: FileSchema
+        """
+        key = parse_file_name(file_name=file_name)
+        schema = self.schemas.get(key)
+
+        if schema is None:
+            schema = self.detect(file_name=file_name)
+            self.schemas[key] = schema
+
+        return schema
+
+    def detect(self, file_name):
+        """Detects the schema of a file from its header row. If the header equals the one of a configured file of the
+        same taxi type, the schema of the latest such file is used, otherwise the location and datetime
+        columns are detected by their names.
+
+        :param str file_name: Name of the raw taxi data file
+        :return: FileSchema
+        """
+        taxi_type, year, month = parse_file_name(file_name=file_name)
+        columns = read_header(file_name=file_name)
+        known_schema = self.schemas_by_header.get((taxi_type, get_header_key(columns=columns)))
+
+        if known_schema is not None:
+            columns = known_schema.columns
+            colnames = known_schema.location_datetime_colnames
+        else:
+            colnames = detect_location_datetime_columns(columns=columns)
+
+        logging.info(f'Detected schema of file {file_name}: {get_location_representation(colnames)}')
+
+        return FileSchema(taxi_type=taxi_type, year=year, month=month, columns=columns,
+                          location_datetime_colnames=colnames)
+
+
+@lru_cache(maxsize=1)
+def load_schema_registry():
+    """Compiles the schema registry from the config files. The result is cached, so the config files are read only
+    once per process.
+
+    :return: SchemaRegistry
     """
     with open(str(Config.PATH_FILE_NAMES), 'r') as f:
         file_names = f.read().splitlines()
@@ -68,29 +520,110 @@ def load_schema(from_idx=0, to_idx=None):
     with open(str(Config.PATH_COLUMN_NAMES), 'r') as f:
         col_names = f.read().splitlines()
 
+    return SchemaRegistry(file_names=file_names, columns=[cols.split(',') for cols in col_names],
+                          location_name_mapping=Config.LOCATION_NAME_MAPPING)
+
+
+def get_schema(file_name):
+    """Schema of a taxi data file
+
+    :param str file_name: Name of the taxi data file
+    :return: FileSchema
+    """
+    return load_schema_registry().get(file_name=file_name)
+
+
+def load_schema(from_idx=0, to_idx=None):
+    """Loads the data schemas for all taxi data files. Raw files in Config.PATH_DIR_TAXI (plain or compressed) which are
+    not configured are added with the schema detected from their header row, unless only a subset of the files is
+    requested.
+
+    :param int from_idx: Index from which file schemas shall be read.
+    :param int to_idx: Index up to which file schemas shall be read.
+    :return: Data schema as dictionary (key: file name, value: list of column names)
+    """
+    registry = load_schema_registry()
+    file_names = registry.file_names
+
     if to_idx:
         file_names = file_names[from_idx:to_idx]
-        col_names = col_names[from_idx:to_idx]
+    elif Config.PATH_DIR_TAXI.exists():
+        configured_file_names = set(file_names)
+        raw_file_names = {get_file_name(file_path=path) for path in Config.PATH_DIR_TAXI.glob('*_tripdata_*.csv*')}
+        file_names = file_names + sorted(file_name for file_name in raw_file_names
+                                         if FILE_NAME_PATTERN.fullmatch(file_name)
+                                         and file_name not in configured_file_names)
 
-    return dict(zip(file_names, [cols.split(',') for cols in col_names]))
+    return {file_name: registry.get(file_name=file_name).columns for file_name in file_names}
 
 
-def load_manhattan_polygon():
-    """Loads all polygons for zones in Manhattan and merged them into one single polygon.
+@lru_cache(maxsize=1)
+def load_taxi_zones():
+    """Loads the shape file of all taxi zones and projects it to latitude/longitude coordinates. The result is cached,
+    so the shape file is read only once per process. Prefer the functions below, which are cached on disk.
+
+    :return: GeoDataFrame with one row per taxi zone polygon (columns LocationID, zone, borough and geometry)
+    """
+    import geopandas as gpd  # slow to import, only needed if the geometry cache has to be built
+
+    return gpd.read_file(str(Config.PATH_SHAPE_FILE_NYC)).to_crs({'init': 'epsg:4326'})
+
+
+def build_manhattan_polygon():
+    """Merges the polygons of all zones in Manhattan into one single polygon.
 
     :return: Polygon for Manhattan
     """
-    taxi_zones = gpd.read_file(str(Config.PATH_SHAPE_FILE_NYC)).to_crs({'init': 'epsg:4326'})
+    from shapely.ops import cascaded_union
+
+    taxi_zones = load_taxi_zones()
     manhattan_polygons = list(taxi_zones[taxi_zones['borough'] == 'Manhattan']['geometry'].values)
 
-    return gpd.GeoSeries(cascaded_union(manhattan_polygons))[0]
+    return cascaded_union(manhattan_polygons)
+
+
+def build_jfk_polygon():
+    """Selects the polygon for JFK International Airport.
+
+    :return: Polygon for JFK International Airport
+    """
+    taxi_zones = load_taxi_zones()
+
+    return taxi_zones[taxi_zones['LocationID'] == Config.JFK_LOCATION_ID]['geometry'].values[0]
+
+
+def build_zone_polygons():
+    """Collects the polygons of all taxi zones.
+
+    :return: Tuple of location IDs (one per polygon, IDs may repeat) and list of polygons
+    """
+    taxi_zones = load_taxi_zones()
+
+    return taxi_zones['LocationID'].values, list(taxi_zones['geometry'].values)
+
 
+@lru_cache(maxsize=1)
+def load_manhattan_polygon():
+    """Loads the merged polygon of all zones in Manhattan from the geometry cache.
 
+    :return: Polygon for Manhattan
+    """
+    return geometry_cache.load_cached(name='manhattan_polygon', build=build_manhattan_polygon)
+
+
+@lru_cache(maxsize=1)
 def load_jfk_polygon():
-    """Loads polygon for JFK International Airport.
+    """Loads polygon for JFK International Airport from the geometry cache.
 
     :return: Polygon for JFK International Airport
     """
-    taxi_zones = gpd.read_file(str(Config.PATH_SHAPE_FILE_NYC)).to_crs({'init': 'epsg:4326'})
+    return geometry_cache.load_cached(name='jfk_polygon', build=build_jfk_polygon)
+
 
-    return taxi_zones[taxi_zones['LocationID'] == 132]['geometry'].values[0, ]
+@lru_cache(maxsize=1)
+def load_zone_polygons():
+    """Loads the polygons of all taxi zones from the geometry cache.
+
+    :return: Tuple of location IDs (one per polygon, IDs may repeat) and list of polygons
+    """
+    return geometry_cache.load_cached(name='zone_polygons', build=build_zone_polygons)
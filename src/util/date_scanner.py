@@ -0,0 +1,334 @@
+import mmap
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.config.config import Config
+from src.util import data_loader, quality_rules
+from src.util.day_counter import DayCounter, get_date_keys, get_day_numbers_of_keys
+
+NEWLINE = ord('\n')
+CARRIAGE_RETURN = ord('\r')
+COMMA = ord(',')
+DATE_LENGTH = 10  # only the date part of the datetime strings is needed, see day_counter.get_date_keys
+FIELD_LENGTH = 24  # number of bytes extracted of the numeric columns the data-quality rules need, e.g. location IDs
+LINE_PREFIX_SIZE = 24  # number of bytes at the start of each line searched for the start of the pickup datetime
+NUMERIC_RULE_TYPES = (quality_rules.BoundingBoxRule, quality_rules.NonNegativeFareRule,
+                      quality_rules.LocationIdRangeRule)  # rules the scanner evaluates on numeric columns
+
+
+class UnscannableFileError(ValueError):
+    """Raised if a file cannot be counted by the scanner, it has to be read with pandas instead"""
+
+
+class QuotedFieldError(UnscannableFileError):
+    """Raised if a file contains quoted fields, which may contain commas and cannot be split by byte operations"""
+
+
+class LongFieldError(UnscannableFileError):
+    """Raised if a numeric column needed by the data-quality rules has values of FIELD_LENGTH bytes or more"""
+
+
+def get_line_ranges(buffer, start, range_size):
+    """Splits a buffer into ranges of about range_size bytes. Every range but the last ends right after a newline.
+
+    :param buffer: Buffer of the file (mmap or bytes)
+    :param int start: Position of the first byte of the first range
+    :param int range_size: Approximate size of the ranges
+    :return: List of ranges (start, end)
+    """
+    ranges = []
+
+    while start < len(buffer):
+        end = buffer.find(b'\n', min(start + range_size, len(buffer)) - 1)
+        end = len(buffer) if end == -1 else end + 1
+        ranges.append((start, end))
+        start = end
+
+    return ranges
+
+
+def get_field_starts(data, line_starts, line_ends, column_idx):
+    """Finds the first byte of a column in each line. The fields before the pickup datetime are short, so the bytes
+    at the first LINE_PREFIX_SIZE positions of all lines are checked for commas, one position at a time. Only lines
+    in which the field does not start within the prefix are looked up among the positions of all commas.
+
+    :param numpy.ndarray data: Bytes of complete CSV lines (uint8)
+    :param numpy.ndarray line_starts: Position of the first byte of each line
+    :param numpy.ndarray line_ends: Position of the newline (or end of data) of each line
+    :param int column_idx: Position of the column in the lines
+    :return: Array of field start positions, the line end for lines with fewer fields
+    """
+    if column_idx == 0 or line_starts.size == 0:
+        return line_starts
+
+    field_starts = np.full(line_starts.size, -1, dtype=np.int64)
+    n_commas = np.zeros(line_starts.size, dtype=np.int32)
+
+    for offset in range(LINE_PREFIX_SIZE):
+        positions = line_starts + offset
+        is_comma = (data[np.minimum(positions, data.size - 1)] == COMMA) & (positions < line_ends)
+        n_commas += is_comma
+        is_field_start = is_comma & (n_commas == column_idx)
+        field_starts[is_field_start] = positions[is_field_start] + 1
+
+        if n_commas.min() >= column_idx:
+            break
+
+    is_unresolved = field_starts < 0
+
+    if is_unresolved.any():
+        commas = np.append(np.flatnonzero(data == COMMA), data.size)  # sentinel for lines with too few fields
+        comma_idx = np.minimum(np.searchsorted(commas, line_starts[is_unresolved]) + column_idx - 1, commas.size - 1)
+        field_starts[is_unresolved] = np.minimum(commas[comma_idx] + 1, line_ends[is_unresolved])
+
+    return field_starts
+
+
+def get_field_chars(data, column_idx, length=DATE_LENGTH):
+    """Extracts the first characters of a column from CSV lines with vectorized byte operations. Empty lines are
+    skipped. Characters after the end of a field (e.g. lines with fewer fields or shorter values) are commas.
+
+    :param numpy.ndarray data: Bytes of complete CSV lines (uint8)
+    :param int column_idx: Position of the column in the lines
+    :param int length: Number of characters per field
+    :return: Array of the characters (n x length, uint8)
+    """
+    newlines = np.flatnonzero(data == NEWLINE)
+    line_starts = np.concatenate([[0], newlines + 1])
+    line_ends = np.concatenate([newlines, [data.size]])
+    is_line = line_ends - line_starts > (data[np.maximum(line_ends - 1, 0)] == ord('\r'))  # not empty, not only '\r'
+    line_starts, line_ends = line_starts[is_line], line_ends[is_line]
+
+    field_starts = get_field_starts(data=data, line_starts=line_starts, line_ends=line_ends, column_idx=column_idx)
+    chars = np.empty((line_starts.size, length), dtype=np.uint8)
+
+    for offset in range(length):
+        positions = field_starts + offset
+        chars[:, offset] = np.where(positions < line_ends, data[np.minimum(positions, data.size - 1)], COMMA)
+
+    return chars
+
+
+def get_field_numbers(chars):
+    """Parses the characters of a numeric column extracted by get_field_chars, e.g. '132', '-73.991957' or '' (NaN)
+
+    :param numpy.ndarray chars: Characters (n x FIELD_LENGTH, uint8)
+    :return: Array of float64, NaN for values which are no numbers
+    :raises LongFieldError: If a value does not end within the characters
+    """
+    is_after_end = np.logical_or.accumulate((chars == COMMA) | (chars == CARRIAGE_RETURN), axis=1)
+
+    if not is_after_end[:, -1].all():
+        raise LongFieldError(f'Numeric field of {chars.shape[1]} bytes or more')
+
+    values = np.where(is_after_end, np.uint8(0), chars).view(f'S{chars.shape[1]}').ravel()
+
+    return pd.to_numeric(values.astype(str), errors='coerce').astype(np.float64)
+
+
+def is_scannable(quality_filter, column_idx):
+    """Checks whether the scanner can evaluate all data-quality rules of a file: the date window on the pickup dates
+    and the rules on numeric columns. Other rules (e.g. the duration of the rides) need the pandas reader.
+
+    :param QualityFilter quality_filter: Data-quality rules of the file
+    :param int column_idx: Position of the pickup datetime column
+    :return: Flag whether the file can be counted by the scanner
+    """
+    pickup_date_column_name = quality_filter.schema.columns[column_idx]
+
+    for rule in quality_filter.rules:
+        if isinstance(rule, quality_rules.DateWindowRule):
+            if rule.get_columns(location_datetime_colnames=quality_filter.location_datetime_colnames,
+                                schema=quality_filter.schema) != [pickup_date_column_name]:
+                return False
+        elif not isinstance(rule, NUMERIC_RULE_TYPES):
+            return False
+
+    return True
+
+
+def get_rejected(data, keys, quality_filter):
+    """Evaluates the data-quality rules on a range of lines. The date window is checked on the date keys of the pickup
+    dates, the other rules on the numeric columns they need, parsed from the first FIELD_LENGTH bytes of the fields.
+
+    :param numpy.ndarray data: Bytes of complete CSV lines (uint8)
+    :param numpy.ndarray keys: Date keys of the pickup dates of the lines
+    :param QualityFilter quality_filter: Data-quality rules of the file, see is_scannable
+    :return: Tuple of mask of the rejected lines and number of rejected lines per rule name
+    """
+    columns = list(quality_filter.schema.columns)
+    numbers = {}
+    is_rejected = np.zeros(keys.size, dtype=bool)
+    n_rejected_by_rule = {}
+
+    for rule in quality_filter.rules:
+        if isinstance(rule, quality_rules.DateWindowRule):
+            is_rule_rejected = rule.get_rejected_days(day_numbers=get_day_numbers_of_keys(keys=keys),
+                                                      schema=quality_filter.schema)
+        else:
+            colnames = rule.get_columns(location_datetime_colnames=quality_filter.location_datetime_colnames,
+                                        schema=quality_filter.schema)
+
+            for colname in colnames:
+                if colname not in numbers:
+                    chars = get_field_chars(data=data, column_idx=columns.index(colname), length=FIELD_LENGTH)
+                    numbers[colname] = get_field_numbers(chars=chars)
+
+            is_rule_rejected = rule.get_rejected(chunk=pd.DataFrame({colname: numbers[colname]
+                                                                     for colname in colnames}),
+                                                 location_datetime_colnames=quality_filter.location_datetime_colnames,
+                                                 schema=quality_filter.schema)
+
+        n_rejected_by_rule[rule.name] = int(is_rule_rejected.sum())
+        is_rejected |= is_rule_rejected
+
+    return is_rejected, n_rejected_by_rule
+
+
+def count_range(buffer, byte_range, column_idx, quality_filter=None):
+    """Counts the rides per day in a range of complete lines. Rides rejected by the data-quality rules are not counted.
+
+    :param buffer: Buffer of the file (mmap) or a block of lines (bytes)
+    :param tuple byte_range: Range (start, end) of the buffer
+    :param int column_idx: Position of the pickup datetime column
+    :param QualityFilter quality_filter: Data-quality rules of the file, see is_scannable. Only its rules are used, so
+    ranges can be counted in parallel. If None, no rides are rejected.
+    :return: Tuple of DayCounter and RejectionCounter, None if the range contains quoted fields
+    """
+    if buffer.find(b'"', byte_range[0], byte_range[1]) != -1:
+        return None
+
+    data = np.frombuffer(buffer, dtype=np.uint8, count=byte_range[1] - byte_range[0], offset=byte_range[0])
+
+    chars = get_field_chars(data=data, column_idx=column_idx)
+    keys = get_date_keys(values=chars.view(f'S{DATE_LENGTH}').ravel())
+    rejection_counter = quality_rules.RejectionCounter()
+
+    if quality_filter is not None and quality_filter.rules:
+        is_rejected, n_rejected_by_rule = get_rejected(data=data, keys=keys, quality_filter=quality_filter)
+        rejection_counter.add(n_rows=keys.size, n_rejected=int(is_rejected.sum()),
+                              n_rejected_by_rule=n_rejected_by_rule)
+        keys = keys[~is_rejected]
+    else:
+        rejection_counter.add(n_rows=keys.size, n_rejected=0, n_rejected_by_rule={})
+
+    day_counter = DayCounter()
+    day_counter.add_date_keys(keys=keys)
+
+    return day_counter, rejection_counter
+
+
+def iter_line_blocks(file_name, block_size):
+    """Reads a (compressed) raw file as a stream of blocks of complete lines, without the header line
+
+    :param str file_name: Name of the raw taxi data file
+    :param int block_size: Approximate size of the blocks in bytes
+    :return: Generator of bytes
+    """
+    with data_loader.open_raw_file(file_name=file_name) as f:
+        f.readline()  # header
+        remainder = b''
+
+        while True:
+            data = f.read(block_size)
+
+            if not data:
+                break
+
+            block = remainder + data
+            end = block.rfind(b'\n') + 1
+            remainder = block[end:]
+
+            if end > 0:
+                yield block[:end]
+
+        if remainder:
+            yield remainder
+
+
+def count_compressed_pickup_dates(file_name, column_idx, n_threads, range_size, quality_filter=None):
+    """Counts the rides per day of a compressed raw file. The decompressed stream is cut into blocks of complete lines,
+    which are counted by the threads while the next blocks are decompressed. At most n_threads blocks are in flight,
+    so memory usage does not depend on the size of the file.
+
+    :param str file_name: Name of the raw taxi data file
+    :param int column_idx: Position of the pickup datetime column
+    :param int n_threads: Number of threads
+    :param int range_size: Approximate size of the blocks in bytes
+    :param QualityFilter quality_filter: Data-quality rules of the file. If None, no rides are rejected.
+    :return: List of results of count_range per block
+    """
+    results = []
+    futures = deque()
+
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        for block in iter_line_blocks(file_name=file_name, block_size=range_size):
+            if len(futures) >= n_threads:
+                results.append(futures.popleft().result())
+
+            futures.append(executor.submit(count_range, buffer=block, byte_range=(0, len(block)),
+                                           column_idx=column_idx, quality_filter=quality_filter))
+
+        results += [future.result() for future in futures]
+
+    return results
+
+
+def count_pickup_dates(file_name, column_idx, n_threads=None, range_size=None, quality_filter=None):
+    """Counts the rides per day of a raw CSV file without parsing it with pandas. The file is memory-mapped and split
+    into ranges of complete lines. The threads extract the pickup date of every line of a range with vectorized byte
+    operations (numpy releases the GIL) and count the dates directly. Compressed files are streamed instead.
+
+    :param str file_name: Name of the raw taxi data file
+    :param int column_idx: Position of the pickup datetime column
+    :param int n_threads: Number of threads. If None, Config.N_SCAN_THREADS is used.
+    :param int range_size: Approximate size of the ranges in bytes. If None, Config.SCAN_RANGE_SIZE is used.
+    :param QualityFilter quality_filter: Data-quality rules of the file, see is_scannable. The rejected rows are added
+    to its counter. If None, no rides are rejected.
+    :return: DayCounter with taxi ride counts per day
+    :raises QuotedFieldError: If the file contains quoted fields
+    :raises LongFieldError: If a numeric column needed by the rules has too long values
+    """
+    n_threads = n_threads or Config.N_SCAN_THREADS
+    range_size = range_size or Config.SCAN_RANGE_SIZE
+    day_counter = DayCounter()
+
+    if data_loader.is_compressed(file_name=file_name):
+        range_results = count_compressed_pickup_dates(file_name=file_name, column_idx=column_idx,
+                                                      n_threads=n_threads, range_size=range_size,
+                                                      quality_filter=quality_filter)
+    else:
+        with open(str(data_loader.get_raw_path(file_name=file_name)), 'rb') as f:
+            if f.seek(0, 2) == 0:  # empty files cannot be memory-mapped
+                return day_counter
+
+            # Not closed explicitly: the mapping is released with the last array referencing it, even after an error
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header_end = buffer.find(b'\n')
+
+        if header_end == -1:
+            return day_counter
+
+        line_ranges = get_line_ranges(buffer=buffer, start=header_end + 1, range_size=range_size)
+
+        with ThreadPoolExecutor(max_workers=n_threads) as executor:
+            range_results = list(executor.map(lambda byte_range: count_range(buffer=buffer,
+                                                                             byte_range=byte_range,
+                                                                             column_idx=column_idx,
+                                                                             quality_filter=quality_filter),
+                                              line_ranges))
+
+    if any(range_result is None for range_result in range_results):
+        raise QuotedFieldError(f'Quoted fields in file: {file_name}')
+
+    for range_day_counter, range_rejection_counter in range_results:
+        day_counter.merge(other=range_day_counter)
+
+        if quality_filter is not None:
+            quality_filter.counter.merge(other=range_rejection_counter)
+
+    return day_counter
@@ -0,0 +1,257 @@
+import numpy as np
+import pandas as pd
+
+MIN_YEAR = 1900  # Dates outside of [MIN_YEAR, MAX_YEAR] are treated as invalid
+MAX_YEAR = 2100
+
+INVALID_DAY = np.datetime64('NaT').astype(np.int64)  # day number of rides without a valid pickup date
+INVALID_DATE_KEY = 0  # Date key of values which are not a date (never a valid date, since there is no month 0)
+N_DATE_KEYS = (MAX_YEAR - MIN_YEAR + 1) * 512
+
+ISO_DIGIT_POSITIONS = 0b1111011011000000  # 'YYYY-mm-dd', one bit per character, padded to 16 bits
+US_DIGIT_POSITIONS = 0b1101101111000000  # 'mm/dd/YYYY'
+
+DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+def days_from_civil(year, month, day):
+    """Converts dates to day numbers (days since 1970-01-01), vectorized. See
+    http://howardhinnant.github.io/date_algorithms.html#days_from_civil
+
+    :param numpy.ndarray year: Years
+    :param numpy.ndarray month: Months (1-12)
+    :param numpy.ndarray day: Days of month (1-31)
+    :return: Day numbers
+    """
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * np.where(month > 2, month - 3, month + 9) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+
+    return era * 146097 + day_of_era - 719468
+
+
+def get_date_keys(values):
+    """Maps the date part of datetime strings to compact integer keys without parsing the full datetime. Only the first
+    10 bytes of each value are looked at. Supported formats are 'YYYY-mm-dd ...' and 'mm/dd/YYYY ...'.
+
+    The key is (year - MIN_YEAR) * 512 + month * 32 + day. Keys are not checked against the calendar (e.g. 2015-02-30
+    gets a key), this is done once per distinct key in date_keys_to_day_numbers.
+
+    :param numpy.ndarray values: Datetime strings (str or bytes)
+    :return: Array of date keys (int32), INVALID_DATE_KEY for values in none of the formats or with a year outside of
+    [MIN_YEAR, MAX_YEAR]
+    """
+    chars = np.asarray(values).astype('S10').view(np.uint8).reshape(-1, 10)
+    digits = chars - np.uint8(ord('0'))  # characters other than digits wrap around to values > 9
+    digit_positions = np.packbits(digits <= 9, axis=1).view('>u2').ravel()  # one bit per character
+
+    is_iso = (digit_positions == ISO_DIGIT_POSITIONS) & (chars[:, 4] == ord('-')) & (chars[:, 7] == ord('-'))
+    keys = np.where(is_iso, get_keys_from_digits(digits=digits, year_idx=0, month_idx=5, day_idx=8), INVALID_DATE_KEY)
+
+    is_us = (digit_positions == US_DIGIT_POSITIONS) & (chars[:, 2] == ord('/')) & (chars[:, 5] == ord('/'))
+
+    if is_us.any():
+        keys[is_us] = get_keys_from_digits(digits=digits[is_us], year_idx=6, month_idx=0, day_idx=3)
+
+    return keys.astype(np.int32)
+
+
+def get_keys_from_digits(digits, year_idx, month_idx, day_idx):
+    """Calculates date keys from the digits of the date part of datetime strings
+
+    :param numpy.ndarray digits: Digits (n x 10, uint8)
+    :param int year_idx: Position of the first year digit
+    :param int month_idx: Position of the first month digit
+    :param int day_idx: Position of the first day digit
+    :return: Array of date keys (int32)
+    """
+    digits = digits.astype(np.int32)
+    year = digits[:, year_idx] * 1000 + digits[:, year_idx + 1] * 100 + digits[:, year_idx + 2] * 10 \
+        + digits[:, year_idx + 3]
+    month = digits[:, month_idx] * 10 + digits[:, month_idx + 1]
+    day = digits[:, day_idx] * 10 + digits[:, day_idx + 1]
+
+    is_valid = (year >= MIN_YEAR) & (year <= MAX_YEAR) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+
+    return np.where(is_valid, (year - MIN_YEAR) * 512 + month * 32 + day, INVALID_DATE_KEY)
+
+
+def date_keys_to_day_numbers(keys):
+    """Converts date keys to day numbers and checks them against the calendar
+
+    :param numpy.ndarray keys: Date keys as returned by get_date_keys
+    :return: Tuple of day numbers (days since 1970-01-01) and mask of valid dates (day numbers of invalid dates are 0)
+    """
+    year, month, day = keys // 512 + MIN_YEAR, keys // 32 % 16, keys % 32
+
+    is_leap_year = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    is_valid_month = (month >= 1) & (month <= 12)
+    days_in_month = DAYS_IN_MONTH[np.where(is_valid_month, month, 0)] + ((month == 2) & is_leap_year)
+    is_valid = is_valid_month & (day >= 1) & (day <= days_in_month)
+
+    return np.where(is_valid, days_from_civil(year=year, month=month, day=day), 0), is_valid
+
+
+def get_day_numbers(values):
+    """Day numbers of pickup datetimes. Strings are mapped to date keys first, only distinct keys are converted.
+
+    :param numpy.ndarray values: Datetimes (datetime64) or datetime strings (str or bytes)
+    :return: Array of day numbers (int64, days since 1970-01-01), INVALID_DAY for missing or invalid values
+    """
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[D]').astype(np.int64)
+
+    return get_day_numbers_of_keys(keys=get_date_keys(values=values))
+
+
+def get_day_numbers_of_keys(keys):
+    """Day numbers of date keys. Only distinct keys are converted.
+
+    :param numpy.ndarray keys: Date keys as returned by get_date_keys
+    :return: Array of day numbers (int64, days since 1970-01-01), INVALID_DAY for invalid dates
+    """
+    distinct_keys, inverse = np.unique(keys, return_inverse=True)
+    day_numbers, is_valid = date_keys_to_day_numbers(keys=distinct_keys)
+
+    return np.where(is_valid, day_numbers, INVALID_DAY)[inverse]
+
+
+class DayCounter:
+    """Accumulates numbers of rides per day. Counts are kept in a dense array indexed by day number, so adding values
+    is a single bincount instead of a group by.
+    """
+    def __init__(self):
+        self.first_day = None
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.n_invalid = 0
+
+    def extend(self, min_day, max_day):
+        """Extends the range of days covered by the counts array
+
+        :param int min_day: First day number which has to be covered
+        :param int max_day: Last day number which has to be covered
+        """
+        if self.first_day is None:
+            self.first_day = min_day
+        elif min_day < self.first_day:
+            self.counts = np.concatenate([np.zeros(self.first_day - min_day, dtype=np.int64), self.counts])
+            self.first_day = min_day
+
+        n_days = max(self.counts.size, max_day - self.first_day + 1)
+        self.counts = np.concatenate([self.counts, np.zeros(n_days - self.counts.size, dtype=np.int64)])
+
+    def add_day_numbers(self, day_numbers, counts=None):
+        """Adds rides by day number
+
+        :param numpy.ndarray day_numbers: Day numbers (days since 1970-01-01)
+        :param numpy.ndarray counts: Number of rides per day number. If None, each day number is one ride.
+        """
+        if day_numbers.size == 0:
+            return
+
+        self.extend(min_day=int(day_numbers.min()), max_day=int(day_numbers.max()))
+
+        if counts is None:
+            self.counts += np.bincount(day_numbers - self.first_day, minlength=self.counts.size)
+        else:
+            np.add.at(self.counts, day_numbers - self.first_day, counts)
+
+    def add_date_keys(self, keys):
+        """Adds rides by date key. Rides are binned by key first, only the distinct keys are converted to day numbers.
+
+        :param numpy.ndarray keys: Date keys as returned by get_date_keys
+        """
+        key_counts = np.bincount(keys, minlength=N_DATE_KEYS)
+        key_counts[INVALID_DATE_KEY] = 0
+        distinct_keys = np.flatnonzero(key_counts)
+        day_numbers, is_valid = date_keys_to_day_numbers(keys=distinct_keys)
+
+        self.add_day_numbers(day_numbers=day_numbers[is_valid], counts=key_counts[distinct_keys[is_valid]])
+        self.n_invalid += int(keys.size - key_counts[distinct_keys[is_valid]].sum())
+
+    def add_strings(self, values):
+        """Adds rides by pickup datetime strings. Values which are no valid date are counted as invalid.
+
+        :param numpy.ndarray values: Datetime strings (str or bytes)
+        """
+        self.add_date_keys(keys=get_date_keys(values=values))
+
+    def add_datetimes(self, values):
+        """Adds rides by pickup datetimes. Missing values (NaT) are counted as invalid.
+
+        :param numpy.ndarray values: Datetimes (datetime64)
+        """
+        is_valid = ~np.isnat(values)
+        day_numbers = values[is_valid].astype('datetime64[D]').astype(np.int64)
+
+        self.add_day_numbers(day_numbers=day_numbers)
+        self.n_invalid += int(is_valid.size - is_valid.sum())
+
+    def merge(self, other):
+        """Adds the counts of another DayCounter, e.g. of another file
+
+        :param DayCounter other: Counts to be added
+        """
+        self.n_invalid += other.n_invalid
+
+        if other.first_day is None:
+            return
+
+        self.extend(min_day=other.first_day, max_day=other.first_day + other.counts.size - 1)
+        offset = other.first_day - self.first_day
+        self.counts[offset:offset + other.counts.size] += other.counts
+
+    def save(self, file_path):
+        """Saves the counts, e.g. as partial result of one file
+
+        :param pathlib.Path file_path: Path of .npz file
+        """
+        with open(str(file_path), 'wb') as f:
+            np.savez(f, first_day=self.first_day or 0, counts=self.counts, n_invalid=self.n_invalid)
+
+    @classmethod
+    def load(cls, file_path):
+        """Loads counts saved with DayCounter.save
+
+        :param pathlib.Path file_path: Path of .npz file
+        :return: DayCounter
+        """
+        day_counter = cls()
+
+        with np.load(str(file_path)) as data:
+            day_counter.counts = data['counts']
+            day_counter.first_day = int(data['first_day']) if day_counter.counts.size > 0 else None
+            day_counter.n_invalid = int(data['n_invalid'])
+
+        return day_counter
+
+    def get_n_rides(self, min_date=None, max_date=None):
+        """Number of counted rides, optionally only between two dates
+
+        :param str min_date: First date ('YYYY-mm-dd', inclusive). If None, there is no lower limit.
+        :param str max_date: Last date ('YYYY-mm-dd', inclusive). If None, there is no upper limit.
+        :return: Number of rides
+        """
+        return int(self.to_frame(min_date=min_date, max_date=max_date)['num_rides'].sum())
+
+    def to_frame(self, min_date=None, max_date=None):
+        """Converts the counts to a data frame, optionally only between two dates
+
+        :param str min_date: First date ('YYYY-mm-dd', inclusive). If None, there is no lower limit.
+        :param str max_date: Last date ('YYYY-mm-dd', inclusive). If None, there is no upper limit.
+        :return: Data frame with index 'pickup_date_as_day' (str, 'YYYY-mm-dd') and column 'num_rides' (days without
+        rides are omitted)
+        """
+        day_numbers = np.arange(self.counts.size) + (self.first_day or 0)
+        is_selected = self.counts > 0
+
+        if min_date is not None:
+            is_selected &= day_numbers >= np.datetime64(min_date, 'D').astype(np.int64)
+        if max_date is not None:
+            is_selected &= day_numbers <= np.datetime64(max_date, 'D').astype(np.int64)
+
+        dates = day_numbers[is_selected].astype('datetime64[D]').astype(str)
+
+        return pd.DataFrame({'num_rides': self.counts[is_selected]}, index=pd.Index(dates, name='pickup_date_as_day'))
@@ -0,0 +1,520 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import ssl
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import unquote, urljoin, urlsplit
+
+from src.config.config import Config
+
+BLOCK_SIZE = 1024 ** 2  # bytes read from a response and written to the file at once
+MAX_REDIRECTS = 5
+ETAG_MD5_PATTERN = re.compile(r'[0-9a-f]{32}')  # ETags of single part uploads are the MD5 of the content
+CONTENT_RANGE_PATTERN = re.compile(r'bytes (\d+)-(\d+)/(\d+|\*)')
+
+
+class DownloadError(Exception):
+    """Raised if a file cannot be downloaded"""
+
+
+class HTTPStatusError(DownloadError):
+    """Raised for responses with an error status
+
+    :param int status: Status code
+    :param str url: URL of the request
+    """
+    def __init__(self, status, url):
+        super().__init__(f'HTTP status {status} for: {url}')
+        self.status = status
+
+
+class ChecksumError(DownloadError):
+    """Raised if the size or checksum of a downloaded file does not match the expected values"""
+
+
+class Response:
+    """Status and headers of an HTTP response. The body is read from the connection by the caller.
+
+    :param int status: Status code
+    :param dict headers: Headers (lower case names)
+    """
+    def __init__(self, status, headers):
+        self.status = status
+        self.headers = headers
+
+    @property
+    def content_length(self):
+        return int(self.headers['content-length']) if 'content-length' in self.headers else None
+
+
+class Connection:
+    """HTTP/1.1 connection to one host
+
+    :param asyncio.StreamReader reader: Reader of the connection
+    :param asyncio.StreamWriter writer: Writer of the connection
+    """
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.is_reusable = False
+
+    async def send(self, method, url_parts, headers=None):
+        """Sends a request and reads the status and headers of the response
+
+        :param str method: HTTP method, 'HEAD' or 'GET'
+        :param urllib.parse.SplitResult url_parts: Parts of the URL
+        :param dict headers: Additional request headers
+        :return: Response
+        """
+        path = url_parts.path or '/'
+        path += f'?{url_parts.query}' if url_parts.query else ''
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {url_parts.netloc}', 'Accept-Encoding: identity']
+        lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+
+        if not status_line:
+            raise ConnectionError('Connection closed by server')
+
+        status = int(status_line.split()[1])
+        response_headers = {}
+
+        while True:
+            line = (await self.reader.readline()).decode('latin-1').strip()
+
+            if not line:
+                break
+
+            name, _, value = line.partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        response = Response(status=status, headers=response_headers)
+        self.is_reusable = response_headers.get('connection', '').lower() != 'close' \
+            and (method == 'HEAD' or response.content_length is not None)
+
+        return response
+
+    async def read_body(self, n_bytes):
+        """Reads a response body in blocks
+
+        :param int n_bytes: Length of the body
+        :return: Async generator of bytes
+        """
+        while n_bytes > 0:
+            block = await self.reader.read(min(n_bytes, BLOCK_SIZE))
+
+            if not block:
+                raise ConnectionError('Connection closed before the end of the response body')
+
+            n_bytes -= len(block)
+            yield block
+
+    async def discard_body(self, response):
+        """Reads the body of a response which is not needed, e.g. of a redirect
+
+        :param Response response: Response
+        """
+        async for _ in self.read_body(n_bytes=response.content_length or 0):
+            pass
+
+    def close(self):
+        self.writer.close()
+
+
+class ConnectionPool:
+    """Bounded pool of keep-alive connections. At most max_connections connections are open at the same time, idle
+    connections are reused per host.
+
+    :param int max_connections: Maximum number of open connections
+    """
+    def __init__(self, max_connections):
+        self.semaphore = asyncio.Semaphore(max_connections)
+        self.idle_connections = defaultdict(list)  # key: (scheme, host, port)
+
+    @staticmethod
+    def get_key(url_parts):
+        return url_parts.scheme, url_parts.hostname, url_parts.port or (443 if url_parts.scheme == 'https' else 80)
+
+    async def acquire(self, url_parts):
+        """Waits for a free slot and returns an idle or new connection to the host of the URL
+
+        :param urllib.parse.SplitResult url_parts: Parts of the URL
+        :return: Connection
+        """
+        await self.semaphore.acquire()
+
+        try:
+            key = self.get_key(url_parts=url_parts)
+
+            if self.idle_connections[key]:
+                return self.idle_connections[key].pop()
+
+            scheme, host, port = key
+            ssl_context = ssl.create_default_context() if scheme == 'https' else None
+            reader, writer = await asyncio.open_connection(host, port, ssl=ssl_context)
+
+            return Connection(reader=reader, writer=writer)
+        except BaseException:
+            self.semaphore.release()
+            raise
+
+    def release(self, url_parts, connection):
+        """Returns a connection to the pool. Connections which cannot be reused are closed.
+
+        :param urllib.parse.SplitResult url_parts: Parts of the URL the connection was opened for
+        :param Connection connection: Connection
+        """
+        if connection.is_reusable:
+            self.idle_connections[self.get_key(url_parts=url_parts)].append(connection)
+        else:
+            connection.close()
+
+        self.semaphore.release()
+
+    def close(self):
+        for connections in self.idle_connections.values():
+            for connection in connections:
+                connection.close()
+
+        self.idle_connections.clear()
+
+
+async def request(pool, method, url, headers=None, handle_body=None):
+    """Sends a request, following redirects. The body of the final response is passed to handle_body.
+
+    :param ConnectionPool pool: Connection pool
+    :param str method: HTTP method, 'HEAD' or 'GET'
+    :param str url: URL
+    :param dict headers: Additional request headers
+    :param handle_body: Coroutine function called with the response and an async generator of the body blocks. If
+    None, the body is discarded.
+    :return: Tuple of final URL and Response
+    """
+    for _ in range(MAX_REDIRECTS + 1):
+        url_parts = urlsplit(url)
+        connection = await pool.acquire(url_parts=url_parts)
+
+        try:
+            response = await connection.send(method=method, url_parts=url_parts, headers=headers)
+
+            if method == 'HEAD':
+                pass
+            elif response.status < 300 and handle_body is not None:
+                if response.content_length is None:
+                    raise DownloadError(f'Response without Content-Length from: {url}')
+
+                await handle_body(response, connection.read_body(n_bytes=response.content_length))
+            elif response.content_length is not None:
+                await connection.discard_body(response=response)
+        except BaseException:
+            connection.is_reusable = False
+            raise
+        finally:
+            pool.release(url_parts=url_parts, connection=connection)
+
+        if response.status in (301, 302, 303, 307, 308) and 'location' in response.headers:
+            url = urljoin(url, response.headers['location'])
+            continue
+
+        if response.status >= 400:
+            raise HTTPStatusError(status=response.status, url=url)
+
+        return url, response
+
+    raise DownloadError(f'Too many redirects for: {url}')
+
+
+def get_file_name(url):
+    """Name of the downloaded file: the last part of the URL path
+
+    :param str url: URL
+    :return: File name
+    """
+    return unquote(urlsplit(url).path.rsplit('/', 1)[-1])
+
+
+def load_urls(file_path=None):
+    """Loads the URLs of the raw taxi data files
+
+    :param pathlib.Path file_path: Text file with one URL per line. If None, Config.PATH_FILE_RAW_DATA_URLS is used.
+    :return: List of URLs
+    """
+    with open(str(file_path or Config.PATH_FILE_RAW_DATA_URLS), 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def load_checksums(file_path=None):
+    """Loads expected MD5 checksums in the format of md5sum ('<checksum>  <file name>' per line)
+
+    :param pathlib.Path file_path: Checksum file. If None, Config.PATH_FILE_RAW_DATA_CHECKSUMS is used.
+    :return: Dictionary (key: file name, value: MD5 as hex string), empty if the file does not exist
+    """
+    file_path = Path(file_path or Config.PATH_FILE_RAW_DATA_CHECKSUMS)
+
+    if not file_path.exists():
+        return {}
+
+    with open(str(file_path), 'r') as f:
+        return {file_name.lstrip('*'): checksum.lower()
+                for checksum, file_name in (line.strip().split(maxsplit=1) for line in f if line.strip())}
+
+
+def get_md5(file_path):
+    """MD5 checksum of a file
+
+    :param pathlib.Path file_path: Path of the file
+    :return: MD5 as hex string
+    """
+    md5 = hashlib.md5()
+
+    with open(str(file_path), 'rb') as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+            md5.update(block)
+
+    return md5.hexdigest()
+
+
+def get_ranges(size, range_size):
+    """Splits a file into byte ranges
+
+    :param int size: Size of the file
+    :param int range_size: Size of the ranges
+    :return: List of ranges (start, end), end exclusive
+    """
+    return [(start, min(start + range_size, size)) for start in range(0, size, range_size)]
+
+
+class FileDownload:
+    """Download of one file in byte ranges into a partial file next to the target. Finished ranges are recorded in a
+    state file, so an interrupted download resumes with the missing ranges as long as the remote file did not change.
+    The target only appears once the whole file is verified.
+
+    :param str url: URL of the file
+    :param pathlib.Path target_path: Path of the downloaded file
+    :param str expected_md5: Expected MD5 checksum. If None, the ETag is used if it is a plain MD5.
+    """
+    def __init__(self, url, target_path, expected_md5=None):
+        self.url = url
+        self.target_path = target_path
+        self.part_path = target_path.parent / (target_path.name + '.part')
+        self.state_path = target_path.parent / (target_path.name + '.part.json')
+        self.expected_md5 = expected_md5
+        self.size = None
+        self.etag = None
+        self.done_ranges = set()
+
+    def load_state(self):
+        """Loads the finished ranges of an earlier attempt if it downloaded the same version of the file"""
+        if not (self.state_path.exists() and self.part_path.exists()):
+            return
+
+        with open(str(self.state_path), 'r') as f:
+            state = json.load(f)
+
+        if state['size'] == self.size and state['etag'] == self.etag:
+            self.done_ranges = {tuple(byte_range) for byte_range in state['done_ranges']}
+
+    def save_state(self):
+        tmp_path = self.state_path.parent / (self.state_path.name + '.tmp')
+
+        with open(str(tmp_path), 'w') as f:
+            json.dump({'url': self.url, 'size': self.size, 'etag': self.etag,
+                       'done_ranges': sorted(self.done_ranges)}, f)
+
+        os.replace(str(tmp_path), str(self.state_path))
+
+    async def with_retries(self, get_coroutine, description):
+        """Runs a request and retries it after connection and server errors, e.g. on a closed keep-alive connection
+
+        :param get_coroutine: Function which returns a new coroutine of the request for every attempt
+        :param str description: Description of the request for log messages
+        :return: Result of the coroutine
+        """
+        for attempt in range(Config.DOWNLOAD_N_RETRIES + 1):
+            try:
+                return await get_coroutine()
+            except HTTPStatusError as e:
+                if e.status < 500 or attempt == Config.DOWNLOAD_N_RETRIES:  # client errors do not go away
+                    raise
+
+                logging.warning(f'Retrying {description} of {self.url} after error: {e}')
+                await asyncio.sleep(2 ** attempt)
+            except (DownloadError, asyncio.IncompleteReadError, OSError) as e:
+                if attempt == Config.DOWNLOAD_N_RETRIES:
+                    raise DownloadError(f'{description} of {self.url} failed: {e}') from e
+
+                logging.warning(f'Retrying {description} of {self.url} after error: {e}')
+                await asyncio.sleep(2 ** attempt)
+
+    async def download_range(self, pool, fd, byte_range):
+        """Downloads one byte range into the partial file
+
+        :param ConnectionPool pool: Connection pool
+        :param int fd: File descriptor of the partial file
+        :param tuple byte_range: Range (start, end), end exclusive
+        """
+        start, end = byte_range
+        headers = {'Range': f'bytes={start}-{end - 1}'} if (start, end) != (0, self.size) else {}
+
+        async def write_body(response, blocks):
+            if response.status == 206:
+                content_range = CONTENT_RANGE_PATTERN.fullmatch(response.headers.get('content-range', ''))
+
+                if content_range is None or int(content_range.group(1)) != start \
+                        or int(content_range.group(2)) != end - 1:
+                    raise DownloadError(f'Unexpected range {response.headers.get("content-range")} for: {self.url}')
+            elif (start, end) != (0, self.size):
+                raise DownloadError(f'Server does not support byte ranges: {self.url}')
+
+            position = start
+
+            async for block in blocks:
+                os.pwrite(fd, block, position)
+                position += len(block)
+
+        await self.with_retries(lambda: request(pool=pool, method='GET', url=self.url, headers=headers,
+                                                handle_body=write_body),
+                                description=f'range {start}-{end}')
+
+        self.done_ranges.add(byte_range)
+        self.save_state()
+
+    def verify(self):
+        """Checks size and checksum of the partial file. Runs in a thread, since hashing large files takes seconds.
+
+        :raises ChecksumError: If size or checksum do not match
+        """
+        size = self.part_path.stat().st_size
+
+        if size != self.size:
+            raise ChecksumError(f'Size {size} instead of {self.size}: {self.url}')
+
+        expected_md5 = self.expected_md5
+
+        if expected_md5 is None and self.etag is not None and ETAG_MD5_PATTERN.fullmatch(self.etag):
+            expected_md5 = self.etag
+
+        if expected_md5 is None:
+            logging.warning(f'No checksum to verify: {self.url}')
+            return
+
+        md5 = get_md5(file_path=self.part_path)
+
+        if md5 != expected_md5:
+            raise ChecksumError(f'MD5 {md5} instead of {expected_md5}: {self.url}')
+
+    async def run(self, pool, range_size):
+        """Downloads, verifies and moves the file to its target path. Files which exist with the expected size are
+        skipped.
+
+        :param ConnectionPool pool: Connection pool
+        :param int range_size: Size of the byte ranges
+        :return: Flag whether the file was downloaded (False if skipped)
+        """
+        self.url, response = await self.with_retries(lambda: request(pool=pool, method='HEAD', url=self.url),
+                                                     description='HEAD request')
+        self.size = response.content_length
+        self.etag = response.headers.get('etag', '').strip('"').lower() or None
+
+        if self.size is None:
+            raise DownloadError(f'Unknown size of: {self.url}')
+
+        if self.target_path.exists() and self.target_path.stat().st_size == self.size:
+            return False
+
+        self.load_state()
+        supports_ranges = response.headers.get('accept-ranges', '').lower() == 'bytes'
+        ranges = get_ranges(size=self.size, range_size=range_size if supports_ranges else max(self.size, 1))
+
+        fd = os.open(str(self.part_path), os.O_RDWR | os.O_CREAT)
+
+        try:
+            os.ftruncate(fd, self.size)
+            await asyncio.gather(*[self.download_range(pool=pool, fd=fd, byte_range=byte_range)
+                                   for byte_range in ranges if byte_range not in self.done_ranges])
+        finally:
+            os.close(fd)
+
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.verify)
+        except ChecksumError:
+            self.part_path.unlink()
+            self.state_path.unlink()
+            raise
+
+        os.replace(str(self.part_path), str(self.target_path))
+        self.state_path.unlink()
+
+        return True
+
+
+async def download_files_async(urls, target_dir, on_complete=None, max_connections=None, range_size=None,
+                               checksums=None):
+    """Downloads files concurrently. All byte ranges of all files share one bounded connection pool; at most
+    max_connections files are in progress at the same time.
+
+    :param list urls: URLs of the files
+    :param pathlib.Path target_dir: Directory of the downloaded files
+    :param on_complete: Function called with the file name as soon as a file is complete (also for skipped files)
+    :param int max_connections: Maximum number of open connections. If None, Config.DOWNLOAD_N_CONNECTIONS is used.
+    :param int range_size: Size of the byte ranges. If None, Config.DOWNLOAD_RANGE_SIZE is used.
+    :param dict checksums: Expected MD5 checksums by file name. If None, no checksums besides ETags are used.
+    :return: Dictionary (key: file name, value: 'downloaded', 'skipped' or the error)
+    """
+    max_connections = max_connections or Config.DOWNLOAD_N_CONNECTIONS
+    range_size = range_size or Config.DOWNLOAD_RANGE_SIZE
+    checksums = checksums or {}
+    pool = ConnectionPool(max_connections=max_connections)
+    file_semaphore = asyncio.Semaphore(max_connections)
+    results = {}
+
+    if not target_dir.exists():
+        target_dir.mkdir(parents=True)
+
+    async def download(url):
+        file_name = get_file_name(url=url)
+
+        async with file_semaphore:
+            try:
+                file_download = FileDownload(url=url, target_path=target_dir / file_name,
+                                             expected_md5=checksums.get(file_name))
+                is_downloaded = await file_download.run(pool=pool, range_size=range_size)
+            except DownloadError as e:
+                logging.error(f'Download failed: {e}')
+                results[file_name] = e
+                return
+
+        results[file_name] = 'downloaded' if is_downloaded else 'skipped'
+        logging.info(f'File {results[file_name]}: {file_name}')
+
+        if on_complete is not None:
+            on_complete(file_name)
+
+    try:
+        await asyncio.gather(*[download(url=url) for url in urls])
+    finally:
+        pool.close()
+
+    return results
+
+
+def download_files(urls, target_dir, on_complete=None, max_connections=None, range_size=None, checksums=None):
+    """Downloads files concurrently, see download_files_async
+
+    :param list urls: URLs of the files
+    :param pathlib.Path target_dir: Directory of the downloaded files
+    :param on_complete: Function called with the file name as soon as a file is complete (also for skipped files)
+    :param int max_connections: Maximum number of open connections. If None, Config.DOWNLOAD_N_CONNECTIONS is used.
+    :param int range_size: Size of the byte ranges. If None, Config.DOWNLOAD_RANGE_SIZE is used.
+    :param dict checksums: Expected MD5 checksums by file name. If None, no checksums besides ETags are used.
+    :return: Dictionary (key: file name, value: 'downloaded', 'skipped' or the error)
+    """
+    return asyncio.run(download_files_async(urls=urls, target_dir=target_dir, on_complete=on_complete,
+                                            max_connections=max_connections, range_size=range_size,
+                                            checksums=checksums))
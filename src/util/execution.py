@@ -0,0 +1,221 @@
+from multiprocessing import Pool
+
+from src.config.config import Config, lazy_attribute
+
+BACKENDS = ['serial', 'process_pool', 'dask']
+
+
+def get_config():
+    """Settings of Config in this process. Lazy attributes which were not computed yet are left out, they are computed
+    where they are used.
+
+    :return: Dictionary (key: attribute name, value: value)
+    """
+    return {name: value for name, value in vars(Config).items()
+            if name.isupper() and not isinstance(value, lazy_attribute)}
+
+
+def set_config(config):
+    """Applies settings from get_config to Config of this process
+
+    :param dict config: Dictionary (key: attribute name, value: value)
+    """
+    for name, value in config.items():
+        setattr(Config, name, value)
+
+
+def get_groups(items, fan_in):
+    """Splits items into consecutive groups of at most fan_in items
+
+    :param list items: Items
+    :param int fan_in: Maximum number of items per group
+    :return: List of lists
+    """
+    return [items[start:start + fan_in] for start in range(0, len(items), fan_in)]
+
+
+class Backend:
+    """Base class of execution backends. A backend runs the tasks of a job in worker processes, which are initialized
+    once with the same function and arguments (e.g. the polygons), and reduces partial results.
+
+    :param function initializer: Function called once in every worker process (and in this process for 'serial')
+    :param tuple initargs: Arguments of initializer
+    """
+    def __init__(self, initializer=None, initargs=()):
+        self.initializer = initializer
+        self.initargs = initargs
+
+    def map_unordered(self, function, tasks):
+        """Runs a function for every task
+
+        :param function function: Module-level function of one argument
+        :param list tasks: Arguments of the calls
+        :return: Iterator over the results in the order in which they are completed
+        """
+        raise NotImplementedError
+
+    def map(self, function, items):
+        """Runs a function for every item and waits for all results
+
+        :param function function: Module-level function of one argument
+        :param list items: Arguments of the calls
+        :return: List of results in the order of items
+        """
+        raise NotImplementedError
+
+    def tree_reduce(self, function, items, fan_in=None):
+        """Reduces partial results tree-wise: the items are merged in groups of fan_in, the results of one level again
+        in groups of fan_in, until one result is left. The groups of a level are merged in parallel.
+
+        :param function function: Module-level function which merges a list of items into one item
+        :param list items: Partial results
+        :param int fan_in: Number of items merged at once. If None, Config.REDUCTION_FAN_IN is used.
+        :return: Merged result
+        """
+        fan_in = fan_in or Config.REDUCTION_FAN_IN
+        items = list(items)
+
+        while len(items) > fan_in:
+            items = self.map(function, get_groups(items=items, fan_in=fan_in))
+
+        return function(items)
+
+    def close(self):
+        """Releases the worker processes"""
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SerialBackend(Backend):
+    """Runs all tasks one after the other in this process, e.g. for debugging and profiling"""
+    def __init__(self, initializer=None, initargs=()):
+        super().__init__(initializer=initializer, initargs=initargs)
+
+        if initializer is not None:
+            initializer(*initargs)
+
+    def map_unordered(self, function, tasks):
+        return map(function, tasks)
+
+    def map(self, function, items):
+        return [function(item) for item in items]
+
+
+class ProcessPoolBackend(Backend):
+    """Runs the tasks in a pool of Config.N_CORES processes on this machine"""
+    def __init__(self, initializer=None, initargs=()):
+        super().__init__(initializer=initializer, initargs=initargs)
+        self.pool = Pool(processes=Config.N_CORES, initializer=initializer, initargs=initargs)
+
+    def map_unordered(self, function, tasks):
+        return self.pool.imap_unordered(function, tasks)
+
+    def map(self, function, items):
+        return self.pool.map(function, items)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+def get_worker_initializer(config, initializer, initargs):
+    """Worker plugin of DaskBackend: applies the settings of Config and calls the initializer on every worker, including
+    workers which join later
+
+    :param dict config: Settings of Config, see get_config
+    :param function initializer: Function called once in every worker process
+    :param tuple initargs: Arguments of initializer
+    :return: distributed.diagnostics.plugin.WorkerPlugin
+    """
+    from distributed.diagnostics.plugin import WorkerPlugin  # only needed for the 'dask' backend
+
+    class WorkerInitializer(WorkerPlugin):
+        name = 'worker_initializer'
+
+        def setup(self, worker):
+            set_config(config=config)
+
+            if initializer is not None:
+                initializer(*initargs)
+
+    return WorkerInitializer()
+
+
+class DaskBackend(Backend):
+    """Runs the tasks on the workers of a dask.distributed cluster, which may span several machines. The workers need
+    access to the raw data and results under the paths of Config (e.g. a shared file system) and one thread each, since
+    the state set by the initializer is not thread-safe (e.g. 'dask-worker <scheduler address> --nthreads 1').
+
+    The settings of Config and the arguments of the initializer are sent to every worker once, when it joins the
+    cluster. Partial results are merged on the workers, only the final result is sent back.
+
+    :param function initializer: Function called once in every worker process
+    :param tuple initargs: Arguments of initializer, e.g. the polygons
+    :param str address: Address of the scheduler. If None, Config.DASK_SCHEDULER_ADDRESS is used, if this is None as
+    well, a LocalCluster with Config.N_CORES worker processes is started.
+    """
+    def __init__(self, initializer=None, initargs=(), address=None):
+        super().__init__(initializer=initializer, initargs=initargs)
+
+        from distributed import Client, LocalCluster  # only needed for the 'dask' backend
+
+        address = address or Config.DASK_SCHEDULER_ADDRESS
+        self.cluster = None
+
+        if address is None:
+            self.cluster = LocalCluster(n_workers=Config.N_CORES, threads_per_worker=1, processes=True)
+            address = self.cluster.scheduler_address
+
+        self.client = Client(address)
+        self.client.register_plugin(get_worker_initializer(config=get_config(), initializer=initializer,
+                                                           initargs=initargs))
+
+    def map_unordered(self, function, tasks):
+        from distributed import as_completed
+
+        futures = self.client.map(function, list(tasks), pure=False)
+
+        for future in as_completed(futures):
+            yield future.result()
+            future.release()
+
+    def map(self, function, items):
+        return self.client.gather(self.client.map(function, list(items), pure=False))
+
+    def tree_reduce(self, function, items, fan_in=None):
+        fan_in = fan_in or Config.REDUCTION_FAN_IN
+        items = list(items)
+
+        while len(items) > fan_in:  # futures of one level are arguments of the next, results stay on the workers
+            items = [self.client.submit(function, group, pure=False)
+                     for group in get_groups(items=items, fan_in=fan_in)]
+
+        return self.client.submit(function, items, pure=False).result()
+
+    def close(self):
+        self.client.close()
+
+        if self.cluster is not None:
+            self.cluster.close()
+
+
+def get_backend(initializer=None, initargs=()):
+    """Creates the execution backend of Config.EXECUTION_BACKEND
+
+    :param function initializer: Function called once in every worker process
+    :param tuple initargs: Arguments of initializer
+    :return: Backend
+    """
+    if Config.EXECUTION_BACKEND == 'serial':
+        return SerialBackend(initializer=initializer, initargs=initargs)
+    elif Config.EXECUTION_BACKEND == 'process_pool':
+        return ProcessPoolBackend(initializer=initializer, initargs=initargs)
+    elif Config.EXECUTION_BACKEND == 'dask':
+        return DaskBackend(initializer=initializer, initargs=initargs)
+
+    raise ValueError(f'Unknown execution backend: {Config.EXECUTION_BACKEND} (backends: {", ".join(BACKENDS)})')
@@ -0,0 +1,252 @@
+import json
+import os
+import sys
+from collections import defaultdict
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.config.config import Config
+from src.util import data_loader, parquet_cache
+from src.util.manifest import get_code_version
+from src.util.parquet_cache import NORMALIZED_COLNAMES
+from src.util.zone_index import UNKNOWN_LOCATION_ID, get_location_ids
+
+TAXI_TYPES = ['fhv', 'green', 'yellow']
+FARE_AMOUNT_COLNAME = 'fare_amount'
+TAXI_TYPE_COLNAME = 'taxi_type'
+
+# Unified schema of the filtered rides of all files, independent of the schema of the raw files
+SCHEMA = pa.schema([
+    pa.field(NORMALIZED_COLNAMES.pickup_datetime_colname, pa.timestamp('ms')),
+    pa.field(NORMALIZED_COLNAMES.dropoff_datetime_colname, pa.timestamp('ms')),  # Parquet has no timestamps in seconds
+    pa.field(NORMALIZED_COLNAMES.pickup_location_id_colname, pa.int16()),
+    pa.field(NORMALIZED_COLNAMES.dropoff_location_id_colname, pa.int16()),
+    pa.field(NORMALIZED_COLNAMES.pickup_lon_colname, pa.float64()),
+    pa.field(NORMALIZED_COLNAMES.pickup_lat_colname, pa.float64()),
+    pa.field(NORMALIZED_COLNAMES.dropoff_lon_colname, pa.float64()),
+    pa.field(NORMALIZED_COLNAMES.dropoff_lat_colname, pa.float64()),
+    pa.field(FARE_AMOUNT_COLNAME, pa.float32()),
+    pa.field(TAXI_TYPE_COLNAME, pa.dictionary(pa.int32(), pa.string()))
+])
+
+# Coordinates (latitude, longitude) of the location IDs, used for files without location IDs
+LOCATION_ID_COORDINATES = {
+    NORMALIZED_COLNAMES.pickup_location_id_colname: (NORMALIZED_COLNAMES.pickup_lat_colname,
+                                                     NORMALIZED_COLNAMES.pickup_lon_colname),
+    NORMALIZED_COLNAMES.dropoff_location_id_colname: (NORMALIZED_COLNAMES.dropoff_lat_colname,
+                                                      NORMALIZED_COLNAMES.dropoff_lon_colname)
+}
+
+ROW_GROUP_SIZE = 100000  # row groups are sorted by pickup time, so their statistics allow skipping by time range
+SOURCE_INFO_FILE_NAME = '_source.json'
+
+
+def get_partition_dir(year, month):
+    """Partition directory of a month in the dataset of filtered rides, e.g. 'year=2015/month=1'
+
+    :param int year: Year of the source files
+    :param int month: Month of the source files
+    :return: Path of partition directory
+    """
+    return Config.PATH_DIR_FILTERED_RIDES_DATASET / f'year={year}' / f'month={month}'
+
+
+def get_partition_path(year, month):
+    """Path of the Parquet file of a month in the dataset of filtered rides
+
+    :param int year: Year of the source files
+    :param int month: Month of the source files
+    :return: Path of Parquet file
+    """
+    return get_partition_dir(year=year, month=month) / 'part-0.parquet'
+
+
+def get_source_info(source_paths):
+    """Size and modification time of the filtered rides of all files of a month and the version of this module, used
+    to detect months which have to be rebuilt
+
+    :param dict source_paths: Dictionary (key: file name, value: path of the filtered rides of the file)
+    :return: Dictionary with code version and sources (key: file name, value: list of size and modification time)
+    """
+    return {'code_version': get_code_version(sys.modules[__name__], data_loader, parquet_cache),
+            'sources': {file_name: [path.stat().st_size, path.stat().st_mtime]
+                        for file_name, path in sorted(source_paths.items())}}
+
+
+def to_table(file_name, rides, location_datetime_colnames, zone_index=None):
+    """Converts filtered rides of a file to the unified schema. Files without location IDs get the location IDs of
+    their coordinates, other columns which do not exist in the file are null.
+
+    :param str file_name: Name of the raw taxi data file
+    :param pandas.DataFrame rides: Filtered rides
+    :param LocationTimeColNames location_datetime_colnames: Location and datetime column names of the rides
+    :param ZoneIndex zone_index: Zone index, only needed for files without location IDs
+    :return: pyarrow.Table with schema SCHEMA
+    """
+    file_schema = data_loader.get_schema(file_name=file_name)
+    colnames = {getattr(NORMALIZED_COLNAMES, attribute): colname
+                for attribute, colname in vars(location_datetime_colnames).items()}
+    colnames[FARE_AMOUNT_COLNAME] = file_schema.fare_amount_colname
+    n_rows = rides.shape[0]
+    arrays = []
+
+    for field in SCHEMA:
+        if field.name == TAXI_TYPE_COLNAME:
+            indices = pa.array([TAXI_TYPES.index(file_schema.taxi_type)] * n_rows, type=pa.int32())
+            arrays.append(pa.DictionaryArray.from_arrays(indices, pa.array(TAXI_TYPES)))
+        elif field.name in LOCATION_ID_COORDINATES and colnames[field.name] == 'nan':
+            lat_colname, lon_colname = [colnames[colname] for colname in LOCATION_ID_COORDINATES[field.name]]
+            location_ids = get_location_ids(taxi_data=rides, location_id_colname='nan', lat_colname=lat_colname,
+                                            lon_colname=lon_colname, zone_index=zone_index)
+            arrays.append(pa.array(location_ids, mask=location_ids == UNKNOWN_LOCATION_ID, type=field.type))
+        elif colnames[field.name] == 'nan':
+            arrays.append(pa.nulls(n_rows, type=field.type))
+        else:
+            arrays.append(parquet_cache.to_arrow_array(colname=field.name, values=rides[colnames[field.name]],
+                                                       arrow_type=field.type))
+
+    return pa.Table.from_arrays(arrays, schema=SCHEMA)
+
+
+class RidesWriter:
+    """Writes the filtered rides of a file chunk by chunk to a Parquet file with the unified schema. The rides are
+    written to a temporary file first, which close renames, so an interrupted filter never leaves a partial file behind.
+
+    :param str file_name: Name of the raw taxi data file
+    :param pathlib.Path file_path: Path of the Parquet file
+    :param LocationTimeColNames location_datetime_colnames: Location and datetime column names of the chunks
+    :param ZoneIndex zone_index: Zone index, only needed for files without location IDs
+    """
+    def __init__(self, file_name, file_path, location_datetime_colnames, zone_index=None):
+        self.file_name = file_name
+        self.file_path = file_path
+        self.tmp_path = file_path.parent / (file_path.name + '.tmp')
+        self.location_datetime_colnames = location_datetime_colnames
+        self.zone_index = zone_index
+        self.writer = pq.ParquetWriter(str(self.tmp_path), schema=SCHEMA, compression='snappy')
+        self.n_rows = 0
+
+    def write(self, rides):
+        """Appends rides, every non-empty chunk becomes one row group
+
+        :param pandas.DataFrame rides: Filtered rides
+        """
+        if rides.shape[0] > 0:
+            self.writer.write_table(to_table(file_name=self.file_name, rides=rides,
+                                             location_datetime_colnames=self.location_datetime_colnames,
+                                             zone_index=self.zone_index))
+            self.n_rows += rides.shape[0]
+
+    def close(self):
+        """Closes the Parquet file and moves it into place"""
+        self.writer.close()
+        os.replace(str(self.tmp_path), str(self.file_path))
+
+
+def read_source(source_path):
+    """Reads the filtered rides of a file
+
+    :param pathlib.Path source_path: Path of the Parquet file with the filtered rides of the file
+    :return: pyarrow.Table with schema SCHEMA
+    """
+    return pq.read_table(str(source_path), schema=SCHEMA)
+
+
+def concat_files(file_paths, file_path):
+    """Concatenates Parquet files of filtered rides, e.g. the filtered rides of the byte ranges of a file
+
+    :param list file_paths: Paths of the Parquet files, in order
+    :param pathlib.Path file_path: Path of the concatenated file
+    """
+    tables = [read_source(source_path=path) for path in file_paths]
+    tmp_path = file_path.parent / (file_path.name + '.tmp')
+    pq.write_table(pa.concat_tables(tables) if tables else SCHEMA.empty_table(), str(tmp_path), compression='snappy')
+    os.replace(str(tmp_path), str(file_path))
+
+
+def write_partition(year, month, source_paths):
+    """Writes the filtered rides of all files of a month, sorted by pickup time, to one Parquet file. The file is
+    written to a temporary file first and renamed at the end, so readers never see a partial file.
+
+    :param int year: Year of the source files
+    :param int month: Month of the source files
+    :param dict source_paths: Dictionary (key: file name, value: path of the filtered rides of the file)
+    :return: Number of written rides
+    """
+    tables = [read_source(source_path=source_path) for _, source_path in sorted(source_paths.items())]
+    table = pa.concat_tables(tables) if tables else SCHEMA.empty_table()
+    table = table.sort_by(NORMALIZED_COLNAMES.pickup_datetime_colname).combine_chunks()
+
+    partition_dir = get_partition_dir(year=year, month=month)
+    partition_path = get_partition_path(year=year, month=month)
+    tmp_path = partition_dir / (partition_path.name + '.tmp')
+
+    if not partition_dir.exists():
+        partition_dir.mkdir(parents=True)
+
+    pq.write_table(table, str(tmp_path), row_group_size=ROW_GROUP_SIZE, compression='snappy')
+    os.replace(str(tmp_path), str(partition_path))
+
+    with open(str(partition_dir / SOURCE_INFO_FILE_NAME), 'w') as f:
+        json.dump(get_source_info(source_paths=source_paths), f)
+
+    return table.num_rows
+
+
+def get_outdated_months(source_paths_by_month):
+    """Months whose partition does not exist or was built from other versions of the filtered rides
+
+    :param dict source_paths_by_month: Dictionary (key: year and month, value: dictionary of file name and path)
+    :return: List of year and month
+    """
+    outdated_months = []
+
+    for (year, month), source_paths in sorted(source_paths_by_month.items()):
+        source_info_path = get_partition_dir(year=year, month=month) / SOURCE_INFO_FILE_NAME
+
+        if source_info_path.exists() and get_partition_path(year=year, month=month).exists():
+            with open(str(source_info_path), 'r') as f:
+                if json.load(f) == get_source_info(source_paths=source_paths):
+                    continue
+
+        outdated_months.append((year, month))
+
+    return outdated_months
+
+
+def build_dataset(file_names, get_source_path):
+    """Builds the dataset of filtered rides in Config.PATH_DIR_FILTERED_RIDES_DATASET from the filtered rides per file.
+    The dataset is partitioned by the month of the source files, only months with new or changed files are rebuilt.
+
+    :param list file_names: Names of the raw taxi data files
+    :param get_source_path: Function which returns the path of the filtered rides of a file (keyword file_name)
+    :return: List of rebuilt months (year and month)
+    """
+    source_paths_by_month = defaultdict(dict)
+
+    for file_name in file_names:
+        source_path = get_source_path(file_name=file_name)
+
+        if source_path.exists():
+            _, year, month = data_loader.parse_file_name(file_name=file_name)
+            source_paths_by_month[(year, month)][file_name] = source_path
+
+    outdated_months = get_outdated_months(source_paths_by_month=source_paths_by_month)
+
+    for year, month in outdated_months:
+        write_partition(year=year, month=month, source_paths=source_paths_by_month[(year, month)])
+
+    return outdated_months
+
+
+def read_dataset(columns=None, filters=None):
+    """Reads (a subset of) the dataset of filtered rides. Filters on year, month and pickup time skip whole partitions
+    and row groups.
+
+    :param list columns: Column names to be read. If None, all columns are read.
+    :param list filters: Filters in the format of pyarrow.parquet.read_table, e.g. [('year', '=', 2015)]
+    :return: pandas.DataFrame
+    """
+    return pq.read_table(str(Config.PATH_DIR_FILTERED_RIDES_DATASET), columns=columns, filters=filters,
+                         partitioning='hive').to_pandas()
@@ -1,4 +1,41 @@
-from shapely.geometry import Point
+import numpy as np
+import shapely.vectorized
+
+
+def bounding_box_mask(polygon, lat, lon):
+    """Cheap prefilter which flags all points inside the bounding box of a polygon.
+
+    :param Shapely.geometry.Polygon polygon: Polygon whose bounding box shall be used
+    :param numpy.ndarray lat: Latitudes
+    :param numpy.ndarray lon: Longitudes
+    :return: Boolean mask, True for points inside the bounding box (NaN coordinates are always False)
+    """
+    min_lon, min_lat, max_lon, max_lat = polygon.bounds
+
+    return (lon >= min_lon) & (lon <= max_lon) & (lat >= min_lat) & (lat <= max_lat)
+
+
+def contains_lat_lon(polygon, lat, lon):
+    """Vectorized point-in-polygon test. Equivalent to calling Point(lon, lat).within(polygon) for every point.
+
+    Points outside the bounding box of the polygon are discarded first, only the remaining candidates are tested
+    against the polygon itself.
+
+    :param Shapely.geometry.Polygon polygon: Polygon to test against
+    :param lat: Latitudes (array-like)
+    :param lon: Longitudes (array-like)
+    :return: Boolean mask, True for points lying within the polygon
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+
+    mask = bounding_box_mask(polygon=polygon, lat=lat, lon=lon)
+    candidates = np.flatnonzero(mask)
+
+    if candidates.size > 0:
+        mask[candidates] = shapely.vectorized.contains(polygon, lon[candidates], lat[candidates])
+
+    return mask
 
 
 class GeoHandler:
@@ -22,7 +59,16 @@ class GeoHandler:
         :param float lon: Longitude
         :return: Flag whether given point lies in Manhattan
         """
-        return Point(lon, lat).within(self.manhattan_polygon)
+        return bool(self.is_manhattan_lat_lon_batch(lat=[lat], lon=[lon])[0])
+
+    def is_manhattan_lat_lon_batch(self, lat, lon):
+        """Calculates for many points at once whether they lie in Manhattan
+
+        :param numpy.ndarray lat: Latitudes
+        :param numpy.ndarray lon: Longitudes
+        :return: Boolean mask, True for points lying in Manhattan
+        """
+        return contains_lat_lon(polygon=self.manhattan_polygon, lat=lat, lon=lon)
 
     def is_manhattan_location(self, location_id):
         """Checks whether given location ID matches any of the Manhattan location ID (multiple)
@@ -32,6 +78,14 @@ class GeoHandler:
         """
         return location_id in self.manhattan_location_ids
 
+    def is_manhattan_location_batch(self, location_ids):
+        """Checks for many location IDs at once whether they match any of the Manhattan location IDs
+
+        :param numpy.ndarray location_ids: Location IDs
+        :return: Boolean mask, True for Manhattan location IDs
+        """
+        return np.isin(location_ids, self.manhattan_location_ids)
+
     def is_jfk_lat_lon(self, lat, lon):
         """Calculates whether a point with given coordinates lies in the JFK International Airport area
 
@@ -39,7 +93,16 @@ class GeoHandler:
         :param float lon: Longitude
         :return: Flag whether given point lies in JFK International Airport area
         """
-        return Point(lon, lat).within(self.jfk_polygon)
+        return bool(self.is_jfk_lat_lon_batch(lat=[lat], lon=[lon])[0])
+
+    def is_jfk_lat_lon_batch(self, lat, lon):
+        """Calculates for many points at once whether they lie in the JFK International Airport area
+
+        :param numpy.ndarray lat: Latitudes
+        :param numpy.ndarray lon: Longitudes
+        :return: Boolean mask, True for points lying in JFK International Airport area
+        """
+        return contains_lat_lon(polygon=self.jfk_polygon, lat=lat, lon=lon)
 
     def is_jfk_location(self, location_id):
         """Checks whether given location ID matches JFK International Airport (only one ID)
@@ -48,3 +111,11 @@ class GeoHandler:
         :return: Flag whether given location ID matches JFK International Airport
         """
         return location_id == self.jfk_location_id
+
+    def is_jfk_location_batch(self, location_ids):
+        """Checks for many location IDs at once whether they match JFK International Airport
+
+        :param numpy.ndarray location_ids: Location IDs
+        :return: Boolean mask, True for the JFK International Airport location ID
+        """
+        return np.asarray(location_ids) == self.jfk_location_id
@@ -0,0 +1,68 @@
+import hashlib
+import os
+import pickle
+from functools import lru_cache
+
+from src.config.config import Config
+
+SHAPE_FILE_SUFFIXES = ['.shp', '.shx', '.dbf', '.prj']
+
+
+@lru_cache(maxsize=4)
+def get_shape_file_hash(shape_file_path):
+    """Hash over all parts of a shape file. Cached geometries are only used as long as the shape file is unchanged.
+
+    :param pathlib.Path shape_file_path: Path of the .shp file
+    :return: Hash as hex string
+    """
+    md5 = hashlib.md5()
+
+    for suffix in SHAPE_FILE_SUFFIXES:
+        part_path = shape_file_path.with_suffix(suffix)
+
+        if part_path.exists():
+            with open(str(part_path), 'rb') as f:
+                md5.update(f.read())
+
+    return md5.hexdigest()
+
+
+def get_cache_path(name):
+    """Path of a cached geometry object derived from the taxi zone shape file
+
+    :param str name: Name of the object
+    :return: Path of pickle file
+    """
+    shape_file_hash = get_shape_file_hash(shape_file_path=Config.PATH_SHAPE_FILE_NYC)
+
+    return Config.PATH_DIR_GEOMETRY_CACHE / f'{name}_{shape_file_hash}.pkl'
+
+
+def load_cached(name, build):
+    """Loads a geometry object (e.g. polygons projected to latitude/longitude) from the on-disk cache. If it is not
+    cached yet, it is built and cached. The cache key includes the hash of the shape file, so a new shape file leads to
+    new cache entries.
+
+    :param str name: Name of the object
+    :param build: Function without arguments which builds the object
+    :return: Object
+    """
+    cache_path = get_cache_path(name=name)
+
+    if cache_path.exists():
+        with open(str(cache_path), 'rb') as f:
+            return pickle.load(f)
+
+    value = build()
+
+    if not cache_path.parent.exists():
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_path = cache_path.parent / f'{cache_path.name}.{os.getpid()}.tmp'  # workers may build the same object at once
+
+    with open(str(tmp_path), 'wb') as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.replace(str(tmp_path), str(cache_path))
+
+    return value
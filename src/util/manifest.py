@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from src.config.config import Config
+from src.util import data_loader
+
+FINGERPRINT_BLOCK_SIZE = 1024 ** 2
+
+
+def get_code_version(*modules, settings=None):
+    """Version of the code which produces a result: a hash over the source files of the given modules. Any change in
+    one of the modules invalidates all results produced with the previous version.
+
+    :param modules: Python modules the result depends on
+    :param settings: JSON serializable configuration the result depends on, e.g. Config.QUALITY_RULES
+    :return: Code version as hex string
+    """
+    md5 = hashlib.md5()
+
+    for module in modules:
+        with open(module.__file__, 'rb') as f:
+            md5.update(f.read())
+
+    if settings is not None:
+        md5.update(json.dumps(settings, sort_keys=True).encode())
+
+    return md5.hexdigest()
+
+
+def get_fingerprint(file_path):
+    """Hash over the size and the first, middle and last block of a file. Much cheaper than hashing the whole file,
+    which for the raw taxi data would mean reading 241 GB, while still detecting replaced files.
+
+    :param pathlib.Path file_path: Path of the file
+    :return: Fingerprint as hex string
+    """
+    file_size = file_path.stat().st_size
+    md5 = hashlib.md5(str(file_size).encode())
+
+    with open(str(file_path), 'rb') as f:
+        for offset in sorted({0, max(0, file_size // 2 - FINGERPRINT_BLOCK_SIZE // 2),
+                              max(0, file_size - FINGERPRINT_BLOCK_SIZE)}):
+            f.seek(offset)
+            md5.update(f.read(FINGERPRINT_BLOCK_SIZE))
+
+    return md5.hexdigest()
+
+
+def get_file_info(file_path):
+    """Size, modification time and fingerprint of an input file
+
+    :param pathlib.Path file_path: Path of the file
+    :return: Dictionary with size, mtime and fingerprint
+    """
+    stat = file_path.stat()
+
+    return {'size': stat.st_size, 'mtime': stat.st_mtime, 'fingerprint': get_fingerprint(file_path=file_path)}
+
+
+class Manifest:
+    """Record of the input files a job has already processed. For each input file it stores size, modification time and
+    fingerprint of the file, the code version which processed it and the path of the result. It is saved after every
+    update, so a crashed run can resume with the files which were not finished yet.
+
+    :param str job_name: Name of the job, determines the file name of the manifest in Config.PATH_DIR_RESULTS
+    :param str code_version: Current code version of the job, see get_code_version
+    """
+    def __init__(self, job_name, code_version):
+        self.path = Config.PATH_DIR_RESULTS / f'manifest_{job_name}.json'
+        self.code_version = code_version
+        self.entries = {}
+
+        if self.path.exists():
+            with open(str(self.path), 'r') as f:
+                self.entries = json.load(f)
+
+    def is_up_to_date(self, file_name):
+        """Checks whether a file was processed by the current code version, has not changed since and its result still
+        exists. If only the modification time changed, the fingerprint decides.
+
+        :param str file_name: Name of the raw taxi data file
+        :return: Flag whether the file is up to date
+        """
+        entry = self.entries.get(file_name)
+        file_path = data_loader.get_raw_path(file_name=file_name)
+
+        if entry is None or entry['code_version'] != self.code_version or not Path(entry['output_path']).exists():
+            return False
+
+        stat = file_path.stat()
+
+        if stat.st_size != entry['size']:
+            return False
+
+        return stat.st_mtime == entry['mtime'] or get_fingerprint(file_path=file_path) == entry['fingerprint']
+
+    def get_output_path(self, file_name):
+        """Path of the result of a processed file
+
+        :param str file_name: Name of the raw taxi data file
+        :return: Path of result
+        """
+        return Path(self.entries[file_name]['output_path'])
+
+    def update(self, file_name, output_path):
+        """Records that a file has been processed and saves the manifest
+
+        :param str file_name: Name of the raw taxi data file
+        :param pathlib.Path output_path: Path of the result
+        """
+        entry = get_file_info(file_path=data_loader.get_raw_path(file_name=file_name))
+        entry.update({'code_version': self.code_version, 'output_path': str(output_path)})
+        self.entries[file_name] = entry
+
+        self.save()
+
+    def save(self):
+        """Saves the manifest. A temporary file is written first, so the manifest is never left half-written."""
+        if not self.path.parent.exists():
+            self.path.parent.mkdir(parents=True)
+
+        tmp_path = self.path.parent / (self.path.name + '.tmp')
+
+        with open(str(tmp_path), 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+
+        os.replace(str(tmp_path), str(self.path))
@@ -0,0 +1,311 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.config.config import Config
+from src.util import data_loader
+from src.util.data_loader import LocationTimeColNames
+
+NORMALIZED_COLNAMES = LocationTimeColNames(pickup_location_id_colname='pickup_location_id',
+                                           pickup_lon_colname='pickup_longitude',
+                                           pickup_lat_colname='pickup_latitude',
+                                           pickup_datetime_colname='pickup_datetime',
+                                           dropoff_location_id_colname='dropoff_location_id',
+                                           dropoff_lon_colname='dropoff_longitude',
+                                           dropoff_lat_colname='dropoff_latitude',
+                                           dropoff_datetime_colname='dropoff_datetime')
+
+LOCATION_ID_COLNAMES = [NORMALIZED_COLNAMES.pickup_location_id_colname,
+                        NORMALIZED_COLNAMES.dropoff_location_id_colname]
+COORDINATE_COLNAMES = [NORMALIZED_COLNAMES.pickup_lon_colname, NORMALIZED_COLNAMES.pickup_lat_colname,
+                       NORMALIZED_COLNAMES.dropoff_lon_colname, NORMALIZED_COLNAMES.dropoff_lat_colname]
+DATETIME_COLNAMES = [NORMALIZED_COLNAMES.pickup_datetime_colname, NORMALIZED_COLNAMES.dropoff_datetime_colname]
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+SOURCE_INFO_FILE_NAME = '_source.json'
+
+
+def get_cache_dir(file_name):
+    """Returns the partition directory of a raw file in the Parquet cache. The cache is partitioned by taxi type, year
+    and month, e.g. 'taxi_type=yellow/year=2015/month=1'.
+
+    :param str file_name: Name of the raw taxi data file
+    :return: Path of partition directory
+    """
+    taxi_type, year, month = data_loader.parse_file_name(file_name=file_name)
+
+    return Config.PATH_DIR_PARQUET / f'taxi_type={taxi_type}' / f'year={year}' / f'month={month}'
+
+
+def get_cache_path(file_name):
+    """Returns the path of the Parquet file for a raw file.
+
+    :param str file_name: Name of the raw taxi data file
+    :return: Path of Parquet file
+    """
+    return get_cache_dir(file_name=file_name) / 'part-0.parquet'
+
+
+def get_column_renaming(file_name):
+    """Maps the raw location and datetime column names of a file to the normalized column names.
+
+    :param str file_name: Name of the raw taxi data file
+    :return: Dictionary (key: raw column name, value: normalized column name)
+    """
+    raw_colnames = data_loader.get_location_datetime_columns(file_name=file_name)
+
+    return {getattr(raw_colnames, attribute): getattr(NORMALIZED_COLNAMES, attribute)
+            for attribute in vars(NORMALIZED_COLNAMES) if getattr(raw_colnames, attribute) != 'nan'}
+
+
+def get_cached_location_datetime_columns(file_name):
+    """Location and datetime column names of a file after conversion to the Parquet cache.
+
+    :param str file_name: Name of the raw taxi data file
+    :return: LocationTimeColNames with normalized column names ('nan' if the column does not exist in the file)
+    """
+    raw_colnames = data_loader.get_location_datetime_columns(file_name=file_name)
+    normalized_colnames = {attribute: getattr(NORMALIZED_COLNAMES, attribute)
+                           if getattr(raw_colnames, attribute) != 'nan' else 'nan'
+                           for attribute in vars(NORMALIZED_COLNAMES)}
+
+    return LocationTimeColNames(**normalized_colnames)
+
+
+def get_source_info(file_name):
+    """Size and modification time of a raw file, used to detect new or changed files.
+
+    :param str file_name: Name of the raw taxi data file
+    :return: Dictionary with size and modification time
+    """
+    stat = data_loader.get_raw_path(file_name=file_name).stat()
+
+    return {'file_name': file_name, 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def is_up_to_date(file_name):
+    """Checks whether the Parquet cache of a raw file exists and was converted from the current version of the file.
+
+    :param str file_name: Name of the raw taxi data file
+    :return: Flag whether cache is up to date
+    """
+    source_info_path = get_cache_dir(file_name=file_name) / SOURCE_INFO_FILE_NAME
+
+    if not source_info_path.exists() or not get_cache_path(file_name=file_name).exists():
+        return False
+
+    with open(str(source_info_path), 'r') as f:
+        return json.load(f) == get_source_info(file_name=file_name)
+
+
+def parse_datetimes(values):
+    """Parses datetime strings. The common format is tried first, deviating values are parsed with format inference.
+
+    :param pandas.Series values: Datetime strings
+    :return: Series of datetime64 (NaT for unparsable values)
+    """
+    datetimes = pd.to_datetime(values, format=DATETIME_FORMAT, errors='coerce')
+    is_unparsed = datetimes.isnull() & values.notnull()
+
+    if is_unparsed.any():
+        datetimes[is_unparsed] = pd.to_datetime(values[is_unparsed], errors='coerce')
+
+    return datetimes
+
+
+def get_arrow_type(colname, values):
+    """Compact Arrow type for a column of a file. The types of the raw columns are configured in
+    Config.PATH_COLUMN_TYPES; columns of other schemas are typed by the values of the first chunk. All chunks are cast
+    to the same type.
+
+    :param str colname: Normalized column name
+    :param pandas.Series values: Column values of the first chunk
+    :return: pyarrow.DataType
+    """
+    if colname in LOCATION_ID_COLNAMES:
+        return pa.int16()
+    elif colname in COORDINATE_COLNAMES:
+        return pa.float64()  # keeps geo filtering results identical to the raw data
+    elif colname in DATETIME_COLNAMES:
+        return pa.timestamp('s')
+    elif colname in Config.COLUMN_TYPES:
+        return pa.type_for_alias(Config.COLUMN_TYPES[colname])
+    elif np.issubdtype(values.dtype, np.number) and values.notnull().any():
+        return pa.float32()  # integer columns of the first chunk may contain decimals or missing values later on
+    else:
+        return pa.string()  # includes columns without any values in the first chunk
+
+
+def get_unconverted(values, converted):
+    """Finds the values which could not be converted. Blank values are missing values, not conversion errors.
+
+    :param pandas.Series values: Raw values
+    :param pandas.Series converted: Converted values (null for values which could not be converted)
+    :return: Boolean Series
+    """
+    is_unconverted = (converted.isnull() & values.notnull()).values
+    is_unconverted[is_unconverted] = np.char.strip(values.values[is_unconverted].astype(str)) != ''
+
+    return pd.Series(is_unconverted, index=values.index)
+
+
+def get_out_of_range(numbers, arrow_type):
+    """Finds the numbers which do not fit a numeric Arrow type: decimals and out-of-range values for integer types,
+    finite values beyond the largest float for float types
+
+    :param pandas.Series numbers: Numbers (NaN for missing values)
+    :param pyarrow.DataType arrow_type: Numeric target type
+    :return: Boolean Series
+    """
+    dtype = np.dtype(arrow_type.to_pandas_dtype())
+
+    if np.issubdtype(dtype, np.integer):
+        return (numbers % 1 != 0) | (numbers < np.iinfo(dtype).min) | (numbers > np.iinfo(dtype).max)
+
+    return np.isfinite(numbers) & (numbers.abs() > np.finfo(dtype).max)
+
+
+def raise_for_unfit(colname, values, does_not_fit, arrow_type):
+    """Raises a ValueError naming the first value of a column which does not fit its type
+
+    :param str colname: Normalized column name
+    :param pandas.Series values: Raw values
+    :param pandas.Series does_not_fit: Boolean Series
+    :param pyarrow.DataType arrow_type: Target type
+    """
+    if does_not_fit.any():
+        raise ValueError(f'Column {colname} of type {arrow_type} has values which do not fit the type, e.g. '
+                         f'{values[does_not_fit].iloc[0]!r} in row {values.index[does_not_fit][0]}')
+
+
+def to_arrow_array(colname, values, arrow_type, errors='coerce'):
+    """Converts a column to an Arrow array of the given type. Values which cannot be parsed, decimals in integer
+    columns and values beyond the range of the type do not fit.
+
+    :param str colname: Normalized column name
+    :param pandas.Series values: Column values
+    :param pyarrow.DataType arrow_type: Target type
+    :param str errors: 'coerce': values which do not fit become null. 'raise': they raise a ValueError.
+    :return: pyarrow.Array
+    """
+    if pa.types.is_string(arrow_type):
+        return pa.array(values.where(values.isnull(), values.astype(str)), type=arrow_type, from_pandas=True)
+    elif colname in DATETIME_COLNAMES:
+        datetimes = parse_datetimes(values)
+
+        if errors == 'raise':
+            raise_for_unfit(colname=colname, values=values, does_not_fit=get_unconverted(values, datetimes),
+                            arrow_type=arrow_type)
+
+        # the cast only drops fractions of seconds, the raw datetimes have none
+        return pa.array(datetimes, from_pandas=True).cast(arrow_type, safe=False)
+
+    numbers = pd.to_numeric(values, errors='coerce')
+    does_not_fit = get_unconverted(values, numbers) | get_out_of_range(numbers, arrow_type)
+
+    if errors == 'raise':
+        raise_for_unfit(colname=colname, values=values, does_not_fit=does_not_fit, arrow_type=arrow_type)
+
+    return pa.array(numbers.mask(does_not_fit), from_pandas=True).cast(arrow_type, safe=False)  # all values fit now
+
+
+def convert_file(file_name, columns, chunk_size=Config.CHUNK_SIZE):
+    """Converts a raw taxi data file to the Parquet cache. The file is read in chunks and every chunk becomes one row
+    group. The Parquet file is written to a temporary file first and renamed at the end, so an interrupted conversion
+    never leaves a partial file behind. Values which do not fit the type of their column raise a ValueError instead of
+    being stored as null.
+
+    :param str file_name: Name of the raw taxi data file
+    :param list columns: Column names of the raw file
+    :param int chunk_size: Number of rows per chunk
+    :return: Number of converted rows
+    """
+    renaming = get_column_renaming(file_name=file_name)
+    cache_dir = get_cache_dir(file_name=file_name)
+    cache_path = get_cache_path(file_name=file_name)
+    tmp_path = cache_dir / (cache_path.name + '.tmp')
+
+    if not cache_dir.exists():
+        cache_dir.mkdir(parents=True)
+
+    schema = None
+    writer = None
+    n_rows = 0
+
+    try:
+        for chunk in data_loader.read_csv_chunks(file_name=file_name, columns=columns, chunk_size=chunk_size):
+            chunk = chunk.rename(columns=renaming)
+
+            if schema is None:
+                schema = pa.schema([pa.field(colname, get_arrow_type(colname=colname, values=chunk[colname]))
+                                    for colname in chunk.columns])
+                writer = pq.ParquetWriter(str(tmp_path), schema=schema, compression='snappy')
+
+            arrays = [to_arrow_array(colname=field.name, values=chunk[field.name], arrow_type=field.type,
+                                     errors='raise')
+                      for field in schema]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            n_rows += chunk.shape[0]
+    except ValueError as error:
+        if writer is not None:
+            writer.close()
+            writer = None
+            tmp_path.unlink()
+
+        raise ValueError(f'Cannot convert file {file_name}: {error}') from error
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:  # file without any rows
+        pq.write_table(pa.Table.from_pandas(pd.DataFrame(columns=[renaming.get(col, col) for col in columns]),
+                                            preserve_index=False), str(tmp_path))
+
+    os.replace(str(tmp_path), str(cache_path))
+
+    with open(str(cache_dir / SOURCE_INFO_FILE_NAME), 'w') as f:
+        json.dump(get_source_info(file_name=file_name), f)
+
+    return n_rows
+
+
+def read_file(file_name, columns=None):
+    """Reads (a subset of the columns of) a file from the Parquet cache.
+
+    :param str file_name: Name of the raw taxi data file
+    :param list columns: Normalized column names to be read. If None, all columns are read.
+    :return: pandas.DataFrame
+    """
+    return pq.read_table(str(get_cache_path(file_name=file_name)), columns=columns).to_pandas()
+
+
+def read_schema(file_name):
+    """Reads the column names of a file in the Parquet cache without reading any data.
+
+    :param str file_name: Name of the raw taxi data file
+    :return: List of column names
+    """
+    return pq.ParquetFile(str(get_cache_path(file_name=file_name))).schema.names
+
+
+def read_file_chunks(file_name, columns=None):
+    """Streams (a subset of the columns of) a file from the Parquet cache, one row group at a time. The index of the
+    chunks is the row number within the file, like for data_loader.read_csv_chunks.
+
+    :param str file_name: Name of the raw taxi data file
+    :param list columns: Normalized column names to be read. If None, all columns are read.
+    :return: Generator of data frames
+    """
+    parquet_file = pq.ParquetFile(str(get_cache_path(file_name=file_name)))
+    n_rows = 0
+
+    for row_group in range(parquet_file.num_row_groups):
+        chunk = parquet_file.read_row_group(row_group, columns=columns).to_pandas()
+        chunk.index = pd.RangeIndex(n_rows, n_rows + chunk.shape[0])
+        n_rows += chunk.shape[0]
+
+        yield chunk
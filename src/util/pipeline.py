@@ -0,0 +1,150 @@
+import logging
+
+from src.config.config import Config
+from src.util import data_loader, parquet_cache, quality_rules
+
+
+class Consumer:
+    """Base class of analyses which are computed in a single scan over the taxi data. Every file is read once and each
+    chunk is passed to all consumers, so the cost of reading and parsing is paid once per run instead of once per
+    analysis.
+
+    For every file, start_file is called first, then consume for each chunk and finally finish_file, which writes the
+    result of the file to get_output_path. After all files are scanned, combine merges the results of all files.
+    """
+    name = None  # Name of the analysis, used for the manifest and Config.ANALYSES
+    requires_all_columns = False  # If no consumer requires all columns, only location and datetime columns are read
+    dependencies = ()  # Modules the results depend on besides the consumer's own module, part of the code version
+
+    def get_output_path(self, file_name):
+        """Path of the result of a single file
+
+        :param str file_name: Name of the raw taxi data file
+        :return: Path of result
+        """
+        raise NotImplementedError
+
+    def start_file(self, file_name, columns, location_datetime_colnames):
+        """Prepares the scan of a file
+
+        :param str file_name: Name of the raw taxi data file
+        :param list columns: Column names of the raw file
+        :param LocationTimeColNames location_datetime_colnames: Location and datetime column names of the chunks
+        """
+        raise NotImplementedError
+
+    def consume(self, chunk):
+        """Processes one chunk of the current file
+
+        :param pandas.DataFrame chunk: Taxi data
+        """
+        raise NotImplementedError
+
+    def finish_file(self, rejection_counter):
+        """Writes the result of the current file to get_output_path
+
+        :param RejectionCounter rejection_counter: Rows of the file rejected by the data-quality rules
+        """
+        raise NotImplementedError
+
+    def combine(self, file_names, manifest):
+        """Merges the results of all files
+
+        :param list file_names: Names of the raw taxi data files
+        :param Manifest manifest: Manifest of the analysis, contains the result path of each file
+        """
+        raise NotImplementedError
+
+
+def is_read_from_cache(file_name, byte_range=None):
+    """Checks whether a file is read from the Parquet cache instead of the raw CSV file
+
+    :param str file_name: Name of the raw taxi data file
+    :param tuple byte_range: Byte range (start, end) of the raw file to be read. If None, the whole file is read.
+    :return: Flag whether the file is read from the Parquet cache
+    """
+    return byte_range is None and Config.USE_PARQUET_CACHE and parquet_cache.is_up_to_date(file_name=file_name)
+
+
+def iter_taxi_data(file_name, columns, byte_range=None, only_location_datetime=False, extra_usecols=()):
+    """Streams a taxi data file in chunks from the Parquet cache if it is up to date, otherwise from the raw CSV file
+
+    :param str file_name: File to be loaded
+    :param list columns: Column names of the raw file
+    :param tuple byte_range: Byte range (start, end) of the raw file to be read. If None, the whole file is read.
+    :param bool only_location_datetime: Flag whether only the location and datetime columns are read
+    :param list extra_usecols: Columns which are read besides the location and datetime columns if
+    only_location_datetime is set, e.g. the fare amount for the data-quality rules
+    :return: Tuple of chunk iterator and LocationTimeColNames matching the column names of the chunks
+    """
+    if is_read_from_cache(file_name=file_name, byte_range=byte_range):
+        logging.info('Loading taxi data from Parquet cache...')
+
+        location_datetime_colnames = parquet_cache.get_cached_location_datetime_columns(file_name=file_name)
+        usecols = get_location_datetime_usecols(location_datetime_colnames) + list(extra_usecols) \
+            if only_location_datetime else None
+
+        return parquet_cache.read_file_chunks(file_name=file_name, columns=usecols), location_datetime_colnames
+
+    location_datetime_colnames = data_loader.get_location_datetime_columns(file_name=file_name)
+    chunks = data_loader.read_csv_chunks(
+        file_name=file_name,
+        columns=columns,
+        usecols=get_location_datetime_usecols(location_datetime_colnames) + list(extra_usecols)
+        if only_location_datetime else None,
+        dtype=data_loader.get_dtypes(location_datetime_colnames),
+        byte_range=byte_range
+    )
+
+    return chunks, location_datetime_colnames
+
+
+def get_location_datetime_usecols(location_datetime_colnames):
+    """Location and datetime column names which exist in a file
+
+    :param LocationTimeColNames location_datetime_colnames: Location and datetime column names of the file
+    :return: List of column names
+    """
+    return [colname for colname in vars(location_datetime_colnames).values() if colname != 'nan']
+
+
+def scan_file(file_name, columns, consumers, rejection_counter=None):
+    """Reads a file once and passes every chunk to all consumers. Rows rejected by the data-quality rules are removed
+    from the chunks before, so no consumer spends time on them.
+
+    :param str file_name: Name of the raw taxi data file
+    :param list columns: Column names of the raw file
+    :param list consumers: Consumers of the chunks
+    :param RejectionCounter rejection_counter: Counter of the rejected rows. If None, the numbers are discarded.
+    :return: Number of read rows
+    """
+    logging.info(f'Scanning file: {file_name}')
+
+    only_location_datetime = not any(consumer.requires_all_columns for consumer in consumers)
+    chunks, location_datetime_colnames = iter_taxi_data(
+        file_name=file_name,
+        columns=columns,
+        only_location_datetime=only_location_datetime,
+        extra_usecols=quality_rules.get_extra_columns(file_name=file_name) if only_location_datetime else ()
+    )
+    quality_filter = quality_rules.QualityFilter(file_name=file_name,
+                                                 location_datetime_colnames=location_datetime_colnames,
+                                                 counter=rejection_counter)
+    n_rows = 0
+
+    for consumer in consumers:
+        consumer.start_file(file_name=file_name,
+                            columns=columns,
+                            location_datetime_colnames=location_datetime_colnames)
+
+    for chunk in chunks:
+        n_rows += chunk.shape[0]
+        chunk = quality_filter.apply(chunk=chunk)
+
+        for consumer in consumers:
+            consumer.consume(chunk=chunk)
+
+    for consumer in consumers:
+        consumer.finish_file(rejection_counter=quality_filter.counter)
+
+    return n_rows
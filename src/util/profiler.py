@@ -0,0 +1,294 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import resource
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from src.config.config import Config
+from src.util import data_loader, parquet_cache
+
+STAGES = ['read', 'parse', 'quality', 'geo_filter', 'aggregate', 'write']  # order of the stages in the run report
+
+
+def get_rss_mb():
+    """Current resident set size of this process. Falls back to the peak RSS where /proc is not available.
+
+    :return: RSS in MB
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StageProfile:
+    """Accumulated measurements of one processing stage of a file"""
+    def __init__(self):
+        self.seconds = 0.
+        self.n_calls = 0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.bytes_read = 0
+        self.peak_rss_mb = 0.
+
+    def count(self, rows_in=0, rows_out=0, bytes_read=0):
+        """Adds processed rows and bytes
+
+        :param int rows_in: Number of rows passed into the stage
+        :param int rows_out: Number of rows passed on by the stage
+        :param int bytes_read: Number of bytes read from disk
+        """
+        self.rows_in += rows_in
+        self.rows_out += rows_out
+        self.bytes_read += bytes_read
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class FileProfile:
+    """Measures wall time, rows, bytes read and memory per processing stage of a file (or of one byte range of it).
+    Memory is sampled at the end of every stage call, the peak is the largest sample.
+
+    :param str file_name: Name of the raw taxi data file
+    :param int part_idx: Index of the byte range, None for whole files
+    """
+    def __init__(self, file_name, part_idx=None):
+        self.file_name = file_name
+        self.part_idx = part_idx
+        self.stages = {}
+        self.start = time.perf_counter()
+        self.seconds = None
+
+    def get_stage(self, name):
+        """Measurements of a stage, created on first use
+
+        :param str name: Name of the stage, one of STAGES
+        :return: StageProfile
+        """
+        if name not in self.stages:
+            self.stages[name] = StageProfile()
+
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name):
+        """Measures the wall time and memory of a block of code
+
+        :param str name: Name of the stage, one of STAGES
+        :return: StageProfile to which processed rows and bytes can be added
+        """
+        stage = self.get_stage(name=name)
+        start = time.perf_counter()
+
+        try:
+            yield stage
+        finally:
+            stage.seconds += time.perf_counter() - start
+            stage.n_calls += 1
+            stage.peak_rss_mb = max(stage.peak_rss_mb, get_rss_mb())
+
+    def iter_stage(self, name, chunks):
+        """Measures the time needed to produce each chunk of a stream of data frames, e.g. reading and tokenizing
+
+        :param str name: Name of the stage, one of STAGES
+        :param chunks: Iterator over data frames
+        :return: Generator of the same data frames
+        """
+        chunks = iter(chunks)
+
+        while True:
+            with self.stage(name=name) as stage:
+                chunk = next(chunks, None)
+
+                if chunk is not None:
+                    stage.count(rows_out=chunk.shape[0])
+
+            if chunk is None:
+                return
+
+            yield chunk
+
+    def finish(self):
+        """Stops the measurement of the whole file
+
+        :return: This FileProfile
+        """
+        self.seconds = time.perf_counter() - self.start
+
+        return self
+
+    def to_dict(self):
+        return {'file_name': self.file_name,
+                'part_idx': self.part_idx,
+                'seconds': self.seconds,
+                'peak_rss_mb': max([stage.peak_rss_mb for stage in self.stages.values()], default=0.),
+                'stages': {name: stage.to_dict() for name, stage in self.stages.items()}}
+
+
+def get_bytes_read(file_name, byte_range=None, is_parquet=False):
+    """Number of bytes read for a file
+
+    :param str file_name: Name of the raw taxi data file
+    :param tuple byte_range: Byte range (start, end) of the raw file. If None, the whole file is read.
+    :param bool is_parquet: Flag whether the file is read from the Parquet cache
+    :return: Number of bytes
+    """
+    if is_parquet:
+        return parquet_cache.get_cache_path(file_name=file_name).stat().st_size
+
+    if byte_range is not None:
+        return byte_range[1] - byte_range[0]
+
+    return data_loader.get_raw_path(file_name=file_name).stat().st_size  # compressed size for compressed files
+
+
+def get_profile_path(job_name, file_name, part_idx=None):
+    """Path of the cProfile statistics of a file
+
+    :param str job_name: Name of the job, e.g. 'count_rides_per_day'
+    :param str file_name: Name of the raw taxi data file
+    :param int part_idx: Index of the byte range, None for whole files
+    :return: Path of .prof file, readable with pstats or snakeviz
+    """
+    part_suffix = '' if part_idx is None else f'.part-{part_idx}'
+
+    return Config.PATH_DIR_RESULTS / 'profiles' / f'{job_name}_{file_name}{part_suffix}.prof'
+
+
+@contextmanager
+def cprofile(job_name, file_name, part_idx=None):
+    """Runs a block of code under cProfile if the file is listed in Config.PROFILE_FILE_NAMES. The statistics are
+    saved next to a text summary of the functions with the largest cumulative time.
+
+    :param str job_name: Name of the job, e.g. 'count_rides_per_day'
+    :param str file_name: Name of the raw taxi data file
+    :param int part_idx: Index of the byte range, None for whole files
+    """
+    if file_name not in Config.PROFILE_FILE_NAMES:
+        yield
+        return
+
+    profile = cProfile.Profile()
+    profile.enable()
+
+    try:
+        yield
+    finally:
+        profile.disable()
+
+        profile_path = get_profile_path(job_name=job_name, file_name=file_name, part_idx=part_idx)
+
+        if not profile_path.parent.exists():
+            profile_path.parent.mkdir(parents=True, exist_ok=True)
+
+        profile.dump_stats(str(profile_path))
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(30)
+
+        with open(str(profile_path.with_suffix('.txt')), 'w') as f:
+            f.write(summary.getvalue())
+
+
+class RunReport:
+    """Collects the profiles of all files of a run and exports them with totals per stage and per schema era
+
+    :param str job_name: Name of the job, e.g. 'count_rides_per_day'
+    """
+    def __init__(self, job_name):
+        self.job_name = job_name
+        self.start_time = time.time()
+        self.start = time.perf_counter()
+        self.file_profiles = []
+
+    def add(self, file_profile):
+        """Adds the profile of a file or byte range
+
+        :param FileProfile file_profile: Finished profile
+        """
+        self.file_profiles.append(file_profile)
+
+    def get_stage_totals(self, file_profiles):
+        """Sums up the measurements of each stage over files
+
+        :param list file_profiles: FileProfile objects
+        :return: Dictionary (key: stage name, value: dictionary of totals and rows per second)
+        """
+        totals = defaultdict(StageProfile)
+
+        for file_profile in file_profiles:
+            for name, stage in file_profile.stages.items():
+                total = totals[name]
+                total.seconds += stage.seconds
+                total.n_calls += stage.n_calls
+                total.count(rows_in=stage.rows_in, rows_out=stage.rows_out, bytes_read=stage.bytes_read)
+                total.peak_rss_mb = max(total.peak_rss_mb, stage.peak_rss_mb)
+
+        ordered_names = [name for name in STAGES if name in totals] + sorted(set(totals) - set(STAGES))
+
+        return {name: dict(totals[name].to_dict(),
+                           rows_per_second=max(totals[name].rows_in, totals[name].rows_out) / totals[name].seconds
+                           if totals[name].seconds > 0 else None)
+                for name in ordered_names}
+
+    def get_eras(self):
+        """Groups the profiles by schema era: taxi type and location representation of the file
+
+        :return: Dictionary (key: era name, value: list of FileProfile)
+        """
+        eras = defaultdict(list)
+
+        for file_profile in self.file_profiles:
+            schema = data_loader.get_schema(file_name=file_profile.file_name)
+            eras[f'{schema.taxi_type}/{schema.location_representation}'].append(file_profile)
+
+        return eras
+
+    def to_dict(self):
+        return {'job_name': self.job_name,
+                'start_time': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.start_time)),
+                'seconds': time.perf_counter() - self.start,
+                'n_cores': Config.N_CORES,
+                'stages': self.get_stage_totals(file_profiles=self.file_profiles),
+                'eras': {era: {'n_files': len({file_profile.file_name for file_profile in file_profiles}),
+                               'seconds': sum(file_profile.seconds for file_profile in file_profiles),
+                               'stages': self.get_stage_totals(file_profiles=file_profiles)}
+                         for era, file_profiles in sorted(self.get_eras().items())},
+                'files': [file_profile.to_dict() for file_profile in self.file_profiles]}
+
+    def get_path(self):
+        """Path of the run report of the job
+
+        :return: Path of JSON file
+        """
+        return Config.PATH_DIR_RESULTS / f'run_report_{self.job_name}.json'
+
+    def save(self):
+        """Writes the run report to Config.PATH_DIR_RESULTS and logs the totals per stage
+
+        :return: Path of the run report
+        """
+        report = self.to_dict()
+
+        for name, stage in report['stages'].items():
+            logging.info(f'Stage {name}: {stage["seconds"]:.1f} s (summed over processes), {stage["rows_in"]} rows '
+                         f'in, {stage["rows_out"]} rows out, {stage["bytes_read"] / 1024 ** 2:.0f} MB read, '
+                         f'peak RSS {stage["peak_rss_mb"]:.0f} MB')
+
+        if not Config.PATH_DIR_RESULTS.exists():
+            Config.PATH_DIR_RESULTS.mkdir(parents=True)
+
+        report_path = self.get_path()
+
+        with open(str(report_path), 'w') as f:
+            json.dump(report, f, indent=2)
+
+        logging.info(f'Run report written to: {report_path}')
+
+        return report_path
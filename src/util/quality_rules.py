@@ -0,0 +1,391 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.config.config import Config
+from src.util import data_loader
+from src.util.day_counter import INVALID_DAY, days_from_civil, get_day_numbers
+
+INVALID_TIMESTAMP = INVALID_DAY  # timestamp of missing or invalid datetimes
+TIME_DIGIT_POSITIONS = [11, 12, 14, 15, 17, 18]  # 'HH:MM:SS' after the date in both supported datetime formats
+
+
+def get_timestamps(values):
+    """Seconds since 1970-01-01 of datetimes. For strings the date is parsed like for the daily counts, the time of day
+    from the digits after it ('HH:MM:SS' or 'HH:MM').
+
+    :param numpy.ndarray values: Datetimes (datetime64) or datetime strings (str or bytes)
+    :return: Array of timestamps (int64), INVALID_TIMESTAMP for missing or invalid values
+    """
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[s]').astype(np.int64)  # NaT stays INVALID_TIMESTAMP
+
+    day_numbers = get_day_numbers(values=values)
+    chars = np.asarray(values).astype('S19').view(np.uint8).reshape(-1, 19)
+    digits = chars[:, TIME_DIGIT_POSITIONS].astype(np.int64) - ord('0')
+    is_digit = (digits >= 0) & (digits <= 9)
+    digits = np.where(is_digit, digits, 0)
+
+    seconds = (digits[:, 0] * 10 + digits[:, 1]) * 3600 + (digits[:, 2] * 10 + digits[:, 3]) * 60 \
+        + np.where(is_digit[:, 4:].all(axis=1), digits[:, 4] * 10 + digits[:, 5], 0)
+    is_valid = (day_numbers != INVALID_DAY) & is_digit[:, :4].all(axis=1)
+
+    return np.where(is_valid, day_numbers * 86400 + seconds, INVALID_TIMESTAMP)
+
+
+def get_numbers(chunk, colname):
+    """Numeric values of a column, values which are no numbers become NaN
+
+    :param pandas.DataFrame chunk: Taxi data
+    :param str colname: Column name
+    :return: Array of float64
+    """
+    return pd.to_numeric(chunk[colname], errors='coerce').values.astype(np.float64)
+
+
+class Rule:
+    """Base class of data-quality rules. A rule checks all rows of a chunk at once and rejects rows with values which
+    are present, but implausible. Missing or unparseable values are not rejected, they are reported by the analyses.
+
+    :param str name: Name of the rule, used for the rejection counters
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def get_columns(self, location_datetime_colnames, schema):
+        """Columns the rule needs
+
+        :param LocationTimeColNames location_datetime_colnames: Location and datetime column names of the chunks
+        :param FileSchema schema: Schema of the file
+        :return: List of column names, empty if the rule does not apply to the file
+        """
+        raise NotImplementedError
+
+    def get_rejected(self, chunk, location_datetime_colnames, schema):
+        """Checks the rows of a chunk
+
+        :param pandas.DataFrame chunk: Taxi data
+        :param LocationTimeColNames location_datetime_colnames: Location and datetime column names of the chunks
+        :param FileSchema schema: Schema of the file
+        :return: Mask of the rejected rows
+        """
+        raise NotImplementedError
+
+
+class DateWindowRule(Rule):
+    """Rejects rides with a pickup date outside of the month of the file
+
+    :param str name: Name of the rule
+    :param int days_before: Days before the first day of the month which are accepted
+    :param int days_after: Days after the last day of the month which are accepted
+    """
+    def __init__(self, name, days_before=0, days_after=0):
+        super().__init__(name=name)
+        self.days_before = days_before
+        self.days_after = days_after
+
+    def get_columns(self, location_datetime_colnames, schema):
+        return [location_datetime_colnames.pickup_datetime_colname] \
+            if location_datetime_colnames.pickup_datetime_colname != 'nan' else []
+
+    def get_rejected(self, chunk, location_datetime_colnames, schema):
+        day_numbers = get_day_numbers(values=chunk[location_datetime_colnames.pickup_datetime_colname].values)
+
+        return self.get_rejected_days(day_numbers=day_numbers, schema=schema)
+
+    def get_rejected_days(self, day_numbers, schema):
+        """Checks pickup dates which are already converted to day numbers, e.g. by the scanner of date_scanner.py
+
+        :param numpy.ndarray day_numbers: Day numbers of the pickup dates, INVALID_DAY for invalid dates
+        :param FileSchema schema: Schema of the file
+        :return: Mask of the rejected rows
+        """
+        first_day = days_from_civil(year=schema.year, month=schema.month, day=1)
+        next_first_day = days_from_civil(year=schema.year + schema.month // 12, month=schema.month % 12 + 1, day=1)
+
+        return (day_numbers != INVALID_DAY) & ((day_numbers < first_day - self.days_before)
+                                               | (day_numbers >= next_first_day + self.days_after))
+
+
+class BoundingBoxRule(Rule):
+    """Rejects rides with pickup or dropoff coordinates outside of a bounding box, e.g. (0, 0)
+
+    :param str name: Name of the rule
+    :param str location: 'pickup' or 'dropoff'
+    :param float min_lat: Minimum latitude
+    :param float max_lat: Maximum latitude
+    :param float min_lon: Minimum longitude
+    :param float max_lon: Maximum longitude
+    """
+    def __init__(self, name, location, min_lat, max_lat, min_lon, max_lon):
+        super().__init__(name=name)
+
+        if location not in ['pickup', 'dropoff']:
+            raise ValueError(f'Unknown location of rule {name}: {location} (locations: pickup, dropoff)')
+
+        self.location = location
+        self.min_lat, self.max_lat = min_lat, max_lat
+        self.min_lon, self.max_lon = min_lon, max_lon
+
+    def get_colnames(self, location_datetime_colnames):
+        return (getattr(location_datetime_colnames, f'{self.location}_lat_colname'),
+                getattr(location_datetime_colnames, f'{self.location}_lon_colname'))
+
+    def get_columns(self, location_datetime_colnames, schema):
+        return [colname for colname in self.get_colnames(location_datetime_colnames=location_datetime_colnames)
+                if colname != 'nan']
+
+    def get_rejected(self, chunk, location_datetime_colnames, schema):
+        lat_colname, lon_colname = self.get_colnames(location_datetime_colnames=location_datetime_colnames)
+        lat, lon = get_numbers(chunk=chunk, colname=lat_colname), get_numbers(chunk=chunk, colname=lon_colname)
+        is_inside = (lat >= self.min_lat) & (lat <= self.max_lat) & (lon >= self.min_lon) & (lon <= self.max_lon)
+
+        return ~is_inside & ~np.isnan(lat) & ~np.isnan(lon)
+
+
+class NonNegativeDurationRule(Rule):
+    """Rejects rides with a dropoff before the pickup
+
+    :param str name: Name of the rule
+    """
+    def get_columns(self, location_datetime_colnames, schema):
+        colnames = [location_datetime_colnames.pickup_datetime_colname,
+                    location_datetime_colnames.dropoff_datetime_colname]
+
+        return colnames if 'nan' not in colnames else []
+
+    def get_rejected(self, chunk, location_datetime_colnames, schema):
+        pickup_timestamps = get_timestamps(values=chunk[location_datetime_colnames.pickup_datetime_colname].values)
+        dropoff_timestamps = get_timestamps(values=chunk[location_datetime_colnames.dropoff_datetime_colname].values)
+
+        return (pickup_timestamps != INVALID_TIMESTAMP) & (dropoff_timestamps != INVALID_TIMESTAMP) \
+            & (dropoff_timestamps < pickup_timestamps)
+
+
+class NonNegativeFareRule(Rule):
+    """Rejects rides with a negative fare amount
+
+    :param str name: Name of the rule
+    """
+    def get_columns(self, location_datetime_colnames, schema):
+        return [schema.fare_amount_colname] if schema.fare_amount_colname != 'nan' else []
+
+    def get_rejected(self, chunk, location_datetime_colnames, schema):
+        return get_numbers(chunk=chunk, colname=schema.fare_amount_colname) < 0
+
+
+class LocationIdRangeRule(Rule):
+    """Rejects rides with a pickup or dropoff location ID outside of the taxi zones
+
+    :param str name: Name of the rule
+    :param int min_location_id: Smallest valid location ID
+    :param int max_location_id: Largest valid location ID
+    """
+    def __init__(self, name, min_location_id, max_location_id):
+        super().__init__(name=name)
+        self.min_location_id = min_location_id
+        self.max_location_id = max_location_id
+
+    def get_columns(self, location_datetime_colnames, schema):
+        return [colname for colname in [location_datetime_colnames.pickup_location_id_colname,
+                                        location_datetime_colnames.dropoff_location_id_colname]
+                if colname != 'nan']
+
+    def get_rejected(self, chunk, location_datetime_colnames, schema):
+        is_rejected = np.zeros(chunk.shape[0], dtype=bool)
+
+        for colname in self.get_columns(location_datetime_colnames=location_datetime_colnames, schema=schema):
+            location_ids = get_numbers(chunk=chunk, colname=colname)
+            is_rejected |= (location_ids < self.min_location_id) | (location_ids > self.max_location_id)
+
+        return is_rejected
+
+
+RULE_TYPES = {'date_window': DateWindowRule,
+              'bounding_box': BoundingBoxRule,
+              'non_negative_duration': NonNegativeDurationRule,
+              'non_negative_fare': NonNegativeFareRule,
+              'location_id_range': LocationIdRangeRule}
+
+
+def load_rules():
+    """Creates the rules configured in Config.QUALITY_RULES
+
+    :return: List of Rule
+    """
+    rules = []
+
+    for name, (rule_type, params) in Config.QUALITY_RULES.items():
+        if rule_type not in RULE_TYPES:
+            raise ValueError(f'Unknown type of rule {name}: {rule_type} (types: {", ".join(RULE_TYPES)})')
+
+        rules.append(RULE_TYPES[rule_type](name=name, **params))
+
+    return rules
+
+
+class RejectionCounter:
+    """Accumulates the numbers of rows checked and rejected by the data-quality rules. A row rejected by several rules
+    is counted once per rule, but only once in n_rejected.
+    """
+    def __init__(self):
+        self.n_rows = 0
+        self.n_rejected = 0
+        self.n_rejected_by_rule = {name: 0 for name in Config.QUALITY_RULES}
+
+    def add(self, n_rows, n_rejected, n_rejected_by_rule):
+        """Adds the numbers of a chunk
+
+        :param int n_rows: Number of checked rows
+        :param int n_rejected: Number of rows rejected by any rule
+        :param dict n_rejected_by_rule: Number of rejected rows per rule name
+        """
+        self.n_rows += n_rows
+        self.n_rejected += n_rejected
+
+        for name, n_rule_rejected in n_rejected_by_rule.items():
+            self.n_rejected_by_rule[name] = self.n_rejected_by_rule.get(name, 0) + n_rule_rejected
+
+    def merge(self, other):
+        """Adds the numbers of another counter, e.g. of another byte range of the same file
+
+        :param RejectionCounter other: Counter to be added
+        """
+        self.add(n_rows=other.n_rows, n_rejected=other.n_rejected, n_rejected_by_rule=other.n_rejected_by_rule)
+
+    def to_dict(self):
+        return {'n_rows': self.n_rows, 'n_rejected': self.n_rejected, **self.n_rejected_by_rule}
+
+    @classmethod
+    def from_dict(cls, numbers):
+        """Creates a counter from the numbers of to_dict
+
+        :param dict numbers: Numbers as returned by to_dict
+        :return: RejectionCounter
+        """
+        numbers = dict(numbers)
+        counter = cls()
+        counter.add(n_rows=numbers.pop('n_rows'), n_rejected=numbers.pop('n_rejected'), n_rejected_by_rule=numbers)
+
+        return counter
+
+    def save(self, file_path):
+        """Saves the numbers to a JSON file
+
+        :param pathlib.Path file_path: Path of the file
+        """
+        if not file_path.parent.exists():
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(str(file_path), 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, file_path):
+        """Loads numbers saved with save
+
+        :param pathlib.Path file_path: Path of the file
+        :return: RejectionCounter
+        """
+        with open(str(file_path), 'r') as f:
+            return cls.from_dict(numbers=json.load(f))
+
+
+class QualityFilter:
+    """Evaluates the data-quality rules on the chunks of one file. Every rule yields a mask over all rows of a chunk, so
+    the rules cost a few vectorized comparisons per chunk and run before any geo work.
+
+    :param str file_name: Name of the raw taxi data file
+    :param LocationTimeColNames location_datetime_colnames: Location and datetime column names of the chunks
+    :param RejectionCounter counter: Counter of the rejected rows. If None, a new counter is used.
+    :param list rules: Rules to be evaluated. If None, the rules in Config.QUALITY_RULES are used.
+    """
+    def __init__(self, file_name, location_datetime_colnames, counter=None, rules=None):
+        self.schema = data_loader.get_schema(file_name=file_name)
+        self.location_datetime_colnames = location_datetime_colnames
+        self.counter = counter if counter is not None else RejectionCounter()
+        self.rules = [rule for rule in (load_rules() if rules is None else rules)
+                      if rule.get_columns(location_datetime_colnames=location_datetime_colnames, schema=self.schema)]
+
+    def get_columns(self):
+        """Columns the rules need
+
+        :return: List of column names
+        """
+        columns = []
+
+        for rule in self.rules:
+            columns += [colname for colname in rule.get_columns(
+                location_datetime_colnames=self.location_datetime_colnames, schema=self.schema)
+                        if colname not in columns]
+
+        return columns
+
+    def apply(self, chunk):
+        """Removes the rows of a chunk which are rejected by any rule
+
+        :param pandas.DataFrame chunk: Taxi data
+        :return: Accepted rows, with the index of the chunk
+        """
+        is_rejected = np.zeros(chunk.shape[0], dtype=bool)
+        n_rejected_by_rule = {}
+
+        for rule in self.rules:
+            is_rule_rejected = rule.get_rejected(chunk=chunk,
+                                                 location_datetime_colnames=self.location_datetime_colnames,
+                                                 schema=self.schema)
+            n_rejected_by_rule[rule.name] = int(is_rule_rejected.sum())
+            is_rejected |= is_rule_rejected
+
+        n_rejected = int(is_rejected.sum())
+        self.counter.add(n_rows=chunk.shape[0], n_rejected=n_rejected, n_rejected_by_rule=n_rejected_by_rule)
+
+        return chunk[~is_rejected] if n_rejected > 0 else chunk
+
+
+def get_extra_columns(file_name):
+    """Columns besides the location and datetime columns which the rules need for a file, e.g. the fare amount. They
+    have the same names in the raw file and in the Parquet cache.
+
+    :param str file_name: Name of the raw taxi data file
+    :return: List of column names
+    """
+    location_datetime_colnames = data_loader.get_location_datetime_columns(file_name=file_name)
+    quality_filter = QualityFilter(file_name=file_name, location_datetime_colnames=location_datetime_colnames)
+
+    return [colname for colname in quality_filter.get_columns()
+            if colname not in vars(location_datetime_colnames).values()]
+
+
+def get_rejections_path(job_name, file_name):
+    """Path of the rejection counters of a single file
+
+    :param str job_name: Name of the job which evaluated the rules
+    :param str file_name: Name of the raw taxi data file
+    :return: Path of JSON file
+    """
+    return Config.PATH_DIR_RESULTS / 'quality_rejections_per_file' / job_name / f'{file_name}.json'
+
+
+def write_rejections(job_name, file_names):
+    """Writes the rejection counters of all files of a job to Config.PATH_DIR_RESULTS, one row per file. Files without
+    counters are left out.
+
+    :param str job_name: Name of the job which evaluated the rules
+    :param list file_names: Names of the raw taxi data files
+    :return: Path of CSV file
+    """
+    rejections = {file_name: RejectionCounter.load(file_path=get_rejections_path(job_name=job_name,
+                                                                                  file_name=file_name)).to_dict()
+                  for file_name in file_names if get_rejections_path(job_name=job_name, file_name=file_name).exists()}
+    output_path = Config.PATH_DIR_RESULTS / f'quality_rejections_{job_name}.csv'
+
+    if not Config.PATH_DIR_RESULTS.exists():
+        Config.PATH_DIR_RESULTS.mkdir(parents=True)
+
+    pd.DataFrame.from_dict(rejections, orient='index', columns=list(RejectionCounter().to_dict())) \
+        .rename_axis('file_name') \
+        .to_csv(output_path)
+
+    return output_path
@@ -0,0 +1,417 @@
+import datetime
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.config.config import Config
+from src.util import filtered_rides, quality_rules, zone_index
+from src.util.day_counter import INVALID_DAY, DayCounter, get_day_numbers
+
+DIMENSIONS = ['date', 'hour', 'pickup_location_id', 'dropoff_location_id', 'taxi_type']
+DERIVED_DIMENSIONS = {'pickup_borough': 'pickup_location_id', 'dropoff_borough': 'dropoff_location_id'}
+SUMS = ['fare_amount', 'trip_distance']  # optional measures besides the number of rides, see Config.ROLLUP_CUBE_SUMS
+MEASURES = ['n_rides'] + SUMS
+
+DAY_OFFSET = 2 ** 18  # shifts all day numbers of datetime64[ns] values (about +/-106752 days) to positive values
+N_HOURS = 25  # hours 0-23 and an invalid hour
+N_CELLS_PER_DAY = N_HOURS * zone_index.N_LOCATION_IDS * zone_index.N_LOCATION_IDS
+
+SCHEMA = pa.schema([('date', pa.date32()),
+                    ('hour', pa.int8()),
+                    ('pickup_location_id', pa.int16()),
+                    ('dropoff_location_id', pa.int16()),
+                    ('taxi_type', pa.dictionary(pa.int32(), pa.string())),
+                    ('n_rides', pa.int64()),
+                    ('fare_amount', pa.float64()),
+                    ('trip_distance', pa.float64())])
+ROW_GROUP_SIZE = 1000000
+REJECTIONS_KEY = 'rejections'  # numbers of the data-quality rules in the saved cube of a file, as JSON
+
+
+def get_borough_codes():
+    """Borough of every location ID, location IDs without a borough are 'Unknown'
+
+    :return: Tuple of borough index per location ID and borough names
+    """
+    taxi_zones = Config.TAXI_ZONES
+    boroughs = np.full(zone_index.N_LOCATION_IDS, 'Unknown', dtype=object)
+    boroughs[taxi_zones['LocationID'].values] = taxi_zones['Borough'].fillna('Unknown').values
+    names, codes = np.unique(boroughs.astype(str), return_inverse=True)
+
+    return codes, names
+
+
+def combine_masks(mask, other):
+    """Combines two masks with 'and'
+
+    :param numpy.ndarray mask: Boolean mask, None selects everything
+    :param numpy.ndarray other: Boolean mask
+    :return: Boolean mask
+    """
+    return other if mask is None else mask & other
+
+
+class RollupCube:
+    """Numbers of rides, and sums of fares and trip distances, by pickup date x pickup hour x pickup zone x dropoff zone
+    x taxi type. Only cells with rides are stored, as one dense array per dimension and measure, since the full cube
+    would have billions of mostly empty cells. Aggregates over any of the dimensions are a single bincount over the
+    cells, which takes milliseconds for a month and well under a second for millions of cells.
+
+    Rides without valid pickup date have date NaT, rides without valid pickup hour have hour -1. Both are dropped if
+    their dimension is grouped by. Unknown zones have location ID zone_index.UNKNOWN_LOCATION_ID. Rides rejected by
+    the data-quality rules are not in the cells, the cube of a file keeps their numbers in rejection_counter.
+
+    :param dict cells: Arrays of the cells (key: dimension or measure, value: numpy.ndarray)
+    :param RejectionCounter rejection_counter: Rows rejected by the data-quality rules. None if unknown, e.g. for the
+    cube of several files.
+    """
+    def __init__(self, cells, rejection_counter=None):
+        self.cells = cells
+        self.rejection_counter = rejection_counter
+        self.codes = {}  # group codes and labels per dimension, computed on first use
+
+    @property
+    def size(self):
+        return self.cells['n_rides'].size
+
+    def get_codes(self, dimension):
+        """Group codes of the cells for a dimension
+
+        :param str dimension: One of DIMENSIONS or DERIVED_DIMENSIONS
+        :return: Tuple of codes (int64, number of labels for invalid values) and group labels
+        """
+        if dimension in self.codes:
+            return self.codes[dimension]
+
+        if dimension == 'date':
+            day_numbers = self.cells['date'].astype(np.int64)
+            is_valid = day_numbers != INVALID_DAY
+            first_day = int(day_numbers[is_valid].min()) if is_valid.any() else 0
+            last_day = int(day_numbers[is_valid].max()) if is_valid.any() else -1
+            labels = np.arange(first_day, last_day + 1).astype('datetime64[D]')
+            codes = np.where(is_valid, day_numbers - first_day, labels.size)
+        elif dimension == 'hour':
+            codes, labels = np.where(self.cells['hour'] >= 0, self.cells['hour'], 24).astype(np.int64), np.arange(24)
+        elif dimension == 'taxi_type':
+            codes, labels = self.cells['taxi_type'].astype(np.int64), np.array(filtered_rides.TAXI_TYPES)
+        elif dimension in DERIVED_DIMENSIONS:
+            borough_codes, labels = get_borough_codes()
+            codes = borough_codes[self.cells[DERIVED_DIMENSIONS[dimension]]]
+        elif dimension in DIMENSIONS:
+            codes, labels = self.cells[dimension].astype(np.int64), np.arange(zone_index.N_LOCATION_IDS)
+        else:
+            raise ValueError(f'Unknown dimension: {dimension} '
+                             f'(dimensions: {", ".join(DIMENSIONS + list(DERIVED_DIMENSIONS))})')
+
+        self.codes[dimension] = codes, labels
+
+        return codes, labels
+
+    def get_mask(self, min_date=None, max_date=None, dates=None, hours=None, pickup_location_ids=None,
+                 dropoff_location_ids=None, taxi_types=None, pickup_boroughs=None, dropoff_boroughs=None):
+        """Selects cells. All filters are combined with 'and', filters which are None select all cells.
+
+        :param str min_date: First pickup date ('YYYY-mm-dd', inclusive)
+        :param str max_date: Last pickup date ('YYYY-mm-dd', inclusive)
+        :param list dates: Pickup dates ('YYYY-mm-dd'), e.g. rainy days
+        :param list hours: Pickup hours (0-23)
+        :param list pickup_location_ids: Pickup location IDs
+        :param list dropoff_location_ids: Dropoff location IDs
+        :param list taxi_types: Taxi types, e.g. ['yellow', 'green']
+        :param list pickup_boroughs: Pickup boroughs, e.g. ['Manhattan']
+        :param list dropoff_boroughs: Dropoff boroughs
+        :return: Boolean mask of the cells, None if there are no filters
+        """
+        mask = None
+        date = self.cells['date']
+
+        if min_date is not None:
+            mask = combine_masks(mask, date >= np.datetime64(min_date, 'D'))
+        if max_date is not None:
+            mask = combine_masks(mask, date <= np.datetime64(max_date, 'D'))
+        if dates is not None:
+            mask = combine_masks(mask, np.isin(date, np.array(dates, dtype='datetime64[D]')))
+
+        for dimension, values in [('hour', hours), ('pickup_location_id', pickup_location_ids),
+                                  ('dropoff_location_id', dropoff_location_ids), ('taxi_type', taxi_types),
+                                  ('pickup_borough', pickup_boroughs), ('dropoff_borough', dropoff_boroughs)]:
+            if values is not None:
+                codes, labels = self.get_codes(dimension=dimension)
+                mask = combine_masks(mask, np.isin(codes, np.flatnonzero(np.isin(labels, values))))
+
+        return mask
+
+    def query(self, group_by=(), measures=('n_rides',), **filters):
+        """Aggregates the measures of the selected cells by the given dimensions
+
+        :param list group_by: Dimensions of the result, from DIMENSIONS or DERIVED_DIMENSIONS
+        :param list measures: Measures to be summed up, from MEASURES
+        :param filters: Filters of the cells, see get_mask
+        :return: Data frame with the group_by dimensions as index and a column per measure (groups without rides are
+        omitted)
+        """
+        unknown_measures = set(measures) - set(MEASURES)
+
+        if unknown_measures:
+            raise ValueError(f'Unknown measures: {", ".join(sorted(unknown_measures))} '
+                             f'(measures: {", ".join(MEASURES)})')
+
+        flat_codes = np.zeros(self.size, dtype=np.int64)
+        group_labels = []
+
+        for dimension in group_by:
+            codes, labels = self.get_codes(dimension=dimension)
+            flat_codes = flat_codes * (labels.size + 1) + codes
+            group_labels.append(labels)
+
+        shape = tuple(labels.size + 1 for labels in group_labels)  # last group of each dimension: invalid values
+        n_groups = int(np.prod(shape))
+        mask = self.get_mask(**filters)
+        weights = {measure: self.cells[measure] for measure in measures}
+
+        if mask is not None:
+            flat_codes = flat_codes[mask]
+            weights = {measure: values[mask] for measure, values in weights.items()}
+
+        if n_groups > max(4 * flat_codes.size, 1024):  # sparse result, e.g. date x pickup zone x dropoff zone
+            groups, flat_codes = np.unique(flat_codes, return_inverse=True)
+        else:
+            groups = np.arange(n_groups)
+
+        sums = {measure: np.bincount(flat_codes, weights=values, minlength=groups.size)
+                for measure, values in weights.items()}
+        n_rides = sums['n_rides'] if 'n_rides' in sums else np.bincount(flat_codes, minlength=groups.size)
+        indices = np.unravel_index(groups, shape) if group_by else ()
+        is_selected = n_rides > 0
+
+        for labels, idx in zip(group_labels, indices):
+            is_selected &= idx < labels.size  # groups of rides without valid date or hour are dropped
+
+        result = pd.DataFrame({measure: sums[measure][is_selected] for measure in measures})
+
+        if 'n_rides' in measures:
+            result['n_rides'] = result['n_rides'].astype(np.int64)
+
+        if group_by:
+            index_values = [labels[idx[is_selected]] for labels, idx in zip(group_labels, indices)]
+            result.index = pd.MultiIndex.from_arrays(index_values, names=list(group_by)) if len(group_by) > 1 \
+                else pd.Index(index_values[0], name=group_by[0])
+
+        return result
+
+    def to_day_counter(self):
+        """Reduces the cube to the numbers of rides per day, as counted by count_rides_per_day.py
+
+        :return: DayCounter
+        """
+        day_numbers = self.cells['date'].astype(np.int64)
+        is_valid = day_numbers != INVALID_DAY
+        day_counter = DayCounter()
+        day_counter.add_day_numbers(day_numbers=day_numbers[is_valid], counts=self.cells['n_rides'][is_valid])
+        day_counter.n_invalid = int(self.cells['n_rides'][~is_valid].sum())
+
+        return day_counter
+
+    def save(self, file_path):
+        """Saves the cells and the rejection counts, e.g. as partial result of one file
+
+        :param pathlib.Path file_path: Path of .npz file
+        """
+        rejections = {} if self.rejection_counter is None \
+            else {REJECTIONS_KEY: np.array(json.dumps(self.rejection_counter.to_dict()))}
+
+        with open(str(file_path), 'wb') as f:
+            np.savez(f, **self.cells, **rejections)
+
+    @classmethod
+    def load(cls, file_path):
+        """Loads cells saved with RollupCube.save
+
+        :param pathlib.Path file_path: Path of .npz file
+        :return: RollupCube
+        """
+        with np.load(str(file_path)) as data:
+            rejection_counter = None
+
+            if REJECTIONS_KEY in data.files:
+                rejection_counter = quality_rules.RejectionCounter.from_dict(
+                    numbers=json.loads(str(data[REJECTIONS_KEY])))
+
+            return cls(cells={name: data[name] for name in DIMENSIONS + MEASURES}, rejection_counter=rejection_counter)
+
+    def to_table(self):
+        """Converts the cells to an Arrow table with SCHEMA
+
+        :return: pyarrow.Table
+        """
+        arrays = [pa.array(self.cells['date'], type=pa.date32(), from_pandas=True)]
+        arrays += [pa.array(self.cells[name], type=SCHEMA.field(name).type)
+                   for name in ['hour', 'pickup_location_id', 'dropoff_location_id']]
+        arrays.append(pa.DictionaryArray.from_arrays(self.cells['taxi_type'].astype(np.int32),
+                                                     filtered_rides.TAXI_TYPES))
+        arrays += [pa.array(self.cells[name], type=SCHEMA.field(name).type) for name in MEASURES]
+
+        return pa.Table.from_arrays(arrays, schema=SCHEMA)
+
+    @classmethod
+    def from_table(cls, table):
+        """Converts an Arrow table with SCHEMA to a cube
+
+        :param pyarrow.Table table: Cells of a cube
+        :return: RollupCube
+        """
+        taxi_types = table.column('taxi_type').combine_chunks()
+        type_codes = np.array([filtered_rides.TAXI_TYPES.index(taxi_type)
+                               for taxi_type in taxi_types.dictionary.to_pylist()] or [0], dtype=np.int8)
+        cells = {'date': table.column('date').to_numpy().astype('datetime64[D]'),
+                 'taxi_type': type_codes[taxi_types.indices.to_numpy(zero_copy_only=False)]}
+        cells.update({name: table.column(name).to_numpy() for name in DIMENSIONS + MEASURES if name not in cells})
+
+        return cls(cells={name: cells[name] for name in DIMENSIONS + MEASURES})
+
+
+def concat(cubes):
+    """Concatenates the cells of several cubes, e.g. of all files
+
+    :param list cubes: RollupCube objects
+    :return: RollupCube
+    """
+    return RollupCube(cells={name: np.concatenate([cube.cells[name] for cube in cubes])
+                             for name in DIMENSIONS + MEASURES})
+
+
+class CubeBuilder:
+    """Accumulates the rides of one file into cells. Each chunk is reduced to its cells right away, finish reduces the
+    cells of all chunks.
+
+    :param str taxi_type: Taxi type of the file, one of filtered_rides.TAXI_TYPES
+    """
+    def __init__(self, taxi_type):
+        self.taxi_type = taxi_type
+        self.keys = []
+        self.sums = {measure: [] for measure in MEASURES}
+
+    @staticmethod
+    def reduce(keys, sums):
+        """Sums up the measures of equal cell keys
+
+        :param numpy.ndarray keys: Cell keys
+        :param dict sums: Values per measure
+        :return: Tuple of distinct keys and dictionary of their sums
+        """
+        distinct_keys, inverse = np.unique(keys, return_inverse=True)
+
+        return distinct_keys, {measure: np.bincount(inverse, weights=values, minlength=distinct_keys.size)
+                               for measure, values in sums.items()}
+
+    def add(self, day_numbers, hours, pickup_location_ids, dropoff_location_ids, sums=None):
+        """Adds rides
+
+        :param numpy.ndarray day_numbers: Pickup day numbers, see get_day_numbers
+        :param numpy.ndarray hours: Pickup hours, -1 for invalid values
+        :param numpy.ndarray pickup_location_ids: Pickup location IDs
+        :param numpy.ndarray dropoff_location_ids: Dropoff location IDs
+        :param dict sums: Values of the measures in SUMS which are known for the file (missing values count as 0)
+        """
+        day_idx = np.where(day_numbers == INVALID_DAY, 0, day_numbers + DAY_OFFSET)
+        keys = ((day_idx * N_HOURS + hours + 1) * zone_index.N_LOCATION_IDS + pickup_location_ids) \
+            * zone_index.N_LOCATION_IDS + dropoff_location_ids
+
+        values = {measure: np.nan_to_num(np.asarray((sums or {}).get(measure, np.zeros(keys.size)), dtype=np.float64))
+                  for measure in SUMS}
+        values['n_rides'] = np.ones(keys.size)
+        keys, values = self.reduce(keys=keys.astype(np.int64), sums=values)
+
+        self.keys.append(keys)
+
+        for measure in MEASURES:
+            self.sums[measure].append(values[measure])
+
+    def finish(self, rejection_counter=None):
+        """Reduces the cells of all chunks
+
+        :param RejectionCounter rejection_counter: Rows of the file rejected by the data-quality rules
+        :return: RollupCube of the file
+        """
+        keys, sums = self.reduce(keys=np.concatenate(self.keys or [np.zeros(0, dtype=np.int64)]),
+                                 sums={measure: np.concatenate(values or [np.zeros(0)])
+                                       for measure, values in self.sums.items()})
+
+        day_idx, cell = np.divmod(keys, N_CELLS_PER_DAY)
+        hour_idx, cell = np.divmod(cell, zone_index.N_LOCATION_IDS * zone_index.N_LOCATION_IDS)
+        pickup_location_ids, dropoff_location_ids = np.divmod(cell, zone_index.N_LOCATION_IDS)
+
+        cells = {'date': np.where(day_idx == 0, INVALID_DAY, day_idx - DAY_OFFSET).astype('datetime64[D]'),
+                 'hour': (hour_idx - 1).astype(np.int8),
+                 'pickup_location_id': pickup_location_ids.astype(np.int16),
+                 'dropoff_location_id': dropoff_location_ids.astype(np.int16),
+                 'taxi_type': np.full(keys.size, filtered_rides.TAXI_TYPES.index(self.taxi_type), dtype=np.int8),
+                 'n_rides': np.rint(sums['n_rides']).astype(np.int64)}
+        cells.update({measure: sums[measure] for measure in SUMS})
+
+        return RollupCube(cells=cells, rejection_counter=rejection_counter)
+
+
+def get_partial_result_path(file_name):
+    """Path of the cube of a single file
+
+    :param str file_name: Name of the raw taxi data file
+    :return: Path of .npz file
+    """
+    return Config.PATH_DIR_RESULTS / 'rollup_cube_per_file' / f'{file_name}.npz'
+
+
+def get_cube_path():
+    """Path of the cube of all files
+
+    :return: Path of Parquet file
+    """
+    return Config.PATH_DIR_RESULTS / 'rollup_cube.parquet'
+
+
+def write_cube(file_paths):
+    """Writes the cubes of several files into one Parquet file. The files are appended one at a time, each file's cells
+    sorted by date, so date filters can skip row groups by their statistics.
+
+    :param list file_paths: Paths of the cubes of the files (.npz)
+    :return: Path of the Parquet file
+    """
+    cube_path = get_cube_path()
+    tmp_path = cube_path.parent / (cube_path.name + '.tmp')
+
+    if not cube_path.parent.exists():
+        cube_path.parent.mkdir(parents=True)
+
+    with pq.ParquetWriter(str(tmp_path), SCHEMA) as writer:
+        for file_path in file_paths:
+            table = RollupCube.load(file_path=file_path).to_table()
+            writer.write_table(table.sort_by([('date', 'ascending'), ('hour', 'ascending')]),
+                               row_group_size=ROW_GROUP_SIZE)
+
+    tmp_path.replace(cube_path)
+
+    return cube_path
+
+
+def load_cube(min_date=None, max_date=None, taxi_types=None):
+    """Loads the cube of all files, optionally only some dates and taxi types. Row groups outside of the date range are
+    skipped.
+
+    :param str min_date: First pickup date ('YYYY-mm-dd', inclusive). If None, there is no lower limit.
+    :param str max_date: Last pickup date ('YYYY-mm-dd', inclusive). If None, there is no upper limit.
+    :param list taxi_types: Taxi types. If None, all taxi types are loaded.
+    :return: RollupCube
+    """
+    filters = []
+
+    if min_date is not None:
+        filters.append(('date', '>=', datetime.date.fromisoformat(min_date)))
+    if max_date is not None:
+        filters.append(('date', '<=', datetime.date.fromisoformat(max_date)))
+    if taxi_types is not None:
+        filters.append(('taxi_type', 'in', list(taxi_types)))
+
+    return RollupCube.from_table(pq.read_table(str(get_cube_path()), filters=filters or None))
@@ -0,0 +1,93 @@
+import numpy as np
+
+from src.config.config import Config
+from src.util.zone_index import N_LOCATION_IDS
+
+
+def resolve_location_ids(zones):
+    """Maps boroughs, zone names and location IDs to the location IDs they cover
+
+    :param list zones: Borough names (e.g. 'Manhattan'), zone names (e.g. 'JFK Airport') or location IDs
+    :return: Sorted array of location IDs
+    """
+    taxi_zones = Config.TAXI_ZONES
+    location_ids = set()
+
+    for zone in zones:
+        if isinstance(zone, (int, np.integer)):
+            is_selected = taxi_zones['LocationID'] == zone
+        else:
+            is_selected = (taxi_zones['Borough'] == zone) | (taxi_zones['Zone'] == zone)
+
+        if not is_selected.any():
+            raise ValueError(f'Unknown borough, zone or location ID: {zone}')
+
+        location_ids.update(taxi_zones['LocationID'][is_selected].values)
+
+    return np.array(sorted(location_ids), dtype=np.int64)
+
+
+class Route:
+    """Rides from any of the origin zones to any of the destination zones
+
+    :param str name: Name of the route, used for the output paths
+    :param list origins: Origin boroughs, zone names or location IDs
+    :param list destinations: Destination boroughs, zone names or location IDs
+    """
+    def __init__(self, name, origins, destinations):
+        self.name = name
+        self.origin_location_ids = resolve_location_ids(zones=origins)
+        self.destination_location_ids = resolve_location_ids(zones=destinations)
+
+
+def load_routes():
+    """Creates the routes configured in Config.ROUTES
+
+    :return: List of Route
+    """
+    return [Route(name=name, origins=origins, destinations=destinations)
+            for name, (origins, destinations) in Config.ROUTES.items()]
+
+
+class RouteFilter:
+    """Filters rides for any number of routes at once. For every route a boolean lookup table over all pairs of pickup
+    and dropoff location IDs is precomputed, so all routes are evaluated by indexing the tables with the location ID
+    pairs of a chunk instead of testing each route separately.
+
+    :param list routes: Routes to be filtered
+    """
+    def __init__(self, routes):
+        self.routes = list(routes)
+        self.pair_masks = np.zeros((len(self.routes), N_LOCATION_IDS, N_LOCATION_IDS), dtype=bool)
+
+        for route_idx, route in enumerate(self.routes):
+            self.pair_masks[route_idx][np.ix_(route.origin_location_ids, route.destination_location_ids)] = True
+
+        self.pair_masks = self.pair_masks.reshape(len(self.routes), -1)
+        self.is_any_route = self.pair_masks.any(axis=0)
+
+    def get_route_masks(self, pickup_location_ids, dropoff_location_ids):
+        """Checks which rides belong to which route. Only rides on at least one route are looked up per route.
+
+        :param numpy.ndarray pickup_location_ids: Pickup location IDs in [0, N_LOCATION_IDS)
+        :param numpy.ndarray dropoff_location_ids: Dropoff location IDs in [0, N_LOCATION_IDS)
+        :return: Tuple of row positions of the rides on any route and their route masks (routes x rows)
+        """
+        pairs = pickup_location_ids * N_LOCATION_IDS + dropoff_location_ids
+        rows = np.flatnonzero(self.is_any_route[pairs])
+
+        return rows, self.pair_masks[:, pairs[rows]]
+
+    def split_by_route(self, taxi_data, pickup_location_ids, dropoff_location_ids):
+        """Filters taxi data for all routes
+
+        :param pandas.DataFrame taxi_data: Taxi data
+        :param numpy.ndarray pickup_location_ids: Pickup location ID per ride
+        :param numpy.ndarray dropoff_location_ids: Dropoff location ID per ride
+        :return: Dictionary (key: route name, value: rides on the route)
+        """
+        rows, route_masks = self.get_route_masks(pickup_location_ids=pickup_location_ids,
+                                                 dropoff_location_ids=dropoff_location_ids)
+        taxi_data_on_any_route = taxi_data.iloc[rows]
+
+        return {route.name: taxi_data_on_any_route[route_mask] for route, route_mask in zip(self.routes, route_masks)}
@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+import shapely.vectorized
+from shapely.geometry import box
+from shapely.prepared import prep
+
+from src.util import data_loader, geometry_cache
+from src.util.data_loader import LocationTimeColNames
+
+UNKNOWN_LOCATION_ID = 0
+N_LOCATION_IDS = 266  # Location IDs in taxi_zone_lookup.csv are 1-265, together with UNKNOWN_LOCATION_ID 0-265
+
+
+class ZoneIndex:
+    """Regular grid index over all taxi zones which maps latitude/longitude coordinates to taxi zone location IDs.
+
+    Every grid cell either lies fully inside one zone, in which case all points in the cell get that zone's location ID
+    without any geometry test, or it is crossed by the borders of a few candidate zones. Only points in such border
+    cells are tested against the (few) candidate polygons.
+
+    :param list location_ids: Location ID per polygon (IDs may repeat if a zone consists of several polygons)
+    :param list polygons: Zone polygons in latitude/longitude coordinates
+    :param int grid_size: Number of grid cells per axis
+    """
+    def __init__(self, location_ids, polygons, grid_size=256):
+        self.location_ids = np.asarray(location_ids, dtype=np.int16)
+        self.polygons = list(polygons)
+        self.grid_size = int(grid_size)
+
+        bounds = np.array([polygon.bounds for polygon in self.polygons])
+        self.min_lon, self.min_lat = bounds[:, 0].min(), bounds[:, 1].min()
+        self.max_lon, self.max_lat = bounds[:, 2].max(), bounds[:, 3].max()
+        self.cell_width = (self.max_lon - self.min_lon) / self.grid_size
+        self.cell_height = (self.max_lat - self.min_lat) / self.grid_size
+
+        self.cell_location_ids = np.full(self.grid_size * self.grid_size, UNKNOWN_LOCATION_ID, dtype=np.int16)
+        self.candidate_indptr, self.candidate_zones = self._build_cells(bounds=bounds)
+
+    def _build_cells(self, bounds):
+        """Assigns zones which fully contain a cell and collects candidate zones for all border cells.
+
+        :param numpy.ndarray bounds: Bounding boxes of all polygons (min_lon, min_lat, max_lon, max_lat)
+        :return: Candidate zones per cell in CSR layout (index pointer, polygon indices)
+        """
+        n_cells = self.grid_size * self.grid_size
+        candidates = [[] for _ in range(n_cells)]
+
+        for zone_idx, polygon in enumerate(self.polygons):
+            prepared_polygon = prep(polygon)
+            min_col, min_row = self._cell_coordinates(lat=bounds[zone_idx, 1], lon=bounds[zone_idx, 0])
+            max_col, max_row = self._cell_coordinates(lat=bounds[zone_idx, 3], lon=bounds[zone_idx, 2])
+
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    cell_box = box(self.min_lon + col * self.cell_width,
+                                   self.min_lat + row * self.cell_height,
+                                   self.min_lon + (col + 1) * self.cell_width,
+                                   self.min_lat + (row + 1) * self.cell_height)
+                    cell = row * self.grid_size + col
+
+                    if prepared_polygon.contains(cell_box):
+                        self.cell_location_ids[cell] = self.location_ids[zone_idx]
+                    elif prepared_polygon.intersects(cell_box):
+                        candidates[cell].append(zone_idx)
+
+        indptr = np.zeros(n_cells + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(cell_candidates) for cell_candidates in candidates])
+        zones = np.array([zone_idx for cell_candidates in candidates for zone_idx in cell_candidates], dtype=np.int32)
+
+        return indptr, zones
+
+    def _cell_coordinates(self, lat, lon):
+        """Calculates grid column and row for given coordinates, clipped to the grid.
+
+        :param lat: Latitude(s)
+        :param lon: Longitude(s)
+        :return: Tuple of column and row index
+        """
+        col = np.clip(np.floor((lon - self.min_lon) / self.cell_width), 0, self.grid_size - 1).astype(np.int64)
+        row = np.clip(np.floor((lat - self.min_lat) / self.cell_height), 0, self.grid_size - 1).astype(np.int64)
+
+        return col, row
+
+    def lookup(self, lat, lon):
+        """Maps coordinates to taxi zone location IDs.
+
+        :param lat: Latitudes (array-like)
+        :param lon: Longitudes (array-like)
+        :return: Array of location IDs (int16), UNKNOWN_LOCATION_ID for points outside all zones or without coordinates
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        result = np.full(lat.shape[0], UNKNOWN_LOCATION_ID, dtype=np.int16)
+
+        in_grid = np.flatnonzero((lon >= self.min_lon) & (lon <= self.max_lon)
+                                 & (lat >= self.min_lat) & (lat <= self.max_lat))
+        col, row = self._cell_coordinates(lat=lat[in_grid], lon=lon[in_grid])
+        cells = row * self.grid_size + col
+
+        result[in_grid] = self.cell_location_ids[cells]
+
+        is_pending = result[in_grid] == UNKNOWN_LOCATION_ID
+        pending, pending_cells = in_grid[is_pending], cells[is_pending]
+        n_candidates = self.candidate_indptr[pending_cells + 1] - self.candidate_indptr[pending_cells]
+
+        rank = 0
+        while pending.size > 0:
+            has_candidate = n_candidates > rank
+            pending, pending_cells, n_candidates = pending[has_candidate], pending_cells[has_candidate], \
+                n_candidates[has_candidate]
+            zones = self.candidate_zones[self.candidate_indptr[pending_cells] + rank]
+
+            for zone_idx in np.unique(zones):
+                points = pending[zones == zone_idx]
+                is_inside = shapely.vectorized.contains(self.polygons[zone_idx], lon[points], lat[points])
+                result[points[is_inside]] = self.location_ids[zone_idx]
+
+            is_pending = result[pending] == UNKNOWN_LOCATION_ID
+            pending, pending_cells, n_candidates = pending[is_pending], pending_cells[is_pending], \
+                n_candidates[is_pending]
+            rank += 1
+
+        return result
+
+
+def build_zone_index(grid_size=256):
+    """Builds the zone index for all taxi zones in the taxi zone shape file.
+
+    :param int grid_size: Number of grid cells per axis
+    :return: ZoneIndex
+    """
+    location_ids, polygons = data_loader.load_zone_polygons()
+
+    return ZoneIndex(location_ids=location_ids, polygons=polygons, grid_size=grid_size)
+
+
+def load_zone_index(grid_size=256):
+    """Loads the zone index from the geometry cache, so the grid cells are only computed once per shape file.
+
+    :param int grid_size: Number of grid cells per axis
+    :return: ZoneIndex
+    """
+    return geometry_cache.load_cached(name=f'zone_index_{grid_size}', build=lambda: build_zone_index(grid_size))
+
+
+def normalize_location_ids(taxi_data, location_datetime_colnames, zone_index,
+                           pickup_location_id_colname='PULocationID', dropoff_location_id_colname='DOLocationID'):
+    """Adds pickup and dropoff location ID columns to taxi data which only has latitude/longitude coordinates, so it
+    can be filtered in the same way as files with location IDs.
+
+    :param pandas.DataFrame taxi_data: Taxi data with coordinate columns (modified in place)
+    :param LocationTimeColNames location_datetime_colnames: Column names of taxi data
+    :param ZoneIndex zone_index: Zone index
+    :param str pickup_location_id_colname: Name of new pickup location ID column
+    :param str dropoff_location_id_colname: Name of new dropoff location ID column
+    :return: LocationTimeColNames including the new location ID columns
+    """
+    taxi_data[pickup_location_id_colname] = zone_index.lookup(
+        lat=taxi_data[location_datetime_colnames.pickup_lat_colname].values,
+        lon=taxi_data[location_datetime_colnames.pickup_lon_colname].values
+    )
+    taxi_data[dropoff_location_id_colname] = zone_index.lookup(
+        lat=taxi_data[location_datetime_colnames.dropoff_lat_colname].values,
+        lon=taxi_data[location_datetime_colnames.dropoff_lon_colname].values
+    )
+
+    return LocationTimeColNames(pickup_location_id_colname=pickup_location_id_colname,
+                                pickup_lon_colname=location_datetime_colnames.pickup_lon_colname,
+                                pickup_lat_colname=location_datetime_colnames.pickup_lat_colname,
+                                pickup_datetime_colname=location_datetime_colnames.pickup_datetime_colname,
+                                dropoff_location_id_colname=dropoff_location_id_colname,
+                                dropoff_lon_colname=location_datetime_colnames.dropoff_lon_colname,
+                                dropoff_lat_colname=location_datetime_colnames.dropoff_lat_colname,
+                                dropoff_datetime_colname=location_datetime_colnames.dropoff_datetime_colname)
+
+
+def get_location_ids(taxi_data, location_id_colname, lat_colname, lon_colname, zone_index=None):
+    """Location IDs of one end of the rides (pickup or dropoff), taken from the location ID column if the file has one
+    and looked up from the coordinates otherwise.
+
+    :param pandas.DataFrame taxi_data: Taxi data
+    :param str location_id_colname: Location ID column name ('nan' if the file has no location IDs)
+    :param str lat_colname: Latitude column name ('nan' if the file has no coordinates)
+    :param str lon_colname: Longitude column name ('nan' if the file has no coordinates)
+    :param ZoneIndex zone_index: Zone index, only needed for files without location IDs
+    :return: Array of location IDs (int64), UNKNOWN_LOCATION_ID for missing or invalid values
+    """
+    if location_id_colname != 'nan':
+        location_ids = pd.to_numeric(taxi_data[location_id_colname], errors='coerce').values
+        is_valid = (location_ids >= 0) & (location_ids < N_LOCATION_IDS)  # False for NaN
+
+        return np.where(is_valid, location_ids, UNKNOWN_LOCATION_ID).astype(np.int64)
+    elif lat_colname != 'nan':
+        return zone_index.lookup(lat=taxi_data[lat_colname].values, lon=taxi_data[lon_colname].values) \
+            .astype(np.int64)
+
+    return np.full(taxi_data.shape[0], UNKNOWN_LOCATION_ID, dtype=np.int64)
@@ -0,0 +1,45 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.benchmark import synthetic_data
+from src.config.config import Config
+from src.taxi import count_rides_per_day
+from src.util import data_loader
+
+
+class SyntheticDataTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.path_dir_taxi, self.use_parquet_cache = Config.PATH_DIR_TAXI, Config.USE_PARQUET_CACHE
+        Config.PATH_DIR_TAXI = self.tmp_dir
+        Config.USE_PARQUET_CACHE = False
+
+    def test_files_match_schema(self):
+        for file_name in synthetic_data.ERA_FILE_NAMES:
+            synthetic_data.write_taxi_data(file_name=file_name, n_rows=1000)
+
+            columns = data_loader.load_schema()[file_name]
+            chunks = list(data_loader.read_csv_chunks(file_name=file_name, columns=columns))
+            day_counter = count_rides_per_day.count_rides_per_day(file_name=file_name)
+
+            self.assertEqual(sum(chunk.shape[0] for chunk in chunks), 1000)
+            self.assertEqual(day_counter.get_n_rides(), 1000)
+            self.assertEqual(day_counter.n_invalid, 0)
+
+    def test_realistic_locations(self):
+        file_name = 'green_tripdata_2016-07.csv'
+        taxi_data = synthetic_data.generate_taxi_data(file_name=file_name,
+                                                      columns=data_loader.load_schema()[file_name],
+                                                      n_rows=10000)
+
+        is_manhattan = taxi_data['PULocationID'].isin(Config.MANHATTAN_LOCATION_IDS)
+        is_jfk = taxi_data['DOLocationID'] == Config.JFK_LOCATION_ID
+
+        self.assertTrue(0.5 < is_manhattan.mean() < 0.8)
+        self.assertTrue((is_manhattan & is_jfk).sum() > 0)
+
+    def tearDown(self):
+        Config.PATH_DIR_TAXI, Config.USE_PARQUET_CACHE = self.path_dir_taxi, self.use_parquet_cache
+        shutil.rmtree(str(self.tmp_dir))
@@ -0,0 +1,95 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.config.config import Config
+from src.taxi import filter_manhattan_to_jfk
+from src.util import data_loader, filtered_rides
+from src.util.data_loader import LocationTimeColNames
+from src.util.geo_handler import GeoHandler
+
+
+class FilterManhattanToJfkTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.geo_handler = GeoHandler(manhattan_polygon=data_loader.load_manhattan_polygon(),
+                                     manhattan_location_ids=Config.MANHATTAN_LOCATION_IDS,
+                                     jfk_polygon=data_loader.load_jfk_polygon(),
+                                     jfk_location_id=Config.JFK_LOCATION_ID)
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+
+    def test_filter_chunks_by_location_id(self):
+        colnames = LocationTimeColNames(pickup_location_id_colname='PULocationID', pickup_lon_colname='nan',
+                                        pickup_lat_colname='nan', pickup_datetime_colname='nan',
+                                        dropoff_location_id_colname='DOLocationID', dropoff_lon_colname='nan',
+                                        dropoff_lat_colname='nan', dropoff_datetime_colname='nan')
+        chunks = [pd.DataFrame({'PULocationID': [100, 86], 'DOLocationID': [132, 132]}, index=[0, 1]),
+                  pd.DataFrame({'PULocationID': [132, 163], 'DOLocationID': [100, np.nan]}, index=[2, 3]),
+                  pd.DataFrame({'PULocationID': [163], 'DOLocationID': [132]}, index=[4])]
+
+        filtered_chunks = list(filter_manhattan_to_jfk.filter_chunks(chunks=chunks,
+                                                                     geo_handler=self.geo_handler,
+                                                                     location_datetime_colnames=colnames))
+
+        self.assertListEqual([list(chunk.index) for chunk in filtered_chunks], [[0], [], [4]])
+
+    def test_filter_chunks_by_coordinates(self):
+        colnames = LocationTimeColNames(pickup_location_id_colname='nan', pickup_lon_colname='Start_Lon',
+                                        pickup_lat_colname='Start_Lat', pickup_datetime_colname='nan',
+                                        dropoff_location_id_colname='nan', dropoff_lon_colname='End_Lon',
+                                        dropoff_lat_colname='End_Lat', dropoff_datetime_colname='nan')
+        chunk = pd.DataFrame({'Start_Lat': [40.763939, 40.673344, 40.763939, 0.0],
+                              'Start_Lon': [-73.977064, -73.717298, -73.977064, 0.0],
+                              'End_Lat': [40.642483, 40.642483, 40.866421, 40.642483],
+                              'End_Lon': [-73.779158, -73.779158, -73.921658, -73.779158]})
+
+        filtered_chunks = list(filter_manhattan_to_jfk.filter_chunks(chunks=[chunk],
+                                                                     geo_handler=self.geo_handler,
+                                                                     location_datetime_colnames=colnames))
+
+        self.assertListEqual(list(filtered_chunks[0].index), [0])
+
+    def test_write_chunks(self):
+        file_name = 'yellow_tripdata_2016-07.csv'
+        file_path = self.tmp_dir / 'filtered.parquet'
+        columns = data_loader.get_schema(file_name=file_name).columns
+        chunks = [pd.DataFrame({'tpep_pickup_datetime': ['2016-07-01 12:00:00'], 'PULocationID': [163],
+                                'DOLocationID': [132], 'fare_amount': [52]}, columns=columns, index=[3]),
+                  pd.DataFrame(columns=columns),
+                  pd.DataFrame({'tpep_pickup_datetime': ['2016-07-01 13:00:00'], 'PULocationID': [100],
+                                'DOLocationID': [132], 'fare_amount': [45.5]}, columns=columns, index=[8])]
+
+        n_rows = filter_manhattan_to_jfk.write_chunks(
+            chunks=chunks, file_name=file_name, file_path=file_path,
+            location_datetime_colnames=data_loader.get_location_datetime_columns(file_name=file_name)
+        )
+        rides = pq.read_table(str(file_path))
+
+        self.assertEqual(n_rows, 2)
+        self.assertEqual(rides.schema, filtered_rides.SCHEMA)
+        self.assertListEqual(rides.column('pickup_location_id').to_pylist(), [163, 100])
+        self.assertListEqual(rides.column('fare_amount').to_pylist(), [52, 45.5])
+        self.assertListEqual(rides.column('taxi_type').to_pylist(), ['yellow', 'yellow'])
+        self.assertListEqual(list(self.tmp_dir.iterdir()), [file_path])
+
+    def test_write_chunks_without_chunks(self):
+        file_name = 'fhv_tripdata_2015-01.csv'
+        file_path = self.tmp_dir / 'filtered.parquet'
+
+        n_rows = filter_manhattan_to_jfk.write_chunks(
+            chunks=[], file_name=file_name, file_path=file_path,
+            location_datetime_colnames=data_loader.get_location_datetime_columns(file_name=file_name)
+        )
+
+        self.assertEqual(n_rows, 0)
+        self.assertEqual(pq.read_table(str(file_path)).schema, filtered_rides.SCHEMA)
+
+    def tearDown(self):
+        shutil.rmtree(str(self.tmp_dir))
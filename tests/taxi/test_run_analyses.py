@@ -0,0 +1,71 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.taxi import count_rides_per_day, filter_manhattan_to_jfk, run_analyses
+from src.util import zone_index
+from src.util.data_loader import LocationTimeColNames
+
+
+class RunAnalysesTest(unittest.TestCase):
+    def test_pickup_hours_of_strings(self):
+        values = np.array(['2015-01-31 10:00:00', '01/31/2015 23:59', '2015-01-31 24:00:00', '2015-01-31', np.nan],
+                          dtype=object)
+
+        self.assertListEqual(list(run_analyses.get_pickup_hours(values=values)), [10, 23, -1, -1, -1])
+
+    def test_pickup_hours_of_datetimes(self):
+        values = np.array(['2015-01-31T10:59:59', '1969-12-31T23:00', 'NaT'], dtype='datetime64[s]')
+
+        self.assertListEqual(list(run_analyses.get_pickup_hours(values=values)), [10, 23, -1])
+
+    def test_output_paths_apart_from_scripts(self):
+        file_name = 'yellow_tripdata_2015-01.csv'
+        script_output_paths = [count_rides_per_day.get_partial_result_path(file_name=file_name),
+                               filter_manhattan_to_jfk.get_output_path(file_name=file_name)]
+
+        for consumer_class in run_analyses.CONSUMERS.values():
+            self.assertNotIn(consumer_class().get_output_path(file_name=file_name), script_output_paths)
+
+    def test_hourly_pickups_per_zone(self):
+        consumer = run_analyses.HourlyPickupsPerZoneConsumer()
+        consumer.location_datetime_colnames = LocationTimeColNames(
+            pickup_location_id_colname='PULocationID', pickup_lon_colname='nan', pickup_lat_colname='nan',
+            pickup_datetime_colname='pickup_datetime', dropoff_location_id_colname='nan', dropoff_lon_colname='nan',
+            dropoff_lat_colname='nan', dropoff_datetime_colname='nan'
+        )
+        consumer.counts = np.zeros((24, zone_index.N_LOCATION_IDS), dtype=np.int64)
+
+        consumer.consume(chunk=pd.DataFrame({
+            'pickup_datetime': ['2016-07-01 10:00:00', '2016-07-02 10:30:00', '2016-07-02 11:00:00', 'invalid'],
+            'PULocationID': [100, 100, np.nan, 100]
+        }))
+
+        self.assertEqual(consumer.counts[10, 100], 2)
+        self.assertEqual(consumer.counts[11, 0], 1)
+        self.assertEqual(consumer.counts.sum(), 3)
+
+    def test_rollup_cube(self):
+        consumer = run_analyses.RollupCubeConsumer()
+        consumer.start_file(file_name='green_tripdata_2016-07.csv', columns=None,
+                            location_datetime_colnames=LocationTimeColNames(
+                                pickup_location_id_colname='PULocationID', pickup_lon_colname='nan',
+                                pickup_lat_colname='nan', pickup_datetime_colname='lpep_pickup_datetime',
+                                dropoff_location_id_colname='DOLocationID', dropoff_lon_colname='nan',
+                                dropoff_lat_colname='nan', dropoff_datetime_colname='nan'))
+
+        consumer.consume(chunk=pd.DataFrame({
+            'lpep_pickup_datetime': ['2016-07-01 10:00:00', '2016-07-01 10:30:00', 'invalid'],
+            'PULocationID': [100, 100, 100],
+            'DOLocationID': [132, 132, np.nan],
+            'fare_amount': ['52', '45.5', 'x'],
+            'trip_distance': [17, 16.5, 1]
+        }))
+        cube = consumer.cube_builder.finish()
+        result = cube.query(group_by=['date', 'hour', 'dropoff_location_id'],
+                            measures=['n_rides', 'fare_amount', 'trip_distance'])
+
+        self.assertListEqual(list(result.index.get_level_values('dropoff_location_id')), [132])
+        self.assertListEqual(list(result.iloc[0]), [2, 97.5, 33.5])
+        self.assertEqual(cube.query(dropoff_location_ids=[zone_index.UNKNOWN_LOCATION_ID])['n_rides'].sum(), 1)
@@ -0,0 +1,178 @@
+import gzip
+import lzma
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from src.config.config import Config
+from src.util import data_loader
+
+
+class DataLoaderTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.path_dir_taxi = Config.PATH_DIR_TAXI
+        Config.PATH_DIR_TAXI = self.tmp_dir
+
+        self.file_name = 'fhv_tripdata_2015-01.csv'
+        self.columns = ['Dispatching_base_num', 'Pickup_date', 'locationID']
+
+        with open(str(Config.PATH_DIR_TAXI / self.file_name), 'w') as f:
+            f.write('Dispatching_base_num,Pickup_date,locationID\n')
+
+            for i in range(100):
+                f.write(f'B{i:05d},2015-01-{i % 28 + 1:02d} 00:15:00,{i % 263 + 1}\n')
+
+    def test_parse_file_name(self):
+        self.assertEqual(data_loader.parse_file_name(file_name='green_tripdata_2016-07.csv'), ('green', 2016, 7))
+
+    def test_read_csv_chunks(self):
+        chunks = list(data_loader.read_csv_chunks(file_name=self.file_name, columns=self.columns,
+                                                  usecols=['locationID'], dtype={'locationID': 'float32'},
+                                                  chunk_size=30))
+
+        self.assertListEqual([chunk.shape[0] for chunk in chunks], [30, 30, 30, 10])
+        self.assertListEqual(list(chunks[-1].columns), ['locationID'])
+        self.assertEqual(chunks[-1].index[-1], 99)
+        self.assertEqual(str(chunks[0]['locationID'].dtype), 'float32')
+
+    def test_byte_ranges(self):
+        byte_ranges = data_loader.get_byte_ranges(file_name=self.file_name, range_size=500)
+
+        self.assertGreater(len(byte_ranges), 1)
+        self.assertEqual(byte_ranges[-1][1], (Config.PATH_DIR_TAXI / self.file_name).stat().st_size)
+
+        parts = [pd.concat(data_loader.read_csv_chunks(file_name=self.file_name, columns=self.columns,
+                                                       byte_range=byte_range, chunk_size=7))
+                 for byte_range in byte_ranges]
+        taxi_data = pd.concat(parts, ignore_index=True)
+
+        self.assertListEqual(list(taxi_data['Dispatching_base_num']), [f'B{i:05d}' for i in range(100)])
+
+    def compress(self, suffix):
+        file_path = Config.PATH_DIR_TAXI / self.file_name
+
+        with open(str(file_path), 'rb') as f:
+            data = f.read()
+
+        if suffix == '.gz':
+            with gzip.open(str(file_path) + suffix, 'wb') as f:
+                f.write(data)
+        elif suffix == '.xz':
+            with lzma.open(str(file_path) + suffix, 'wb') as f:
+                f.write(data)
+        else:
+            with pa.CompressedOutputStream(str(file_path) + suffix, 'zstd') as f:
+                f.write(data)
+
+        file_path.unlink()
+
+    def test_compressed_files(self):
+        expected = pd.concat(data_loader.read_csv_chunks(file_name=self.file_name, columns=self.columns))
+
+        for suffix in data_loader.COMPRESSIONS:
+            self.compress(suffix=suffix)
+
+            self.assertEqual(data_loader.get_raw_path(file_name=self.file_name).name, self.file_name + suffix)
+            self.assertTrue(data_loader.is_compressed(file_name=self.file_name))
+            self.assertListEqual(data_loader.read_header(file_name=self.file_name), self.columns)
+
+            taxi_data = pd.concat(data_loader.read_csv_chunks(file_name=self.file_name, columns=self.columns,
+                                                              chunk_size=30))
+
+            pd.testing.assert_frame_equal(taxi_data, expected)
+
+            with self.assertRaises(ValueError):
+                data_loader.get_byte_ranges(file_name=self.file_name, range_size=500)
+
+            expected.to_csv(str(Config.PATH_DIR_TAXI / self.file_name), index=False)
+            (Config.PATH_DIR_TAXI / (self.file_name + suffix)).unlink()
+
+    def test_plain_file_is_preferred(self):
+        self.compress(suffix='.gz')
+
+        with open(str(Config.PATH_DIR_TAXI / self.file_name), 'w') as f:
+            f.write(','.join(self.columns) + '\n')
+
+        self.assertEqual(data_loader.get_raw_path(file_name=self.file_name).name, self.file_name)
+        self.assertFalse(data_loader.is_compressed(file_name=self.file_name))
+
+    def test_decompression_error(self):
+        with open(str(Config.PATH_DIR_TAXI / (self.file_name + '.gz')), 'wb') as f:
+            f.write(b'not gzip data')
+
+        (Config.PATH_DIR_TAXI / self.file_name).unlink()
+
+        with self.assertRaises(OSError):
+            list(data_loader.read_csv_chunks(file_name=self.file_name, columns=self.columns))
+
+    def test_schema_registry(self):
+        schema = data_loader.get_schema(file_name='yellow_tripdata_2009-01.csv')
+
+        self.assertEqual(schema.location_representation, data_loader.COORDINATES)
+        self.assertEqual(schema.location_datetime_colnames.pickup_lon_colname, 'Start_Lon')
+        self.assertEqual(schema.dtypes['Start_Lon'], 'float64')
+        self.assertEqual(data_loader.get_schema(file_name='fhv_tripdata_2015-01.csv').location_representation,
+                         data_loader.PICKUP_LOCATION_ID)
+        self.assertEqual(data_loader.get_schema(file_name='green_tripdata_2017-01.csv').location_representation,
+                         data_loader.LOCATION_IDS)
+
+    def test_detect_known_header(self):
+        registry = data_loader.load_schema_registry()
+        known_schema = registry.get(file_name='green_tripdata_2016-12.csv')
+
+        with open(str(Config.PATH_DIR_TAXI / 'green_tripdata_2018-01.csv'), 'w') as f:
+            f.write(','.join(known_schema.columns[:-2]) + '\n')  # header without the two unnamed columns
+            f.write(','.join(['1'] * len(known_schema.columns)) + '\n')
+
+        schema = registry.detect(file_name='green_tripdata_2018-01.csv')
+
+        self.assertListEqual(schema.columns, known_schema.columns)
+        self.assertEqual(schema.location_representation, data_loader.LOCATION_IDS)
+        self.assertEqual((schema.year, schema.month), (2018, 1))
+
+    def test_detect_new_header(self):
+        with open(str(Config.PATH_DIR_TAXI / 'yellow_tripdata_2018-01.csv'), 'w') as f:
+            f.write('VendorID,tpep_pickup_datetime,tpep_dropoff_datetime,PULocationID,DOLocationID,,total_amount\n')
+            f.write('1,2018-01-01 00:21:05,2018-01-01 00:24:23,41,24,1,5.8,\n')
+
+        schema = data_loader.load_schema_registry().detect(file_name='yellow_tripdata_2018-01.csv')
+        colnames = schema.location_datetime_colnames
+
+        self.assertListEqual(schema.columns[-3:], ['MISSING_1', 'total_amount', 'MISSING_2'])
+        self.assertEqual(schema.location_representation, data_loader.LOCATION_IDS)
+        self.assertEqual(colnames.pickup_datetime_colname, 'tpep_pickup_datetime')
+        self.assertEqual(colnames.dropoff_location_id_colname, 'DOLocationID')
+        self.assertEqual(colnames.pickup_lon_colname, 'nan')
+
+    def test_detection_matches_config(self):
+        registry = data_loader.load_schema_registry()
+
+        for file_name in registry.file_names:
+            schema = registry.get(file_name=file_name)
+            detected_colnames = data_loader.detect_location_datetime_columns(columns=schema.columns)
+
+            self.assertDictEqual(vars(detected_colnames), vars(schema.location_datetime_colnames), msg=file_name)
+
+    def test_load_schema_adds_unconfigured_files(self):
+        with open(str(Config.PATH_DIR_TAXI / 'fhv_tripdata_2019-06.csv'), 'w') as f:
+            f.write('Dispatching_base_num,Pickup_DateTime,DropOff_datetime,PUlocationID,DOlocationID\n')
+
+        schemas = data_loader.load_schema()
+
+        self.assertEqual(list(schemas)[-1], 'fhv_tripdata_2019-06.csv')
+        self.assertEqual(schemas['fhv_tripdata_2019-06.csv'][-1], 'DOlocationID')
+        self.assertEqual(len(data_loader.load_schema(from_idx=0, to_idx=3)), 3)
+
+        with gzip.open(str(Config.PATH_DIR_TAXI / 'fhv_tripdata_2019-07.csv.gz'), 'wt') as f:
+            f.write('Dispatching_base_num,Pickup_DateTime,DropOff_datetime,PUlocationID,DOlocationID\n')
+
+        self.assertEqual(list(data_loader.load_schema())[-1], 'fhv_tripdata_2019-07.csv')
+
+    def tearDown(self):
+        Config.PATH_DIR_TAXI = self.path_dir_taxi
+        shutil.rmtree(str(self.tmp_dir))
@@ -0,0 +1,141 @@
+import gzip
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from src.config.config import Config
+from src.taxi import count_rides_per_day
+from src.util import data_loader, date_scanner, profiler, quality_rules
+
+
+class DateScannerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.path_dir_taxi, self.use_parquet_cache = Config.PATH_DIR_TAXI, Config.USE_PARQUET_CACHE
+        self.count_engine, self.quality_rules = Config.COUNT_ENGINE, Config.QUALITY_RULES
+        Config.PATH_DIR_TAXI = self.tmp_dir
+        Config.USE_PARQUET_CACHE = False
+        Config.QUALITY_RULES = {}  # the date window would reject some of the dates below
+
+        self.file_name = 'fhv_tripdata_2015-01.csv'
+        lines = ['B00001,2015-01-01 00:15:00,100',
+                 '',
+                 'B00001,01/02/2015 00:15:00,100',
+                 'B00001,2015-01-02 00:15:00',
+                 'B00001,,100',
+                 'B00001',
+                 'B00001,2015-01-0',
+                 'B00001,invalid,100',
+                 'B00001,2015-02-30 00:15:00,100',
+                 'B00001,2014-12-31 23:59:59,100\r',
+                 '\r',
+                 'B00001,2015-01-03 00:15:00,100']
+
+        with open(str(Config.PATH_DIR_TAXI / self.file_name), 'w', newline='') as f:
+            f.write('Dispatching_base_num,Pickup_date,locationID\n' + '\n'.join(lines))
+
+    def assert_counts_equal(self, day_counter, expected_day_counter):
+        self.assertEqual(day_counter.first_day, expected_day_counter.first_day)
+        self.assertListEqual(list(day_counter.counts), list(expected_day_counter.counts))
+        self.assertEqual(day_counter.n_invalid, expected_day_counter.n_invalid)
+
+    def test_count_pickup_dates(self):
+        day_counter = date_scanner.count_pickup_dates(file_name=self.file_name, column_idx=1, n_threads=1)
+        counts = day_counter.to_frame()
+
+        self.assertListEqual(list(counts.index.astype(str)), ['2014-12-31', '2015-01-01', '2015-01-02', '2015-01-03'])
+        self.assertListEqual(list(counts.iloc[:, 0]), [1, 1, 2, 1])
+        self.assertEqual(day_counter.n_invalid, 5)
+
+        for range_size in [1, 10, 100]:
+            self.assert_counts_equal(date_scanner.count_pickup_dates(file_name=self.file_name, column_idx=1,
+                                                                     n_threads=3, range_size=range_size),
+                                     day_counter)
+
+    def test_same_counts_as_pandas(self):
+        Config.COUNT_ENGINE = 'pandas'
+        expected_day_counter = count_rides_per_day.count_rides_per_day(file_name=self.file_name)
+        Config.COUNT_ENGINE = 'mmap'
+
+        self.assert_counts_equal(count_rides_per_day.count_rides_per_day(file_name=self.file_name),
+                                 expected_day_counter)
+
+    def test_default_quality_rules(self):
+        Config.QUALITY_RULES = self.quality_rules
+        lines = ['B00001,2015-01-01 00:15:00,100', 'B00001,2015-01-01 00:15:00,0', 'B00001,2015-01-02 00:15:00,',
+                 'B00001,2015-03-01 00:15:00,100', 'B00001,2015-03-01 00:15:00,300\r', 'B00001,invalid,100',
+                 'B00001,2015-01-03 00:15:00,1.5e2']
+
+        with open(str(Config.PATH_DIR_TAXI / self.file_name), 'w', newline='') as f:
+            f.write('Dispatching_base_num,Pickup_date,locationID\n' + '\n'.join(lines))
+
+        Config.COUNT_ENGINE = 'pandas'
+        expected_rejection_counter = quality_rules.RejectionCounter()
+        expected_day_counter = count_rides_per_day.count_rides_per_day(file_name=self.file_name,
+                                                                       rejection_counter=expected_rejection_counter)
+        Config.COUNT_ENGINE = 'mmap'
+        rejection_counter = quality_rules.RejectionCounter()
+        profile = profiler.FileProfile(file_name=self.file_name)
+        day_counter = count_rides_per_day.count_rides_per_day(file_name=self.file_name, profile=profile,
+                                                              rejection_counter=rejection_counter)
+
+        self.assertNotIn('read', profile.stages)  # scanned, not read with pandas
+        self.assertEqual(day_counter.n_invalid, expected_day_counter.n_invalid)
+        self.assertTrue(day_counter.to_frame().equals(expected_day_counter.to_frame()))
+        self.assertDictEqual(rejection_counter.to_dict(), expected_rejection_counter.to_dict())
+        self.assertEqual(rejection_counter.n_rejected, 3)
+
+        with open(str(Config.PATH_DIR_TAXI / self.file_name), 'a') as f:
+            f.write('\nB00001,2015-01-03 00:15:00,' + '1' * date_scanner.FIELD_LENGTH)
+
+        with self.assertRaises(date_scanner.LongFieldError):
+            date_scanner.count_pickup_dates(file_name=self.file_name, column_idx=1,
+                                            quality_filter=quality_rules.QualityFilter(
+                                                file_name=self.file_name,
+                                                location_datetime_colnames=data_loader.get_location_datetime_columns(
+                                                    file_name=self.file_name)))
+
+    def test_field_starts_beyond_line_prefix(self):
+        data = np.frombuffer(b'a' * 30 + b',b,2015-01-01\n,2015-01-02,x\n2015-01-03', dtype=np.uint8)
+
+        chars = date_scanner.get_field_chars(data=data.copy(), column_idx=1)
+
+        self.assertListEqual([bytes(row) for row in chars], [b'b,2015-01-', b'2015-01-02', b',,,,,,,,,,'])
+
+    def test_quoted_fields(self):
+        with open(str(Config.PATH_DIR_TAXI / self.file_name), 'a') as f:
+            f.write('\n"B00001","2015-01-04 00:15:00",100')
+
+        with self.assertRaises(date_scanner.QuotedFieldError):
+            date_scanner.count_pickup_dates(file_name=self.file_name, column_idx=1)
+
+        Config.COUNT_ENGINE = 'mmap'  # falls back to pandas
+
+        self.assertEqual(count_rides_per_day.count_rides_per_day(file_name=self.file_name).get_n_rides(), 6)
+
+    def test_compressed_file(self):
+        day_counter = date_scanner.count_pickup_dates(file_name=self.file_name, column_idx=1, n_threads=1)
+        file_path = Config.PATH_DIR_TAXI / self.file_name
+
+        with open(str(file_path), 'rb') as f_in, gzip.open(str(file_path) + '.gz', 'wb') as f_out:
+            f_out.write(f_in.read())
+
+        file_path.unlink()
+
+        for range_size in [1, 10, 1000]:
+            self.assert_counts_equal(date_scanner.count_pickup_dates(file_name=self.file_name, column_idx=1,
+                                                                     n_threads=3, range_size=range_size),
+                                     day_counter)
+
+    def test_empty_file(self):
+        open(str(Config.PATH_DIR_TAXI / self.file_name), 'w').close()
+
+        self.assertEqual(date_scanner.count_pickup_dates(file_name=self.file_name, column_idx=1).get_n_rides(), 0)
+
+    def tearDown(self):
+        Config.PATH_DIR_TAXI, Config.USE_PARQUET_CACHE = self.path_dir_taxi, self.use_parquet_cache
+        Config.COUNT_ENGINE, Config.QUALITY_RULES = self.count_engine, self.quality_rules
+        shutil.rmtree(str(self.tmp_dir))
@@ -0,0 +1,77 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from src.util import day_counter
+from src.util.day_counter import DayCounter
+
+
+class DayCounterTest(unittest.TestCase):
+    def test_date_keys(self):
+        values = np.array(['2015-01-31 10:00:00', '01/31/2015 10:00', '2015-1-31 10:00:00', 'garbage', np.nan,
+                           '1850-01-01 00:00:00'], dtype=object)
+
+        keys = day_counter.get_date_keys(values=values)
+
+        self.assertEqual(keys[0], keys[1])
+        self.assertTrue((keys[2:] == day_counter.INVALID_DATE_KEY).all())
+
+    def test_day_numbers_match_numpy(self):
+        dates = np.arange(np.datetime64('1999-12-01'), np.datetime64('2018-03-01'))
+
+        day_numbers, is_valid = day_counter.date_keys_to_day_numbers(
+            keys=day_counter.get_date_keys(values=dates.astype(str))
+        )
+
+        self.assertTrue(is_valid.all())
+        self.assertListEqual(list(day_numbers), list(dates.astype(np.int64)))
+
+    def test_count_strings(self):
+        counter = DayCounter()
+        counter.add_strings(values=np.array([b'2016-02-29 01:00:00', b'2016-02-29 23:59:59', b'2015-02-29 01:00:00',
+                                             b'2001-01-01 00:00:00', b'03/01/2016 00:00']))
+
+        daily_counts = counter.to_frame()
+
+        self.assertListEqual(list(daily_counts.index), ['2001-01-01', '2016-02-29', '2016-03-01'])
+        self.assertListEqual(list(daily_counts['num_rides']), [1, 2, 1])
+        self.assertEqual(counter.n_invalid, 1)  # 2015-02-29
+        self.assertEqual(counter.get_n_rides(min_date='2009-01-01', max_date='2017-12-31'), 3)
+
+    def test_count_day_overflow(self):
+        counter = DayCounter()
+        counter.add_strings(values=np.array(['2015-01-40 00:00:00', '2015-01-00 00:00:00', '2015-00-10 00:00:00',
+                                             '02/40/2015 00:00', '2015-02-08 00:00:00'], dtype=object))
+
+        self.assertListEqual(list(counter.to_frame().index), ['2015-02-08'])
+        self.assertListEqual(list(counter.to_frame()['num_rides']), [1])
+        self.assertEqual(counter.n_invalid, 4)
+
+    def test_merge(self):
+        counter = DayCounter()
+        counter.add_datetimes(values=np.array(['2017-12-31T10:00', 'NaT'], dtype='datetime64[s]'))
+        other = DayCounter()
+        other.add_strings(values=np.array(['2009-01-01 00:00:00', '2017-12-31 00:00:00', 'invalid'], dtype=object))
+
+        counter.merge(other=other)
+
+        self.assertListEqual(list(counter.to_frame().index), ['2009-01-01', '2017-12-31'])
+        self.assertListEqual(list(counter.to_frame()['num_rides']), [1, 2])
+        self.assertEqual(counter.n_invalid, 2)
+
+    def test_save_and_load(self):
+        counter = DayCounter()
+        counter.add_strings(values=np.array(['2009-01-01 00:00:00', '2009-01-03 00:00:00', 'invalid'], dtype=object))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            counter.save(file_path=Path(tmp_dir) / 'counts.npz')
+            DayCounter().save(file_path=Path(tmp_dir) / 'empty.npz')
+
+            loaded_counter = DayCounter.load(file_path=Path(tmp_dir) / 'counts.npz')
+            empty_counter = DayCounter.load(file_path=Path(tmp_dir) / 'empty.npz')
+
+        self.assertTrue(loaded_counter.to_frame().equals(counter.to_frame()))
+        self.assertEqual(loaded_counter.n_invalid, 1)
+        self.assertIsNone(empty_counter.first_day)
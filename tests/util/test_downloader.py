@@ -0,0 +1,164 @@
+import hashlib
+import re
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from src.config.config import Config
+from src.util import downloader
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """Serves the files of the server from memory, with ETags and byte ranges like S3"""
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_headers(self):
+        self.server.requests.append((self.command, self.path, self.headers.get('Range')))
+
+        if self.path.startswith('/redirect/'):
+            self.send_response(302)
+            self.send_header('Location', '/' + self.path[len('/redirect/'):])
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+
+        content = self.server.files.get(self.path.lstrip('/'))
+
+        if content is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+
+        match = re.fullmatch(r'bytes=(\d+)-(\d+)', self.headers.get('Range', ''))
+        start, end = (int(match.group(1)), int(match.group(2)) + 1) if match else (0, len(content))
+
+        self.send_response(206 if match else 200)
+        self.send_header('Content-Length', str(end - start))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', f'"{self.server.etags.get(self.path.lstrip("/"), hashlib.md5(content).hexdigest())}"')
+
+        if match:
+            self.send_header('Content-Range', f'bytes {start}-{end - 1}/{len(content)}')
+
+        self.end_headers()
+
+        return content[start:end]
+
+    def do_HEAD(self):
+        self.send_headers()
+
+    def do_GET(self):
+        body = self.send_headers()
+
+        if body is not None:
+            self.wfile.write(body)
+
+
+class DownloaderTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.n_retries = Config.DOWNLOAD_N_RETRIES
+        Config.DOWNLOAD_N_RETRIES = 0
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), RangeRequestHandler)
+        self.server.files = {'green_tripdata_2016-07.csv': bytes(range(256)) * 40,
+                             'fhv_tripdata_2015-01.csv': b'Dispatching_base_num,Pickup_date,locationID\n' * 10}
+        self.server.etags = {}
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}/'
+
+    def download(self, file_names, **kwargs):
+        completed_file_names = []
+        results = downloader.download_files(urls=[self.base_url + file_name for file_name in file_names],
+                                            target_dir=self.tmp_dir / 'taxi_raw',
+                                            on_complete=completed_file_names.append,
+                                            max_connections=2, range_size=1000, **kwargs)
+
+        return results, completed_file_names
+
+    def test_download_files(self):
+        results, completed_file_names = self.download(file_names=['green_tripdata_2016-07.csv',
+                                                                  'redirect/fhv_tripdata_2015-01.csv'])
+
+        self.assertDictEqual(results, {'green_tripdata_2016-07.csv': 'downloaded',
+                                       'fhv_tripdata_2015-01.csv': 'downloaded'})
+        self.assertListEqual(sorted(completed_file_names), sorted(results))
+        self.assertListEqual(sorted(path.name for path in (self.tmp_dir / 'taxi_raw').iterdir()), sorted(results))
+
+        for file_name in results:
+            with open(str(self.tmp_dir / 'taxi_raw' / file_name), 'rb') as f:
+                self.assertEqual(f.read(), self.server.files[file_name])
+
+        n_range_requests = sum(range_header is not None for _, _, range_header in self.server.requests)
+        self.assertEqual(n_range_requests, 11)  # 10240 bytes in ranges of 1000, the small file in one request
+
+        results, _ = self.download(file_names=['green_tripdata_2016-07.csv'])
+
+        self.assertDictEqual(results, {'green_tripdata_2016-07.csv': 'skipped'})
+
+    def test_checksum_mismatch(self):
+        self.server.etags['green_tripdata_2016-07.csv'] = '0' * 32
+
+        results, completed_file_names = self.download(file_names=['green_tripdata_2016-07.csv'])
+
+        self.assertIsInstance(results['green_tripdata_2016-07.csv'], downloader.ChecksumError)
+        self.assertListEqual(completed_file_names, [])
+        self.assertListEqual(list((self.tmp_dir / 'taxi_raw').iterdir()), [])
+
+        results, _ = self.download(file_names=['fhv_tripdata_2015-01.csv'],
+                                   checksums={'fhv_tripdata_2015-01.csv': '0' * 32})
+
+        self.assertIsInstance(results['fhv_tripdata_2015-01.csv'], downloader.ChecksumError)
+
+    def test_resume(self):
+        file_name = 'green_tripdata_2016-07.csv'
+        target_path = self.tmp_dir / 'taxi_raw' / file_name
+        target_path.parent.mkdir()
+        file_download = downloader.FileDownload(url=self.base_url + file_name, target_path=target_path)
+        file_download.size = len(self.server.files[file_name])
+        file_download.etag = hashlib.md5(self.server.files[file_name]).hexdigest()
+        file_download.done_ranges = {(0, 1000), (1000, 2000)}
+        file_download.save_state()
+
+        with open(str(file_download.part_path), 'wb') as f:
+            f.write(self.server.files[file_name][:2000])
+
+        self.download(file_names=[file_name])
+
+        with open(str(target_path), 'rb') as f:
+            self.assertEqual(f.read(), self.server.files[file_name])
+
+        ranges = [range_header for _, _, range_header in self.server.requests if range_header is not None]
+        self.assertEqual(len(ranges), 9)
+        self.assertNotIn('bytes=0-999', ranges)
+        self.assertFalse(file_download.state_path.exists())
+
+    def test_missing_file(self):
+        results, _ = self.download(file_names=['yellow_tripdata_2009-01.csv'])
+
+        self.assertIsInstance(results['yellow_tripdata_2009-01.csv'], downloader.HTTPStatusError)
+        self.assertEqual(len(self.server.requests), 1)  # client errors are not retried
+
+    def test_load_checksums(self):
+        checksum_path = self.tmp_dir / 'checksums.txt'
+
+        with open(str(checksum_path), 'w') as f:
+            f.write(f'{"A" * 32}  green_tripdata_2016-07.csv\n{"b" * 32} *fhv_tripdata_2015-01.csv\n')
+
+        self.assertDictEqual(downloader.load_checksums(file_path=checksum_path),
+                             {'green_tripdata_2016-07.csv': 'a' * 32, 'fhv_tripdata_2015-01.csv': 'b' * 32})
+        self.assertDictEqual(downloader.load_checksums(file_path=self.tmp_dir / 'missing.txt'), {})
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        Config.DOWNLOAD_N_RETRIES = self.n_retries
+        shutil.rmtree(str(self.tmp_dir))
@@ -0,0 +1,113 @@
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.config.config import Config
+from src.taxi import count_rides_per_day
+from src.util import execution, profiler
+
+worker_value = None  # set by init_worker in the worker processes
+
+
+def init_worker(value):
+    global worker_value
+    worker_value = value
+
+
+def get_worker_value(task):
+    return task, worker_value, Config.CHUNK_SIZE
+
+
+def add_numbers(numbers):
+    return sum(numbers)
+
+
+class ExecutionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.config = {name: getattr(Config, name) for name in ['PATH_DIR_TAXI', 'PATH_DIR_RESULTS', 'N_CORES',
+                                                                 'CHUNK_SIZE', 'USE_PARQUET_CACHE', 'COUNT_ENGINE',
+                                                                 'BYTE_RANGE_SIZE', 'EXECUTION_BACKEND']}
+        Config.PATH_DIR_TAXI = self.tmp_dir / 'taxi_raw'
+        Config.PATH_DIR_RESULTS = self.tmp_dir / 'results'
+        Config.N_CORES = 2
+        Config.CHUNK_SIZE = 3
+        Config.USE_PARQUET_CACHE = False
+        Config.COUNT_ENGINE = 'pandas'
+
+        self.file_name = 'fhv_tripdata_2015-01.csv'
+        lines = [f'B00001,2015-01-{day:02d} 00:15:00,100' for day in [1, 1, 2, 3, 3, 3, 4, 5, 5, 31]]
+        Config.PATH_DIR_TAXI.mkdir()
+
+        with open(str(Config.PATH_DIR_TAXI / self.file_name), 'w') as f:
+            f.write('Dispatching_base_num,Pickup_date,locationID\n' + '\n'.join(lines) + '\n')
+
+    def test_get_groups(self):
+        self.assertListEqual(execution.get_groups(items=list(range(5)), fan_in=2), [[0, 1], [2, 3], [4]])
+
+    def test_unknown_backend(self):
+        Config.EXECUTION_BACKEND = 'spark'
+
+        with self.assertRaises(ValueError):
+            execution.get_backend()
+
+    def test_distributed_not_imported(self):
+        code = 'import sys; import src.util.execution; print("distributed" in sys.modules)'
+        output = subprocess.run([sys.executable, '-c', code], cwd=str(Path(__file__).parents[2]), check=True,
+                                stdout=subprocess.PIPE, universal_newlines=True).stdout
+
+        self.assertEqual(output.strip(), 'False')
+
+    def run_backend(self, backend):
+        results = sorted(backend.map_unordered(get_worker_value, range(4)))
+
+        self.assertListEqual(results, [(task, 'polygons', 3) for task in range(4)])
+        self.assertEqual(backend.tree_reduce(add_numbers, range(20), fan_in=3), 190)
+        self.assertEqual(backend.tree_reduce(add_numbers, [7]), 7)
+
+    def test_serial(self):
+        with execution.SerialBackend(initializer=init_worker, initargs=('polygons',)) as backend:
+            self.run_backend(backend=backend)
+
+    def test_process_pool(self):
+        with execution.ProcessPoolBackend(initializer=init_worker, initargs=('polygons',)) as backend:
+            self.run_backend(backend=backend)
+
+    def test_dask_local_cluster(self):
+        with execution.DaskBackend(initializer=init_worker, initargs=('polygons',)) as backend:
+            self.assertEqual(len(backend.client.scheduler_info()['workers']), 2)
+            self.run_backend(backend=backend)
+
+    def count(self, backend):
+        manifest = count_rides_per_day.load_manifest()
+
+        count_rides_per_day.count_outdated_files(file_names=[self.file_name], manifest=manifest,
+                                                 run_report=profiler.RunReport(job_name='test'), backend=backend)
+        count_rides_per_day.merge_partial_results(file_names=[self.file_name], manifest=manifest, backend=backend)
+
+        return (Config.PATH_DIR_RESULTS / 'num_rides_by_day_unfiltered.csv').read_text()
+
+    def test_count_byte_ranges(self):
+        Config.BYTE_RANGE_SIZE = 100
+        tasks = count_rides_per_day.get_count_tasks(file_names=[self.file_name], byte_range_size=100)
+
+        self.assertListEqual([part_idx for _, part_idx, _ in tasks], list(range(len(tasks))))
+        self.assertGreater(len(tasks), 1)
+
+        with execution.SerialBackend() as backend:
+            counts = self.count(backend=backend)
+
+        self.assertIn('2015-01-03,3', counts)
+        self.assertIn('2015-01-31,1', counts)
+
+        shutil.rmtree(str(Config.PATH_DIR_RESULTS))
+
+        with execution.DaskBackend() as backend:
+            self.assertEqual(self.count(backend=backend), counts)
+
+    def tearDown(self):
+        execution.set_config(config=self.config)
+        shutil.rmtree(str(self.tmp_dir))
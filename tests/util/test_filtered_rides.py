@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.config.config import Config
+from src.util import data_loader, filtered_rides, parquet_cache, zone_index
+
+
+class FilteredRidesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.path_dir_filtered_rides = Config.PATH_DIR_FILTERED_RIDES
+        self.path_dir_filtered_rides_dataset = Config.PATH_DIR_FILTERED_RIDES_DATASET
+        Config.PATH_DIR_FILTERED_RIDES = self.tmp_dir / 'filtered_rides'
+        Config.PATH_DIR_FILTERED_RIDES_DATASET = self.tmp_dir / 'filtered_rides_dataset'
+        Config.PATH_DIR_FILTERED_RIDES.mkdir()
+
+        self.file_names = ['green_tripdata_2016-07.csv', 'yellow_tripdata_2016-07.csv', 'fhv_tripdata_2017-01.csv']
+        rides = {
+            'green_tripdata_2016-07.csv': {'lpep_pickup_datetime': ['2016-07-02 10:00:00', '2016-07-01 09:00:00'],
+                                           'PULocationID': [100, 86], 'DOLocationID': [132, 132],
+                                           'fare_amount': [45, 52.5]},
+            'yellow_tripdata_2016-07.csv': {'tpep_pickup_datetime': ['2016-07-01 12:00:00'],
+                                            'PULocationID': [163], 'DOLocationID': [132], 'fare_amount': [52]},
+            'fhv_tripdata_2017-01.csv': {'Pickup_DateTime': ['2017-01-01 00:15:00'],
+                                         'PUlocationID': [100], 'DOlocationID': [np.nan]}
+        }
+
+        for file_name in self.file_names:  # like filter_manhattan_to_jfk.write_chunks
+            columns = data_loader.get_schema(file_name=file_name).columns
+            file_rides = pd.DataFrame(rides[file_name], columns=columns)
+            location_datetime_colnames = data_loader.get_location_datetime_columns(file_name=file_name)
+
+            if file_name.startswith('yellow'):  # filtered from the Parquet cache
+                file_rides = file_rides.rename(columns=parquet_cache.get_column_renaming(file_name=file_name))
+                location_datetime_colnames = parquet_cache.get_cached_location_datetime_columns(file_name=file_name)
+
+            self.write_source(file_name=file_name, rides=file_rides,
+                              location_datetime_colnames=location_datetime_colnames)
+
+    @staticmethod
+    def write_source(file_name, rides, location_datetime_colnames, zone_index=None):
+        writer = filtered_rides.RidesWriter(file_name=file_name,
+                                            file_path=FilteredRidesTest.get_source_path(file_name=file_name),
+                                            location_datetime_colnames=location_datetime_colnames,
+                                            zone_index=zone_index)
+        writer.write(rides=rides)
+        writer.close()
+
+    @staticmethod
+    def get_source_path(file_name):
+        return Config.PATH_DIR_FILTERED_RIDES / f'{file_name}.parquet'
+
+    def test_build_dataset(self):
+        rebuilt_months = filtered_rides.build_dataset(file_names=self.file_names, get_source_path=self.get_source_path)
+
+        self.assertListEqual(rebuilt_months, [(2016, 7), (2017, 1)])
+        self.assertEqual(pq.read_schema(str(filtered_rides.get_partition_path(year=2016, month=7))),
+                         filtered_rides.SCHEMA)
+
+        rides = filtered_rides.read_dataset(filters=[('year', '=', 2016), ('month', '=', 7)])
+
+        self.assertListEqual(list(rides['pickup_datetime'].astype(str)),
+                             ['2016-07-01 09:00:00', '2016-07-01 12:00:00', '2016-07-02 10:00:00'])
+        self.assertListEqual(list(rides['taxi_type'].astype(str)), ['green', 'yellow', 'green'])
+        self.assertListEqual(list(rides['pickup_location_id']), [86, 163, 100])
+        self.assertListEqual(list(rides['fare_amount']), [52.5, 52, 45])
+        self.assertTrue(rides['pickup_longitude'].isnull().all())
+
+        rides = filtered_rides.read_dataset(columns=['dropoff_location_id', 'fare_amount'],
+                                            filters=[('taxi_type', '=', 'fhv')])
+
+        self.assertEqual(rides.shape[0], 1)
+        self.assertTrue(rides['dropoff_location_id'].isnull().all())
+        self.assertTrue(rides['fare_amount'].isnull().all())
+
+    def test_location_ids_of_coordinates(self):
+        file_name = 'green_tripdata_2016-06.csv'
+        rides = pd.DataFrame({'lpep_pickup_datetime': ['2016-06-30 18:00:00', '2016-06-30 19:00:00'],
+                              'Pickup_latitude': [40.763939, 0.0], 'Pickup_longitude': [-73.977064, 0.0],
+                              'Dropoff_latitude': [40.642483, 40.642483],
+                              'Dropoff_longitude': [-73.779158, -73.779158], 'Fare_amount': ['52', '52']},
+                             columns=data_loader.get_schema(file_name=file_name).columns)
+
+        self.write_source(file_name=file_name, rides=rides,
+                          location_datetime_colnames=data_loader.get_location_datetime_columns(file_name=file_name),
+                          zone_index=zone_index.load_zone_index(grid_size=64))
+        rides = filtered_rides.read_source(source_path=self.get_source_path(file_name=file_name))
+
+        self.assertListEqual(rides.column('pickup_location_id').to_pylist(), [163, None])  # Midtown, no coordinates
+        self.assertListEqual(rides.column('dropoff_location_id').to_pylist(), [132, 132])  # JFK
+        self.assertListEqual(rides.column('pickup_latitude').to_pylist(), [40.763939, 0.0])
+
+    def test_rebuild_changed_months(self):
+        filtered_rides.build_dataset(file_names=self.file_names, get_source_path=self.get_source_path)
+
+        self.assertListEqual(filtered_rides.build_dataset(file_names=self.file_names,
+                                                          get_source_path=self.get_source_path), [])
+
+        os.utime(str(self.get_source_path(file_name='fhv_tripdata_2017-01.csv')), (0, 0))
+
+        self.assertListEqual(filtered_rides.build_dataset(file_names=self.file_names,
+                                                          get_source_path=self.get_source_path), [(2017, 1)])
+
+    def tearDown(self):
+        Config.PATH_DIR_FILTERED_RIDES = self.path_dir_filtered_rides
+        Config.PATH_DIR_FILTERED_RIDES_DATASET = self.path_dir_filtered_rides_dataset
+        shutil.rmtree(str(self.tmp_dir))
@@ -1,5 +1,7 @@
 import unittest
 
+import numpy as np
+
 from src.config.config import Config
 from src.util import data_loader
 from src.util.geo_handler import GeoHandler
@@ -39,5 +41,20 @@ class GeoParserTest(unittest.TestCase):
         self.assertFalse(self.geo_handler.is_jfk_lat_lon(lat=40.673344, lon=-73.717298))  # neither JFK nor Manhattan
         self.assertFalse(self.geo_handler.is_jfk_lat_lon(lat=40.763939, lon=-73.977064))  # Manhattan
 
+    def test_batch_by_coord_matches_scalar(self):
+        lat = np.array([40.763939, 40.866421, 40.702380, 40.642483, 40.879426, 40.815164, 40.673344, np.nan, 0.0])
+        lon = np.array([-73.977064, -73.921658, -74.011933, -73.779158, -73.914727, -73.982125, -73.717298, np.nan,
+                        0.0])
+
+        is_manhattan = self.geo_handler.is_manhattan_lat_lon_batch(lat=lat, lon=lon)
+        is_jfk = self.geo_handler.is_jfk_lat_lon_batch(lat=lat, lon=lon)
+
+        self.assertListEqual(list(is_manhattan), [True, True, True, False, False, False, False, False, False])
+        self.assertListEqual(list(is_jfk), [False, False, False, True, False, False, False, False, False])
+
+        for i in range(len(lat)):
+            self.assertEqual(is_manhattan[i], self.geo_handler.is_manhattan_lat_lon(lat=lat[i], lon=lon[i]))
+            self.assertEqual(is_jfk[i], self.geo_handler.is_jfk_lat_lon(lat=lat[i], lon=lon[i]))
+
     def tearDown(self):
         pass
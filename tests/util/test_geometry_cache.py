@@ -0,0 +1,42 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.config.config import Config
+from src.util import geometry_cache
+
+
+class GeometryCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.path_dir_geometry_cache, self.path_shape_file = Config.PATH_DIR_GEOMETRY_CACHE, Config.PATH_SHAPE_FILE_NYC
+        Config.PATH_DIR_GEOMETRY_CACHE = self.tmp_dir / 'geometry_cache'
+        Config.PATH_SHAPE_FILE_NYC = self.tmp_dir / 'zones.shp'
+        Config.PATH_SHAPE_FILE_NYC.write_bytes(b'shapes')
+
+        self.n_builds = 0
+
+    def build(self):
+        self.n_builds += 1
+
+        return {'value': 42}
+
+    def test_built_once(self):
+        self.assertEqual(geometry_cache.load_cached(name='test', build=self.build), {'value': 42})
+        self.assertEqual(geometry_cache.load_cached(name='test', build=self.build), {'value': 42})
+        self.assertEqual(self.n_builds, 1)
+
+    def test_rebuilt_for_changed_shape_file(self):
+        geometry_cache.load_cached(name='test', build=self.build)
+
+        Config.PATH_SHAPE_FILE_NYC.with_suffix('.dbf').write_bytes(b'attributes')
+        geometry_cache.get_shape_file_hash.cache_clear()
+        geometry_cache.load_cached(name='test', build=self.build)
+
+        self.assertEqual(self.n_builds, 2)
+
+    def tearDown(self):
+        Config.PATH_DIR_GEOMETRY_CACHE, Config.PATH_SHAPE_FILE_NYC = self.path_dir_geometry_cache, self.path_shape_file
+        geometry_cache.get_shape_file_hash.cache_clear()
+        shutil.rmtree(str(self.tmp_dir))
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.config.config import Config
+from src.util import manifest
+from src.util.manifest import Manifest
+
+
+class ManifestTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.path_dir_taxi, self.path_dir_results = Config.PATH_DIR_TAXI, Config.PATH_DIR_RESULTS
+        Config.PATH_DIR_TAXI = self.tmp_dir / 'taxi_raw'
+        Config.PATH_DIR_RESULTS = self.tmp_dir / 'results'
+        Config.PATH_DIR_TAXI.mkdir()
+
+        self.file_name = 'yellow_tripdata_2009-01.csv'
+        self.output_path = self.tmp_dir / 'output.csv'
+        self.output_path.touch()
+
+        with open(str(Config.PATH_DIR_TAXI / self.file_name), 'w') as f:
+            f.write('vendor_name,Trip_Pickup_DateTime\nVTS,2009-01-04 02:52:00\n')
+
+    def test_update_and_reload(self):
+        job_manifest = Manifest(job_name='test', code_version='1')
+
+        self.assertFalse(job_manifest.is_up_to_date(file_name=self.file_name))
+
+        job_manifest.update(file_name=self.file_name, output_path=self.output_path)
+        reloaded_manifest = Manifest(job_name='test', code_version='1')
+
+        self.assertTrue(reloaded_manifest.is_up_to_date(file_name=self.file_name))
+        self.assertEqual(reloaded_manifest.get_output_path(file_name=self.file_name), self.output_path)
+        self.assertFalse(Manifest(job_name='test', code_version='2').is_up_to_date(file_name=self.file_name))
+
+    def test_changed_file_is_outdated(self):
+        job_manifest = Manifest(job_name='test', code_version='1')
+        job_manifest.update(file_name=self.file_name, output_path=self.output_path)
+
+        with open(str(Config.PATH_DIR_TAXI / self.file_name), 'a') as f:
+            f.write('CMT,2009-01-31 23:59:59\n')
+
+        self.assertFalse(job_manifest.is_up_to_date(file_name=self.file_name))
+
+    def test_touched_file_is_up_to_date(self):
+        job_manifest = Manifest(job_name='test', code_version='1')
+        job_manifest.update(file_name=self.file_name, output_path=self.output_path)
+
+        os.utime(str(Config.PATH_DIR_TAXI / self.file_name), (0, 0))
+
+        self.assertTrue(job_manifest.is_up_to_date(file_name=self.file_name))
+
+    def test_missing_output_is_outdated(self):
+        job_manifest = Manifest(job_name='test', code_version='1')
+        job_manifest.update(file_name=self.file_name, output_path=self.output_path)
+
+        self.output_path.unlink()
+
+        self.assertFalse(job_manifest.is_up_to_date(file_name=self.file_name))
+
+    def test_code_version(self):
+        self.assertEqual(manifest.get_code_version(manifest), manifest.get_code_version(manifest))
+        self.assertNotEqual(manifest.get_code_version(manifest), manifest.get_code_version(manifest, unittest))
+
+    def tearDown(self):
+        Config.PATH_DIR_TAXI, Config.PATH_DIR_RESULTS = self.path_dir_taxi, self.path_dir_results
+        shutil.rmtree(str(self.tmp_dir))
@@ -0,0 +1,97 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from src.config.config import Config
+from src.util import data_loader, parquet_cache
+
+
+class ParquetCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.path_dir_taxi, self.path_dir_parquet = Config.PATH_DIR_TAXI, Config.PATH_DIR_PARQUET
+        Config.PATH_DIR_TAXI = self.tmp_dir / 'taxi_raw'
+        Config.PATH_DIR_PARQUET = self.tmp_dir / 'taxi_parquet'
+        Config.PATH_DIR_TAXI.mkdir()
+
+        self.file_name = 'yellow_tripdata_2009-01.csv'
+        self.columns = data_loader.load_schema()[self.file_name]
+
+        with open(str(Config.PATH_DIR_TAXI / self.file_name), 'w') as f:
+            f.write(','.join(self.columns) + '\n')
+            f.write('VTS,2009-01-04 02:52:00,2009-01-04 03:02:00,1,2.63,-73.991957,40.721567,,,-73.993803,40.695922,'
+                    'CASH,8.9,0.5,,0,0,9.4\n')
+            f.write('CMT,2009-01-31 23:59:59,2009-02-01 00:20:00,2,17.2,-73.977064,40.763939,,,-73.779158,40.642483,'
+                    'Credit,45,0,,9,4.15,58.15\n')
+            f.write('VTS,,,1,0.5,0,0,,,0,0,CASH,3.5,0,,0,0,3.5\n')
+
+    def test_convert_file(self):
+        self.assertFalse(parquet_cache.is_up_to_date(file_name=self.file_name))
+
+        n_rows = parquet_cache.convert_file(file_name=self.file_name, columns=self.columns, chunk_size=2)
+
+        self.assertEqual(n_rows, 3)
+        self.assertTrue(parquet_cache.is_up_to_date(file_name=self.file_name))
+        self.assertTrue(str(parquet_cache.get_cache_path(file_name=self.file_name))
+                        .endswith('taxi_type=yellow/year=2009/month=1/part-0.parquet'))
+
+        taxi_data = parquet_cache.read_file(file_name=self.file_name, columns=['pickup_datetime', 'dropoff_latitude',
+                                                                               'Fare_Amt'])
+
+        self.assertListEqual(list(taxi_data.columns), ['pickup_datetime', 'dropoff_latitude', 'Fare_Amt'])
+        self.assertEqual(taxi_data['pickup_datetime'][1], pd.Timestamp('2009-01-31 23:59:59'))
+        self.assertTrue(pd.isnull(taxi_data['pickup_datetime'][2]))
+        self.assertEqual(taxi_data['dropoff_latitude'][1], 40.642483)
+        self.assertEqual(str(taxi_data['Fare_Amt'].dtype), 'float32')
+
+    def test_column_types_from_config(self):
+        with open(str(Config.PATH_DIR_TAXI / self.file_name), 'a') as f:
+            f.write('VTS,2009-01-05 02:52:00,2009-01-05 03:02:00,1,2.63,0,0,2,,0,0,CASH,8.9,0.5,,0,0,9.4\n')
+
+        parquet_cache.convert_file(file_name=self.file_name, columns=self.columns, chunk_size=2)
+        taxi_data = parquet_cache.read_file(file_name=self.file_name, columns=['Rate_Code', 'mta_tax'])
+
+        self.assertEqual(str(taxi_data['Rate_Code'].dtype), 'float32')  # empty in the first chunk
+        self.assertEqual(taxi_data['Rate_Code'][3], 2)
+        self.assertEqual(str(taxi_data['mta_tax'].dtype), 'float32')
+
+        with open(str(Config.PATH_DIR_TAXI / self.file_name), 'a') as f:
+            f.write('VTS,2009-01-06 02:52:00,2009-01-06 03:02:00,1,2.63,0,0,,,0,0,CASH,unknown,0.5,,0,0,9.4\n')
+
+        with self.assertRaisesRegex(ValueError, 'Fare_Amt'):
+            parquet_cache.convert_file(file_name=self.file_name, columns=self.columns, chunk_size=2)
+
+        self.assertFalse(parquet_cache.is_up_to_date(file_name=self.file_name))
+        self.assertListEqual(list(parquet_cache.get_cache_dir(file_name=self.file_name).glob('*.tmp')), [])
+
+    def test_values_which_do_not_fit(self):
+        for colname, values, arrow_type in [('pickup_location_id', ['70000', '1', None], pa.int16()),
+                                            ('pickup_location_id', ['1.7', '1', None], pa.int16()),
+                                            ('Fare_Amt', ['1e40', '1', ' '], pa.float32()),
+                                            ('pickup_datetime', ['invalid', '2009-01-01 00:00:00', ''],
+                                             pa.timestamp('s'))]:
+            array = parquet_cache.to_arrow_array(colname=colname, values=pd.Series(values), arrow_type=arrow_type)
+
+            self.assertIsNone(array[0].as_py())
+            self.assertIsNotNone(array[1].as_py())
+            self.assertIsNone(array[2].as_py())
+
+            with self.assertRaisesRegex(ValueError, colname):
+                parquet_cache.to_arrow_array(colname=colname, values=pd.Series(values), arrow_type=arrow_type,
+                                             errors='raise')
+
+    def test_changed_file_is_outdated(self):
+        parquet_cache.convert_file(file_name=self.file_name, columns=self.columns)
+
+        with open(str(Config.PATH_DIR_TAXI / self.file_name), 'a') as f:
+            f.write('VTS,2009-01-05 02:52:00,2009-01-05 03:02:00,1,2.63,0,0,,,0,0,CASH,8.9,0.5,,0,0,9.4\n')
+
+        self.assertFalse(parquet_cache.is_up_to_date(file_name=self.file_name))
+
+    def tearDown(self):
+        Config.PATH_DIR_TAXI, Config.PATH_DIR_PARQUET = self.path_dir_taxi, self.path_dir_parquet
+        shutil.rmtree(str(self.tmp_dir))
@@ -0,0 +1,82 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.config.config import Config
+from src.util import data_loader, pipeline, quality_rules
+from src.util.pipeline import Consumer
+
+
+class RecordingConsumer(Consumer):
+    name = 'recording'
+
+    def __init__(self, requires_all_columns):
+        self.requires_all_columns = requires_all_columns
+        self.calls = []
+
+    def start_file(self, file_name, columns, location_datetime_colnames):
+        self.calls.append(('start_file', file_name))
+
+    def consume(self, chunk):
+        self.calls.append(('consume', list(chunk.columns), chunk.shape[0]))
+
+    def finish_file(self, rejection_counter):
+        self.calls.append(('finish_file', ))
+
+
+class PipelineTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.path_dir_taxi, self.use_parquet_cache = Config.PATH_DIR_TAXI, Config.USE_PARQUET_CACHE
+        self.chunk_size = Config.CHUNK_SIZE
+        Config.PATH_DIR_TAXI = self.tmp_dir
+        Config.USE_PARQUET_CACHE = False
+        Config.CHUNK_SIZE = 2
+
+        self.file_name = 'fhv_tripdata_2015-01.csv'
+        self.columns = data_loader.load_schema()[self.file_name]
+
+        with open(str(Config.PATH_DIR_TAXI / self.file_name), 'w') as f:
+            f.write(','.join(self.columns) + '\n')
+            f.write('B00001,2015-01-01 00:15:00,100\nB00001,2015-01-01 00:20:00,\nB00002,2015-01-02 10:00:00,230\n')
+
+    def test_scan_file_feeds_all_consumers(self):
+        consumers = [RecordingConsumer(requires_all_columns=False), RecordingConsumer(requires_all_columns=False)]
+
+        n_rows = pipeline.scan_file(file_name=self.file_name, columns=self.columns, consumers=consumers)
+
+        self.assertEqual(n_rows, 3)
+        self.assertListEqual(consumers[0].calls, consumers[1].calls)
+        self.assertListEqual(consumers[0].calls, [('start_file', self.file_name),
+                                                  ('consume', ['Pickup_date', 'locationID'], 2),
+                                                  ('consume', ['Pickup_date', 'locationID'], 1),
+                                                  ('finish_file', )])
+
+    def test_scan_file_reads_all_columns_if_required(self):
+        consumers = [RecordingConsumer(requires_all_columns=False), RecordingConsumer(requires_all_columns=True)]
+
+        pipeline.scan_file(file_name=self.file_name, columns=self.columns, consumers=consumers)
+
+        self.assertListEqual(consumers[0].calls[1][1], self.columns)
+
+    def test_scan_file_removes_rejected_rows(self):
+        with open(str(Config.PATH_DIR_TAXI / self.file_name), 'a') as f:
+            f.write('B00002,2015-03-01 10:00:00,230\nB00002,2015-01-03 10:00:00,999\n')
+
+        consumers = [RecordingConsumer(requires_all_columns=False)]
+        rejection_counter = quality_rules.RejectionCounter()
+
+        n_rows = pipeline.scan_file(file_name=self.file_name, columns=self.columns, consumers=consumers,
+                                    rejection_counter=rejection_counter)
+
+        self.assertEqual(n_rows, 5)
+        self.assertListEqual([call[2] for call in consumers[0].calls if call[0] == 'consume'], [2, 1, 0])
+        self.assertEqual(rejection_counter.n_rejected, 2)
+        self.assertEqual(rejection_counter.n_rejected_by_rule['pickup_date_in_file_month'], 1)
+        self.assertEqual(rejection_counter.n_rejected_by_rule['valid_location_ids'], 1)
+
+    def tearDown(self):
+        Config.PATH_DIR_TAXI, Config.USE_PARQUET_CACHE = self.path_dir_taxi, self.use_parquet_cache
+        Config.CHUNK_SIZE = self.chunk_size
+        shutil.rmtree(str(self.tmp_dir))
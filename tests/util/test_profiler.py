@@ -0,0 +1,81 @@
+import json
+import pstats
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from src.config.config import Config
+from src.util import profiler
+
+
+class ProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.path_dir_results, self.profile_file_names = Config.PATH_DIR_RESULTS, Config.PROFILE_FILE_NAMES
+        Config.PATH_DIR_RESULTS = self.tmp_dir / 'results'
+
+    def test_stages(self):
+        profile = profiler.FileProfile(file_name='yellow_tripdata_2009-01.csv')
+        chunks = [pd.DataFrame({'a': range(3)}), pd.DataFrame({'a': range(2)})]
+
+        for chunk in profile.iter_stage(name='read', chunks=chunks):
+            with profile.stage(name='geo_filter') as stage:
+                stage.count(rows_in=chunk.shape[0], rows_out=1)
+
+        profile.finish()
+        read, geo_filter = profile.stages['read'], profile.stages['geo_filter']
+
+        self.assertEqual((read.n_calls, read.rows_out), (3, 5))  # the last call finds the end of the stream
+        self.assertEqual((geo_filter.n_calls, geo_filter.rows_in, geo_filter.rows_out), (2, 5, 2))
+        self.assertGreater(geo_filter.peak_rss_mb, 0)
+        self.assertGreaterEqual(profile.seconds, read.seconds + geo_filter.seconds)
+
+    def test_run_report(self):
+        run_report = profiler.RunReport(job_name='test_job')
+
+        for file_name, n_rows in [('yellow_tripdata_2009-01.csv', 10), ('yellow_tripdata_2015-01.csv', 20),
+                                  ('green_tripdata_2017-01.csv', 5)]:
+            profile = profiler.FileProfile(file_name=file_name)
+
+            with profile.stage(name='write') as stage:
+                stage.count(rows_in=n_rows)
+
+            with profile.stage(name='read') as stage:
+                stage.count(rows_out=n_rows, bytes_read=100)
+
+            run_report.add(file_profile=profile.finish())
+
+        with open(str(run_report.save()), 'r') as f:
+            report = json.load(f)
+
+        self.assertListEqual(list(report['stages']), ['read', 'write'])
+        self.assertEqual(report['stages']['read']['rows_out'], 35)
+        self.assertEqual(report['stages']['read']['bytes_read'], 300)
+        self.assertDictEqual({era: values['n_files'] for era, values in report['eras'].items()},
+                             {'green/location_ids': 1, 'yellow/coordinates': 2})
+        self.assertEqual(report['eras']['yellow/coordinates']['stages']['write']['rows_in'], 30)
+        self.assertEqual(len(report['files']), 3)
+
+    def test_cprofile(self):
+        Config.PROFILE_FILE_NAMES = ['yellow_tripdata_2009-01.csv']
+
+        with profiler.cprofile(job_name='test_job', file_name='yellow_tripdata_2015-01.csv'):
+            sum(range(10))
+
+        with profiler.cprofile(job_name='test_job', file_name='yellow_tripdata_2009-01.csv', part_idx=1):
+            sum(range(10))
+
+        profile_path = profiler.get_profile_path(job_name='test_job', file_name='yellow_tripdata_2009-01.csv',
+                                                 part_idx=1)
+
+        self.assertListEqual(sorted(path.name for path in profile_path.parent.iterdir()),
+                             ['test_job_yellow_tripdata_2009-01.csv.part-1.prof',
+                              'test_job_yellow_tripdata_2009-01.csv.part-1.txt'])
+        self.assertGreater(pstats.Stats(str(profile_path)).total_calls, 0)
+
+    def tearDown(self):
+        Config.PATH_DIR_RESULTS, Config.PROFILE_FILE_NAMES = self.path_dir_results, self.profile_file_names
+        shutil.rmtree(str(self.tmp_dir))
@@ -0,0 +1,106 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config.config import Config
+from src.util import data_loader, quality_rules
+
+
+class QualityRulesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.path_dir_results = Config.PATH_DIR_RESULTS
+        Config.PATH_DIR_RESULTS = self.tmp_dir / 'results'
+
+    def test_coordinate_file(self):
+        file_name = 'yellow_tripdata_2009-01.csv'
+        chunk = pd.DataFrame({
+            'Trip_Pickup_DateTime': ['2009-01-04 02:52:00', '2008-12-15 10:00:00', '2009-02-01 10:00:00',
+                                     '2009-01-05 10:00:00', '2009-01-05 10:00:00', '2009-01-05 10:00:00',
+                                     '2009-01-05 10:00:00', 'invalid'],
+            'Trip_Dropoff_DateTime': ['2009-01-04 03:02:00', '2008-12-15 10:10:00', '2009-02-01 10:10:00',
+                                      '2009-01-05 10:10:00', '2009-01-05 09:59:59', '2009-01-05 10:10:00',
+                                      '2009-01-05 10:10:00', '2009-01-05 10:10:00'],
+            'Start_Lat': [40.721567, 40.721567, 40.721567, 0., 40.721567, np.nan, 40.721567, 40.721567],
+            'Start_Lon': [-73.991957, -73.991957, -73.991957, 0., -73.991957, np.nan, -73.991957, -73.991957],
+            'End_Lat': [40.695922] * 8,
+            'End_Lon': [-73.993803] * 8,
+            'Fare_Amt': [8.9, 8.9, 8.9, 8.9, 8.9, 8.9, -8.9, np.nan]
+        }, index=range(10, 18))
+        quality_filter = quality_rules.QualityFilter(
+            file_name=file_name, location_datetime_colnames=data_loader.get_location_datetime_columns(file_name)
+        )
+
+        taxi_data_filtered = quality_filter.apply(chunk=chunk)
+
+        self.assertListEqual(list(taxi_data_filtered.index), [10, 12, 15, 17])
+        self.assertDictEqual(quality_filter.counter.to_dict(), {'n_rows': 8, 'n_rejected': 4,
+                                                                'pickup_date_in_file_month': 1,
+                                                                'pickup_in_nyc': 1,
+                                                                'dropoff_in_nyc': 0,
+                                                                'non_negative_duration': 1,
+                                                                'non_negative_fare': 1,
+                                                                'valid_location_ids': 0})
+        self.assertNotIn('valid_location_ids', [rule.name for rule in quality_filter.rules])
+
+    def test_location_id_file(self):
+        file_name = 'green_tripdata_2016-07.csv'
+        location_datetime_colnames = data_loader.get_location_datetime_columns(file_name)
+        chunk = pd.DataFrame({'lpep_pickup_datetime': ['2016-07-01 00:00:00'] * 4,
+                              'lpep_dropoff_datetime': ['2016-07-01 00:20:00'] * 4,
+                              'fare_amount': [45.] * 4,
+                              'PULocationID': [132, 0, 132, np.nan],
+                              'DOLocationID': [265, 132, 266, 132]})
+        quality_filter = quality_rules.QualityFilter(file_name=file_name,
+                                                     location_datetime_colnames=location_datetime_colnames)
+
+        self.assertListEqual(sorted(quality_filter.get_columns()), sorted(chunk.columns))
+        self.assertListEqual(list(quality_filter.apply(chunk=chunk).index), [0, 3])
+        self.assertListEqual(quality_rules.get_extra_columns(file_name=file_name), ['fare_amount'])
+
+    def test_timestamps(self):
+        values = np.array(['2016-07-01 10:20:30', '07/01/2016 10:20', '2016-07-01', '2016-07-01 1x:20:30', np.nan],
+                          dtype=object)
+        expected = np.datetime64('2016-07-01T10:20:30').astype(np.int64)
+
+        self.assertListEqual(list(quality_rules.get_timestamps(values=values)),
+                             [expected, expected - 30] + [quality_rules.INVALID_TIMESTAMP] * 3)
+        self.assertListEqual(list(quality_rules.get_timestamps(values=np.array(['2016-07-01T10:20:30', 'NaT'],
+                                                                                dtype='datetime64[ns]'))),
+                             [expected, quality_rules.INVALID_TIMESTAMP])
+
+    def test_unknown_rule_type(self):
+        quality_rules_config = Config.QUALITY_RULES
+
+        try:
+            Config.QUALITY_RULES = {'speed': ('max_speed', {})}
+
+            with self.assertRaises(ValueError):
+                quality_rules.load_rules()
+        finally:
+            Config.QUALITY_RULES = quality_rules_config
+
+    def test_write_rejections(self):
+        counter = quality_rules.RejectionCounter()
+        counter.add(n_rows=10, n_rejected=3, n_rejected_by_rule={'pickup_in_nyc': 2, 'non_negative_fare': 2})
+        other_counter = quality_rules.RejectionCounter()
+        other_counter.add(n_rows=5, n_rejected=1, n_rejected_by_rule={'pickup_in_nyc': 1})
+        counter.merge(other=other_counter)
+        counter.save(file_path=quality_rules.get_rejections_path(job_name='job', file_name='a.csv'))
+
+        rejections_path = quality_rules.write_rejections(job_name='job', file_names=['a.csv', 'b.csv'])
+        rejections = pd.read_csv(rejections_path, index_col='file_name')
+
+        self.assertListEqual(list(rejections.index), ['a.csv'])
+        self.assertEqual(rejections.loc['a.csv', 'n_rows'], 15)
+        self.assertEqual(rejections.loc['a.csv', 'n_rejected'], 4)
+        self.assertEqual(rejections.loc['a.csv', 'pickup_in_nyc'], 3)
+        self.assertEqual(rejections.loc['a.csv', 'dropoff_in_nyc'], 0)
+
+    def tearDown(self):
+        Config.PATH_DIR_RESULTS = self.path_dir_results
+        shutil.rmtree(str(self.tmp_dir))
@@ -0,0 +1,145 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from src.config.config import Config
+from src.taxi import count_rides_per_day, run_analyses
+from src.util import data_loader, pipeline, quality_rules, rollup_cube
+from src.util.day_counter import DayCounter
+
+
+class RollupCubeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.path_dir_results, self.path_dir_taxi = Config.PATH_DIR_RESULTS, Config.PATH_DIR_TAXI
+        self.use_parquet_cache, self.count_engine = Config.USE_PARQUET_CACHE, Config.COUNT_ENGINE
+        self.quality_rules = Config.QUALITY_RULES
+        Config.PATH_DIR_RESULTS = self.tmp_dir / 'results'
+        Config.PATH_DIR_TAXI = self.tmp_dir
+        Config.USE_PARQUET_CACHE = False
+
+        self.pickup_datetimes = np.array(['2016-07-01 10:00:00', '2016-07-01 10:30:00', '2016-07-02 23:00:00',
+                                          '07/02/2016 08:00', '2016-07-02', 'invalid', '2016-02-30 10:00:00'],
+                                         dtype=object)
+        self.cube = self.build_cube(taxi_type='green', pickup_datetimes=self.pickup_datetimes,
+                                    pickup_location_ids=[132, 132, 100, 132, 4, 132, 132],
+                                    dropoff_location_ids=[230, 230, 0, 48, 4, 230, 230],
+                                    fare_amounts=[52, 52.5, 10, np.nan, 5, 7, 8])
+
+    @staticmethod
+    def build_cube(taxi_type, pickup_datetimes, pickup_location_ids, dropoff_location_ids, fare_amounts):
+        cube_builder = rollup_cube.CubeBuilder(taxi_type=taxi_type)
+
+        for chunk in [slice(0, 3), slice(3, None)]:
+            cube_builder.add(day_numbers=rollup_cube.get_day_numbers(values=pickup_datetimes[chunk]),
+                             hours=np.array([10, 10, 23, 8, -1, -1, 10])[chunk],
+                             pickup_location_ids=np.array(pickup_location_ids)[chunk],
+                             dropoff_location_ids=np.array(dropoff_location_ids)[chunk],
+                             sums={'fare_amount': np.array(fare_amounts)[chunk]})
+
+        return cube_builder.finish()
+
+    def test_query(self):
+        self.assertEqual(self.cube.size, 6)
+
+        result = self.cube.query(group_by=['date', 'hour'], measures=['n_rides', 'fare_amount'])
+
+        self.assertListEqual([(date.strftime('%Y-%m-%d'), hour) for date, hour in result.index],
+                             [('2016-07-01', 10), ('2016-07-02', 8), ('2016-07-02', 23)])
+        self.assertListEqual(list(result['n_rides']), [2, 1, 1])
+        self.assertListEqual(list(result['fare_amount']), [104.5, 0, 10])
+
+        result = self.cube.query(group_by=['pickup_borough'], dates=['2016-07-02'])
+
+        self.assertDictEqual(result['n_rides'].to_dict(), {'Manhattan': 2, 'Queens': 1})
+
+        result = self.cube.query(group_by=['dropoff_location_id'], pickup_boroughs=['Queens'], hours=[10],
+                                 taxi_types=['green', 'yellow'])
+
+        self.assertDictEqual(result['n_rides'].to_dict(), {230: 3})
+        self.assertEqual(self.cube.query(taxi_types=['yellow'])['n_rides'].sum(), 0)
+        self.assertEqual(self.cube.query()['n_rides'].sum(), 7)
+
+        with self.assertRaises(ValueError):
+            self.cube.query(group_by=['weekday'])
+
+    def test_reduces_to_day_counts(self):
+        expected_day_counter = DayCounter()
+        expected_day_counter.add_strings(values=self.pickup_datetimes)
+
+        day_counter = self.cube.to_day_counter()
+
+        self.assertEqual(day_counter.first_day, expected_day_counter.first_day)
+        self.assertListEqual(list(day_counter.counts), list(expected_day_counter.counts))
+        self.assertEqual(day_counter.n_invalid, expected_day_counter.n_invalid)
+
+    def test_datetimes(self):
+        values = np.array(['2016-07-01T10:00', '1969-12-31T23:00', 'NaT'], dtype='datetime64[s]')
+
+        self.assertListEqual(list(rollup_cube.get_day_numbers(values=values)),
+                             [16983, -1, rollup_cube.INVALID_DAY])
+
+    def test_write_and_load_cube(self):
+        yellow_cube = self.build_cube(taxi_type='yellow', pickup_datetimes=self.pickup_datetimes,
+                                      pickup_location_ids=[1] * 7, dropoff_location_ids=[2] * 7,
+                                      fare_amounts=[1] * 7)
+        file_paths = [self.tmp_dir / 'green.npz', self.tmp_dir / 'yellow.npz']
+        self.cube.save(file_path=file_paths[0])
+        yellow_cube.save(file_path=file_paths[1])
+
+        rollup_cube.write_cube(file_paths=file_paths)
+        cube = rollup_cube.load_cube()
+
+        self.assertEqual(cube.size, self.cube.size + yellow_cube.size)
+        self.assertDictEqual(cube.query(group_by=['taxi_type'])['n_rides'].to_dict(), {'green': 7, 'yellow': 7})
+
+        cube = rollup_cube.load_cube(min_date='2016-07-02', taxi_types=['yellow'])
+
+        result = cube.query(group_by=['date'], measures=['fare_amount'])
+
+        self.assertListEqual(list(result.index.strftime('%Y-%m-%d')), ['2016-07-02'])
+        self.assertListEqual(list(result['fare_amount']), [3.])
+
+    def test_cube_engine_reports_rejections(self):
+        file_name = 'fhv_tripdata_2015-01.csv'
+        columns = data_loader.load_schema()[file_name]
+
+        with open(str(Config.PATH_DIR_TAXI / file_name), 'w') as f:
+            f.write(','.join(columns) + '\n')
+            f.write('B00001,2015-01-01 00:15:00,100\nB00001,2015-03-01 10:00:00,230\nB00002,invalid,230\n'
+                    'B00002,2015-01-03 10:00:00,999\n')
+
+        self.assertFalse(count_rides_per_day.is_cube_up_to_date(file_name=file_name))
+
+        consumer = run_analyses.RollupCubeConsumer()
+        pipeline.scan_file(file_name=file_name, columns=columns, consumers=[consumer])
+        run_analyses.load_manifest(consumer=consumer).update(file_name=file_name,
+                                                             output_path=consumer.get_output_path(file_name=file_name))
+        Config.COUNT_ENGINE = 'pandas'
+        expected_rejection_counter = quality_rules.RejectionCounter()
+        expected_day_counter = count_rides_per_day.count_rides_per_day(file_name=file_name,
+                                                                       rejection_counter=expected_rejection_counter)
+        Config.COUNT_ENGINE = 'cube'
+        rejection_counter = quality_rules.RejectionCounter()
+        day_counter = count_rides_per_day.count_rides_per_day(file_name=file_name,
+                                                              rejection_counter=rejection_counter)
+
+        self.assertTrue(count_rides_per_day.is_cube_up_to_date(file_name=file_name))
+        self.assertTrue(day_counter.to_frame().equals(expected_day_counter.to_frame()))
+        self.assertEqual(day_counter.n_invalid, expected_day_counter.n_invalid)
+        self.assertDictEqual(rejection_counter.to_dict(), expected_rejection_counter.to_dict())
+        self.assertEqual(rejection_counter.n_rejected, 2)
+
+        Config.QUALITY_RULES = {}  # the cube was built under other rules, the file is counted with pandas
+
+        self.assertFalse(count_rides_per_day.is_cube_up_to_date(file_name=file_name))
+        self.assertEqual(count_rides_per_day.count_rides_per_day(file_name=file_name).get_n_rides(), 3)
+
+    def tearDown(self):
+        Config.PATH_DIR_RESULTS, Config.PATH_DIR_TAXI = self.path_dir_results, self.path_dir_taxi
+        Config.USE_PARQUET_CACHE, Config.COUNT_ENGINE = self.use_parquet_cache, self.count_engine
+        Config.QUALITY_RULES = self.quality_rules
+        shutil.rmtree(str(self.tmp_dir))
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.config.config import Config
+from src.util import route_filter
+from src.util.route_filter import Route, RouteFilter
+from src.util.zone_index import N_LOCATION_IDS
+
+
+class RouteFilterTest(unittest.TestCase):
+    def test_resolve_location_ids(self):
+        self.assertListEqual(list(route_filter.resolve_location_ids(zones=['JFK Airport', 'EWR', 138])), [1, 132, 138])
+        self.assertListEqual(list(route_filter.resolve_location_ids(zones=['Manhattan'])),
+                             sorted(Config.MANHATTAN_LOCATION_IDS))
+
+        with self.assertRaises(ValueError):
+            route_filter.resolve_location_ids(zones=['Atlantis'])
+
+    def test_route_masks_match_location_sets(self):
+        routes = [Route(name='manhattan_to_jfk', origins=['Manhattan'], destinations=['JFK Airport']),
+                  Route(name='queens_to_lga_or_ewr', origins=['Queens'], destinations=['LaGuardia Airport', 'EWR'])]
+        rng = np.random.RandomState(0)
+        pickup_location_ids = rng.randint(0, N_LOCATION_IDS, size=100000)
+        dropoff_location_ids = np.where(rng.rand(100000) < 0.5, rng.choice([1, 132, 138], size=100000),
+                                        rng.randint(0, N_LOCATION_IDS, size=100000))
+
+        rows, route_masks = RouteFilter(routes=routes).get_route_masks(pickup_location_ids=pickup_location_ids,
+                                                                       dropoff_location_ids=dropoff_location_ids)
+
+        for route, route_mask in zip(routes, route_masks):
+            expected = np.isin(pickup_location_ids, route.origin_location_ids) \
+                & np.isin(dropoff_location_ids, route.destination_location_ids)
+
+            self.assertTrue(expected.any())
+            self.assertListEqual(list(rows[route_mask]), list(np.flatnonzero(expected)))
+
+    def test_split_by_route(self):
+        routes = [Route(name='manhattan_to_jfk', origins=['Manhattan'], destinations=['JFK Airport']),
+                  Route(name='manhattan_to_lga', origins=['Manhattan'], destinations=['LaGuardia Airport'])]
+        taxi_data = pd.DataFrame({'fare': [1, 2, 3, 4]}, index=[10, 11, 12, 13])
+
+        taxi_data_by_route = RouteFilter(routes=routes).split_by_route(
+            taxi_data=taxi_data,
+            pickup_location_ids=np.array([100, 132, 100, 0]),
+            dropoff_location_ids=np.array([132, 100, 138, 132])
+        )
+
+        self.assertListEqual(list(taxi_data_by_route['manhattan_to_jfk'].index), [10])
+        self.assertListEqual(list(taxi_data_by_route['manhattan_to_lga'].index), [12])
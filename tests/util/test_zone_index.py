@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from shapely.geometry import Point
+
+from src.config.config import Config
+from src.util import zone_index
+from src.util.data_loader import LocationTimeColNames
+from src.util.zone_index import UNKNOWN_LOCATION_ID
+
+
+class ZoneIndexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.zone_index = zone_index.load_zone_index(grid_size=64)
+
+    def test_lookup_known_points(self):
+        location_ids = self.zone_index.lookup(lat=[40.642483, 40.763939, 40.689531], lon=[-73.779158, -73.977064,
+                                                                                         -74.174462])
+
+        self.assertListEqual(list(location_ids), [132, 163, 1])  # JFK, Midtown Center, Newark Airport
+
+    def test_lookup_unknown_points(self):
+        location_ids = self.zone_index.lookup(lat=[0.0, np.nan, 40.8], lon=[0.0, np.nan, -74.5])
+
+        self.assertTrue((location_ids == UNKNOWN_LOCATION_ID).all())
+
+    def test_lookup_matches_polygons(self):
+        random_state = np.random.RandomState(42)
+        lat = random_state.uniform(40.49, 40.92, 2000)
+        lon = random_state.uniform(-74.26, -73.70, 2000)
+
+        location_ids = self.zone_index.lookup(lat=lat, lon=lon)
+
+        for i in range(len(lat)):
+            point = Point(lon[i], lat[i])
+            expected = [location_id for location_id, polygon in zip(self.zone_index.location_ids,
+                                                                     self.zone_index.polygons)
+                        if point.within(polygon)]
+
+            self.assertEqual(location_ids[i], expected[0] if expected else UNKNOWN_LOCATION_ID)
+
+    def test_normalize_location_ids(self):
+        taxi_data = pd.DataFrame({'Start_Lat': [40.763939, 40.642483], 'Start_Lon': [-73.977064, -73.779158],
+                                  'End_Lat': [40.642483, 0.0], 'End_Lon': [-73.779158, 0.0]})
+        colnames = LocationTimeColNames(pickup_location_id_colname='nan', pickup_lon_colname='Start_Lon',
+                                        pickup_lat_colname='Start_Lat', pickup_datetime_colname='nan',
+                                        dropoff_location_id_colname='nan', dropoff_lon_colname='End_Lon',
+                                        dropoff_lat_colname='End_Lat', dropoff_datetime_colname='nan')
+
+        colnames = zone_index.normalize_location_ids(taxi_data=taxi_data, location_datetime_colnames=colnames,
+                                                     zone_index=self.zone_index)
+
+        self.assertListEqual(list(taxi_data[colnames.pickup_location_id_colname]), [163, 132])
+        self.assertListEqual(list(taxi_data[colnames.dropoff_location_id_colname]), [132, UNKNOWN_LOCATION_ID])
+
+    def test_n_location_ids(self):
+        self.assertEqual(zone_index.N_LOCATION_IDS, Config.TAXI_ZONES['LocationID'].max() + 1)